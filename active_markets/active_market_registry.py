@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Реестр рынков в анализе
+Общий для потоков приема, восстановления, планировщика и циклов рантайма.
+Захват, освобождение и обновление рынка - атомарные операции под одной блокировкой,
+поэтому один рынок не запускается дважды, а остановка выполняется ровно один раз.
+Записи компактные (__slots__) и после публикации не меняются: обновление подменяет
+запись целиком, и читатели получают согласованный снимок без копирования записей.
+"""
+
+import heapq
+import threading
+import time
+from datetime import datetime
+from monitoring.metrics_registry import get_metrics_registry
+
+
+class ActiveMarket:
+    """Состояние рынка в анализе"""
+
+    __slots__ = ('market_id', 'slug', 'question', 'start_time', 'deadline', 'last_log',
+                 'last_sample', 'last_values', 'interval', 'detected_at')
+
+    def __init__(self, market_id, slug, question, deadline=None, detected_at=None):
+        self.market_id = market_id
+        self.slug = slug
+        self.question = question
+        self.start_time = datetime.now()
+        # Конец окна анализа по time.monotonic (None - еще не известен)
+        self.deadline = deadline
+        self.last_log = self.start_time
+        self.last_sample = None
+        # (процент Yes, объем) последнего снимка
+        self.last_values = None
+        self.interval = None
+        self.detected_at = detected_at
+
+    def replace(self, **fields):
+        """Копия записи с измененными полями"""
+        market = ActiveMarket.__new__(ActiveMarket)
+        for name in ActiveMarket.__slots__:
+            setattr(market, name, fields.pop(name) if name in fields else getattr(self, name))
+        if fields:
+            raise AttributeError(f"Неизвестные поля рынка: {', '.join(fields)}")
+        return market
+
+
+class ActiveMarketRegistry:
+    """Рынки в анализе с индексами по id, slug и концу окна"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.markets = {}
+        self.ids_by_slug = {}
+        # Куча (конец окна, id); устаревшие элементы отбрасываются при просмотре
+        self.deadlines = []
+        self.metrics = get_metrics_registry()
+
+    def __contains__(self, market_id):
+        with self.lock:
+            return market_id in self.markets
+
+    def __len__(self):
+        with self.lock:
+            return len(self.markets)
+
+    def get(self, market_id):
+        """Текущая запись рынка или None"""
+        with self.lock:
+            return self.markets.get(market_id)
+
+    def has_slug(self, slug):
+        """Анализируется ли рынок с таким slug"""
+        with self.lock:
+            return slug in self.ids_by_slug
+
+    def claim(self, market_id, slug, question, deadline=None, detected_at=None):
+        """Захват рынка для анализа: запись или None, если рынок (id или slug) уже в анализе"""
+        with self.lock:
+            if market_id in self.markets or slug in self.ids_by_slug:
+                self.metrics.inc('registry.duplicate_claims')
+                return None
+            market = ActiveMarket(market_id, slug, question, deadline, detected_at)
+            self.markets[market_id] = market
+            self.ids_by_slug[slug] = market_id
+            if deadline is not None:
+                heapq.heappush(self.deadlines, (deadline, market_id))
+            self.metrics.set_gauge('registry.active_markets', len(self.markets))
+            return market
+
+    def release(self, market_id):
+        """Освобождение рынка: запись получает только первый из одновременных вызовов"""
+        with self.lock:
+            market = self.markets.pop(market_id, None)
+            if market is None:
+                return None
+            if self.ids_by_slug.get(market.slug) == market_id:
+                del self.ids_by_slug[market.slug]
+            self.metrics.set_gauge('registry.active_markets', len(self.markets))
+            return market
+
+    def update(self, market_id, **fields):
+        """Атомарное обновление полей рынка: новая запись или None, если рынок уже освобожден"""
+        with self.lock:
+            market = self.markets.get(market_id)
+            if market is None:
+                return None
+            updated = market.replace(**fields)
+            self.markets[market_id] = updated
+            if updated.deadline is not None and updated.deadline != market.deadline:
+                heapq.heappush(self.deadlines, (updated.deadline, market_id))
+            return updated
+
+    def take_detected_at(self, market_id):
+        """Время обнаружения рынка (один раз: после чтения сбрасывается)"""
+        with self.lock:
+            market = self.markets.get(market_id)
+            if market is None or market.detected_at is None:
+                return None
+            self.markets[market_id] = market.replace(detected_at=None)
+            return market.detected_at
+
+    def expired(self, now=None):
+        """Рынки, у которых закончилось окно анализа"""
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            expired = []
+            while self.deadlines and self.deadlines[0][0] <= now:
+                deadline, market_id = heapq.heappop(self.deadlines)
+                market = self.markets.get(market_id)
+                # Элемент кучи мог устареть: рынок освобожден или окно сдвинуто
+                if market is not None and market.deadline == deadline:
+                    expired.append(market)
+            for market in expired:
+                # Рынок остается в куче, пока его не освободят
+                heapq.heappush(self.deadlines, (market.deadline, market.market_id))
+            return expired
+
+    def snapshot(self):
+        """Согласованный снимок {id: запись}; записи неизменяемы, копируется только словарь"""
+        with self.lock:
+            return dict(self.markets)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Адаптивный интервал опроса рынка
+Интервал сокращается после резких изменений процента Yes и объема и растет,
+пока рынок стоит на месте; изменения сглаживаются EWMA абсолютных приращений
+"""
+
+import re
+
+# Сглаживание изменений между снимками
+CHANGE_ALPHA = 0.3
+
+# Изменение объема на 10% весит как сдвиг Yes на 1 п.п.
+VOLUME_CHANGE_WEIGHT = 0.1
+
+# Пороги сглаженного изменения (п.п. за снимок)
+VOLATILE_CHANGE = 1.0
+FLAT_CHANGE = 0.2
+
+SHRINK_FACTOR = 0.5
+GROW_FACTOR = 1.5
+
+VOLUME_PATTERN = re.compile(r'[\d,.]+')
+
+
+def parse_volume(volume):
+    """Объем вида '$1,234' в число (0 для 'New' и нераспознанного)"""
+    match = VOLUME_PATTERN.search(str(volume or ''))
+    if not match:
+        return 0.0
+    try:
+        return float(match.group(0).replace(',', ''))
+    except ValueError:
+        return 0.0
+
+
+class AdaptivePingInterval:
+    def __init__(self, base_seconds, min_seconds, max_seconds):
+        self.base_seconds = base_seconds
+        self.min_seconds = min(min_seconds, base_seconds)
+        self.max_seconds = max(max_seconds, base_seconds)
+        self.interval_seconds = base_seconds
+        self.change_ewma = None
+        self.last_yes = None
+        self.last_volume = None
+
+    def observe(self, analysis_data):
+        """Учет нового снимка, возвращает интервал до следующего"""
+        yes_percentage = float(analysis_data.get('yes_percentage') or 0)
+        volume = parse_volume(analysis_data.get('volume'))
+
+        if self.last_yes is not None:
+            change = abs(yes_percentage - self.last_yes)
+            if self.last_volume:
+                change += abs(volume - self.last_volume) / self.last_volume * 100 * VOLUME_CHANGE_WEIGHT
+            if self.change_ewma is None:
+                self.change_ewma = change
+            else:
+                self.change_ewma += CHANGE_ALPHA * (change - self.change_ewma)
+
+            if self.change_ewma >= VOLATILE_CHANGE:
+                self.interval_seconds *= SHRINK_FACTOR
+            elif self.change_ewma <= FLAT_CHANGE:
+                self.interval_seconds *= GROW_FACTOR
+            self.interval_seconds = min(self.max_seconds, max(self.min_seconds, self.interval_seconds))
+
+        self.last_yes = yes_percentage
+        self.last_volume = volume
+        return self.interval_seconds
+
+    def scrape_difference(self, gap_seconds):
+        """Один снимок через gap_seconds против фиксированного интервала: (сэкономлено, лишних), оба не меньше 0"""
+        difference = gap_seconds / self.base_seconds - 1
+        return max(0.0, difference), max(0.0, -difference)
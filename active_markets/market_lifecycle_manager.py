@@ -1,11 +1,20 @@
 import logging
+import math
 import time
+import asyncio
 import threading
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from config.config_loader import ConfigLoader
 from analysis.market_analyzer_core import MarketAnalyzerCore
 from database.analytic_updater import AnalyticUpdater
 from telegram.market_stopped_logger import MarketStoppedLogger
+from monitoring.metrics_registry import get_metrics_registry
+from sharding.shard_coordinator import get_shard_coordinator, DEADLINE_GRACE_SECONDS as SHARD_DEADLINE_GRACE_SECONDS
+from analysis.scrape_pipeline import get_scrape_pipeline
+from analysis.deadline import new_analysis_deadline
+from analysis.browser_runtime import get_browser_runtime
+from active_markets.market_scheduler import MarketJob, get_market_scheduler
+from active_markets.adaptive_ping_interval import AdaptivePingInterval
 
 logger = logging.getLogger(__name__)
 
@@ -14,216 +23,224 @@ class MarketLifecycleManager:
         self.bot = bot_instance
         self.config = ConfigLoader()
         self.analyzer = MarketAnalyzerCore()
-        self.updater = AnalyticUpdater()
+        # AnalyticUpdater - свой у каждого потока: у psycopg2-соединения одна транзакция на всех
+        self.thread_state = threading.local()
         self.stopped_logger = MarketStoppedLogger()
+        self.metrics = get_metrics_registry()
+        self.shard_coordinator = get_shard_coordinator()
+        self.pipeline = get_scrape_pipeline()
+        self.runtime = get_browser_runtime()
+        self.scheduler = get_market_scheduler()
         
         # Конфигурация
         self.analysis_time_minutes = self.config.get_analysis_time_minutes()
         self.max_retries = self.config.get_max_retries()
         self.retry_delay_seconds = self.config.get_retry_delay_seconds()
         self.ping_interval_minutes = self.config.get_mkrt_analytic_ping_min()
-        
-        # Ограничение на количество одновременно работающих потоков
-        self.max_concurrent_threads = 3  # Максимум 3 потока одновременно
-        self.active_threads = 0
-        self.thread_lock = threading.Lock()
-    
-    def can_start_new_thread(self):
-        """Проверяет, можно ли запустить новый поток"""
-        with self.thread_lock:
-            return self.active_threads < self.max_concurrent_threads
-    
-    def increment_thread_count(self):
-        """Увеличивает счетчик активных потоков"""
-        with self.thread_lock:
-            self.active_threads += 1
-            logger.debug(f"📊 Активных потоков: {self.active_threads}/{self.max_concurrent_threads}")
+        self.ping_interval_min_seconds = self.config.get_ping_interval_min_seconds()
+        self.ping_interval_max_seconds = self.config.get_ping_interval_max_seconds()
+        self.min_samples_per_window = self.config.get_min_samples_per_window()
     
-    def decrement_thread_count(self):
-        """Уменьшает счетчик активных потоков"""
-        with self.thread_lock:
-            self.active_threads = max(0, self.active_threads - 1)
-            logger.debug(f"📊 Активных потоков: {self.active_threads}/{self.max_concurrent_threads}")
-    
-    def start_market_analysis(self, market_id, market):
-        """Начало анализа рынка"""
+    def start_market_analysis(self, market_id, market, detected_at=None):
+        """Начало анализа рынка: False, если рынок уже анализируется"""
         try:
-            self.bot.active_markets[market_id] = {
-                'start_time': datetime.now(),
-                'last_log': datetime.now(),
-                'slug': market['slug'],
-                'question': market['question']
-            }
+            claimed = self.bot.active_markets.claim(
+                market_id, market['slug'], market['question'],
+                deadline=time.monotonic() + self.analysis_time_minutes * 60, detected_at=detected_at
+            )
+            if not claimed:
+                logger.info(f"ℹ️ Рынок {market['slug']} уже в процессе анализа")
+                return False
             logger.info(f"✅ Анализ рынка {market['slug']} начат")
+            return True
         except Exception as e:
             logger.error(f"❌ Ошибка начала анализа рынка {market['slug']}: {e}")
+            return False
     
-    def analyze_market_continuously(self, market_id, slug):
-        """Непрерывный анализ рынка в течение заданного времени"""
-        try:
-            # Проверяем, можно ли запустить новый поток
-            if not self.can_start_new_thread():
-                logger.warning(f"⚠️ Достигнут лимит потоков для рынка {slug}, откладываем анализ")
-                return
-            
-            self.increment_thread_count()
-            
-            start_time = datetime.now()
-            end_time = start_time + timedelta(minutes=self.analysis_time_minutes)
-            retry_count = 0
-            
-            logger.info(f"Starting continuous analysis for market {slug} for {self.analysis_time_minutes} minutes")
-            
-            while datetime.now() < end_time and self.bot.running:
-                try:
-                    # Анализируем рынок
-                    analysis_data = self.analyzer.analyze_market(slug)
-                    
-                    if analysis_data:
-                        # Обновляем данные в базе
-                        self.updater.update_market_analysis(market_id, analysis_data)
-                        retry_count = 0  # Сбрасываем счетчик ошибок при успехе
-                    else:
-                        retry_count += 1
-                        if retry_count >= self.max_retries:
-                            logger.error(f"Max retries reached for market {slug}, stopping analysis")
-                            self.stop_market_analysis(market_id, "закрыт")
-                            break
-                        else:
-                            logger.warning(f"Analysis failed for market {slug}, retry {retry_count}/{self.max_retries}")
-                            time.sleep(self.retry_delay_seconds)
-                            continue
-                    
-                    # Ждем заданный интервал перед следующим анализом
-                    time.sleep(self.ping_interval_minutes * 60)
-                    
-                except Exception as e:
-                    retry_count += 1
-                    error_msg = f"Error analyzing market {slug}: {e}"
-                    logger.error(error_msg)
-                    from telegram.error_logger import ErrorLogger
-                    error_logger = ErrorLogger()
-                    error_logger.log_error(error_msg, slug)
-                    
-                    if retry_count >= self.max_retries:
-                        logger.error(f"Max retries reached for market {slug}, stopping analysis")
-                        self.stop_market_analysis(market_id, "закрыт")
-                        break
-                    else:
-                        time.sleep(self.retry_delay_seconds)
-            
-            # Завершаем анализ рынка
-            if market_id in self.bot.active_markets:
-                self.stop_market_analysis(market_id, "закрыт")
-                
-        except Exception as e:
-            logger.error(f"❌ Критическая ошибка в анализе рынка {slug}: {e}")
-        finally:
-            # Всегда уменьшаем счетчик потоков
-            self.decrement_thread_count()
+    def launch_market_analysis(self, market_id, slug, restored=False):
+        """Постановка рынка в планировщик снимков"""
+        if restored:
+            self.runtime.submit(self._launch_restored(market_id, slug))
+            return
+        
+        logger.info(f"Starting continuous analysis for market {slug} for {self.analysis_time_minutes} minutes")
+        self.scheduler.add_job(MarketJob(
+            market_id, slug, self.run_market_sample,
+            window_seconds=self.analysis_time_minutes * 60,
+            interval=self.new_ping_interval(self.ping_interval_minutes * 60),
+            min_samples=self.min_samples_per_window
+        ))
     
-    def analyze_market_continuously_restored(self, market_id, slug):
-        """Непрерывный анализ восстановленного рынка"""
+    async def _launch_restored(self, market_id, slug):
+        """Восстановленный рынок: окно анализа отсчитывается от created_at_analytic"""
         try:
-            # Проверяем, можно ли запустить новый поток
-            if not self.can_start_new_thread():
-                logger.warning(f"⚠️ Достигнут лимит потоков для восстановленного рынка {slug}, откладываем анализ")
-                return
-            
-            self.increment_thread_count()
-            
-            # Получаем время создания из базы
             from database.active_markets_reader import ActiveMarketsReader
             reader = ActiveMarketsReader()
-            market_info = reader.get_market_info(market_id)
+            market_info = await self.runtime.run_blocking('io', reader.get_market_info, market_id)
             if not market_info:
                 logger.error(f"❌ Не удалось получить информацию о рынке {market_id}")
                 return
             
             created_at = market_info['created_at_analytic']
             if created_at.tzinfo is None:
-                from datetime import timezone
                 created_at = created_at.replace(tzinfo=timezone.utc)
             
-            # Вычисляем время окончания анализа
             end_time = created_at + timedelta(minutes=self.analysis_time_minutes)
-            current_time = datetime.now(timezone.utc)
-            
-            if current_time >= end_time:
+            remaining_seconds = (end_time - datetime.now(timezone.utc)).total_seconds()
+            if remaining_seconds <= 0:
                 logger.info(f"⏰ Время анализа для восстановленного рынка {slug} истекло")
-                self.stop_market_analysis(market_id, "закрыт")
+                await self.finish_market(market_id)
                 return
             
-            # Продолжаем анализ до истечения времени
-            remaining_minutes = (end_time - current_time).total_seconds() / 60
-            logger.info(f"🔄 Продолжаем анализ восстановленного рынка {slug}, осталось {remaining_minutes:.1f} минут")
-            
-            retry_count = 0
-            
-            while datetime.now(timezone.utc) < end_time and self.bot.running:
-                try:
-                    # Анализируем рынок
-                    analysis_data = self.analyzer.analyze_market(slug)
-                    
-                    if analysis_data:
-                        # Обновляем данные в базе
-                        self.updater.update_market_analysis(market_id, analysis_data)
-                        retry_count = 0
-                    else:
-                        retry_count += 1
-                        if retry_count >= self.max_retries:
-                            logger.error(f"Max retries reached for restored market {slug}, stopping analysis")
-                            self.stop_market_analysis(market_id, "закрыт")
-                            break
-                        else:
-                            logger.warning(f"Analysis failed for restored market {slug}, retry {retry_count}/{self.max_retries}")
-                            time.sleep(self.retry_delay_seconds)
-                            continue
-                    
-                    # Ждем 1 минуту перед следующим анализом
-                    time.sleep(60)
-                    
-                except Exception as e:
-                    retry_count += 1
-                    error_msg = f"Error analyzing restored market {slug}: {e}"
-                    logger.error(error_msg)
-                    from telegram.error_logger import ErrorLogger
-                    error_logger = ErrorLogger()
-                    error_logger.log_error(error_msg, slug)
-                    
-                    if retry_count >= self.max_retries:
-                        logger.error(f"Max retries reached for restored market {slug}, stopping analysis")
-                        self.stop_market_analysis(market_id, "закрыт")
-                        break
-                    else:
-                        time.sleep(self.retry_delay_seconds)
-            
-            # Завершаем анализ рынка
-            if market_id in self.bot.active_markets:
-                self.stop_market_analysis(market_id, "закрыт")
-                
+            logger.info(f"🔄 Продолжаем анализ восстановленного рынка {slug}, осталось {remaining_seconds / 60:.1f} минут")
+            self.bot.active_markets.update(market_id, deadline=time.monotonic() + remaining_seconds)
+            # Восстановленные рынки снимаем раз в минуту; минимум - пропорционально оставшейся части окна
+            min_samples = math.ceil(self.min_samples_per_window * remaining_seconds / (self.analysis_time_minutes * 60))
+            self.scheduler.add_job(MarketJob(
+                market_id, slug, self.run_market_sample,
+                window_seconds=remaining_seconds, interval=self.new_ping_interval(60),
+                min_samples=min_samples, restored=True
+            ))
         except Exception as e:
             logger.error(f"❌ Критическая ошибка в анализе восстановленного рынка {slug}: {e}")
-        finally:
-            # Всегда уменьшаем счетчик потоков
-            self.decrement_thread_count()
+    
+    async def analyze_once(self, slug, warm=False, deadline=None):
+        """Один анализ рынка: в шарде-владельце или задачей текущего процесса"""
+        deadline = deadline or new_analysis_deadline()
+        if not self.shard_coordinator:
+            return await self.analyzer.analyze_market_async(slug, deadline, warm)
+        
+        request_id, future = self.shard_coordinator.submit(slug, warm, deadline)
+        try:
+            return await asyncio.wait_for(
+                asyncio.wrap_future(future), timeout=deadline.remaining() + SHARD_DEADLINE_GRACE_SECONDS
+            )
+        except asyncio.TimeoutError:
+            deadline.record_expiry()
+            logger.error(f"⏰ Таймаут анализа рынка {slug} в шарде")
+            self.shard_coordinator.forget(request_id)
+            return None
+    
+    async def analyze_and_store(self, market_id, slug, warm=False):
+        """Анализ рынка и запись в БД в рамках одного дедлайна, возвращает (analysis_data, stored)"""
+        deadline = new_analysis_deadline()
+        if self.pipeline and not warm and not self.shard_coordinator:
+            # Конвейер работает в этом же цикле и сам пишет в БД на последней стадии
+            return await self.pipeline.analyze_and_store(market_id, slug, deadline)
+        
+        analysis_data = await self.analyze_once(slug, warm, deadline)
+        if not analysis_data:
+            return None, False
+        stored = await self.runtime.run_blocking(
+            'io', self.update_market_analysis, market_id, analysis_data, deadline
+        )
+        return analysis_data, stored
+    
+    def get_updater(self):
+        """AnalyticUpdater своего потока: у каждого потока io отдельное соединение с БД"""
+        if not hasattr(self.thread_state, 'updater'):
+            self.thread_state.updater = AnalyticUpdater()
+        return self.thread_state.updater
+    
+    def update_market_analysis(self, market_id, analysis_data, deadline=None):
+        """Запись анализа рынка через соединение текущего потока"""
+        return self.get_updater().update_market_analysis(market_id, analysis_data, deadline)
+    
+    def record_first_snapshot(self, market_id, slug):
+        """Учет задержки «обнаружен новый рынок → первая строка в БД с данными»"""
+        detected_at = self.bot.active_markets.take_detected_at(market_id)
+        if detected_at is None:
+            return
+        
+        latency = time.monotonic() - detected_at
+        self.metrics.observe('market.time_to_first_snapshot_seconds', latency)
+        logger.info(f"⏱ Первый снимок рынка {slug} записан через {latency:.1f} сек после обнаружения")
+    
+    def new_ping_interval(self, base_seconds):
+        """Адаптивный интервал опроса в настроенных границах"""
+        return AdaptivePingInterval(base_seconds, self.ping_interval_min_seconds, self.ping_interval_max_seconds)
+    
+    def record_ping_interval(self, job, analysis_data, sampled_at):
+        """Пересчет интервала рынка по новому снимку и учет сэкономленных и лишних снимков"""
+        market = self.bot.active_markets.get(job.market_id)
+        if market and market.last_sample is not None:
+            # Реальный промежуток между снимками (разброс, повторы, конец окна) против фиксированного базового
+            saved, extra = job.interval.scrape_difference(sampled_at - market.last_sample)
+            if saved:
+                self.metrics.inc('sampler.scrapes_saved', saved)
+            if extra:
+                self.metrics.inc('sampler.scrapes_extra', extra)
+        previous = job.interval.interval_seconds
+        interval = job.interval.observe(analysis_data)
+        self.metrics.observe('sampler.interval_seconds', interval)
+        if round(interval) != round(previous):
+            logger.info(f"⏲ Рынок {job.slug}: интервал опроса {previous:.0f} → {interval:.0f} сек")
+        return interval
+    
+    async def run_market_sample(self, job):
+        """Один снимок рынка по расписанию; возвращает задержку до следующего снимка или None - анализ окончен"""
+        if job.market_id not in self.bot.active_markets:
+            # Рынок уже остановлен извне (например, проверкой времени анализа)
+            return None
+        if not self.bot.running or job.is_expired():
+            await self.finish_market(job.market_id)
+            return None
+        
+        market_kind = "restored market" if job.restored else "market"
+        try:
+            # Первый снимок нового рынка - в прогретом контексте
+            analysis_data, stored = await self.analyze_and_store(job.market_id, job.slug, warm=job.first_snapshot)
+        except Exception as e:
+            analysis_data, stored = None, False
+            error_msg = f"Error analyzing {market_kind} {job.slug}: {e}"
+            logger.error(error_msg)
+            from telegram.error_logger import ErrorLogger
+            await self.runtime.run_blocking('io', ErrorLogger().log_error, error_msg, job.slug)
+        
+        if analysis_data:
+            if stored and job.first_snapshot:
+                self.record_first_snapshot(job.market_id, job.slug)
+            sampled_at = time.monotonic()
+            interval = self.record_ping_interval(job, analysis_data, sampled_at)
+            self.bot.active_markets.update(
+                job.market_id, last_sample=sampled_at, interval=interval,
+                last_values=(analysis_data.get('yes_percentage'), analysis_data.get('volume'))
+            )
+            job.first_snapshot = False
+            job.record_sample()
+            job.retry_count = 0  # Сбрасываем счетчик ошибок при успехе
+            # Последний снимок окна не откладываем за его конец
+            return min(interval, job.remaining())
+        
+        job.retry_count += 1
+        if job.retry_count >= self.max_retries:
+            logger.error(f"Max retries reached for {market_kind} {job.slug}, stopping analysis")
+            await self.finish_market(job.market_id)
+            return None
+        
+        # Повтор без ожидания в воркере: задание возвращается в кучу с задержкой
+        logger.warning(f"Analysis failed for {market_kind} {job.slug}, retry {job.retry_count}/{self.max_retries}")
+        return self.retry_delay_seconds
+    
+    async def finish_market(self, market_id):
+        """Завершение анализа рынка со статусом «закрыт»"""
+        if market_id in self.bot.active_markets:
+            await self.runtime.run_blocking('io', self.stop_market_analysis, market_id, "закрыт")
     
     def stop_market_analysis(self, market_id, status):
         """Остановка анализа рынка"""
-        if market_id in self.bot.active_markets:
-            market_info = self.bot.active_markets[market_id]
-            
+        # Освобождаем рынок сразу: при одновременной остановке из нескольких потоков
+        # статус и лог пишет только тот, кто его освободил
+        market_info = self.bot.active_markets.release(market_id)
+        if market_info:
             # Обновляем статус в базе
-            self.updater.update_market_analysis(market_id, {'status': status})
+            self.update_market_analysis(market_id, {'status': status})
             
             # Логируем остановку
             market_data = {
-                'question': market_info['question'],
-                'slug': market_info['slug'],
+                'question': market_info.question,
+                'slug': market_info.slug,
                 'status': status
             }
             self.stopped_logger.log_market_stopped(market_data)
-            
-            # Удаляем из активных рынков
-            del self.bot.active_markets[market_id]
-            logger.info(f"Stopped analysis for market {market_info['slug']}") 
\ No newline at end of file
+            logger.info(f"Stopped analysis for market {market_info.slug}") 
\ No newline at end of file
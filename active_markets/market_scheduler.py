@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Планировщик снимков рынков на куче таймеров
+Каждый рынок - повторяющееся задание; ограниченный пул воркеров выполняет задание,
+только когда подошел его срок, а между снимками рынок не занимает слот.
+Если все воркеры заняты, подошедшие задания ждут в очереди, а не отбрасываются;
+при перегрузке первыми идут рынки, отстающие от минимума снимков за окно
+(меньше всего времени на недостающий снимок - EDF), затем остальные по сроку окна.
+Первые снимки новых рынков идут отдельной быстрой очередью: часть воркеров
+зарезервирована только под нее, а остальные берут ее раньше обновлений.
+Рынки, появившиеся одной пачкой, разводятся по фазам интервала, а каждый цикл
+получает ограниченный случайный сдвиг, чтобы снимки не шли синхронными всплесками.
+"""
+
+import asyncio
+import collections
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from config.config_loader import ConfigLoader
+from analysis.browser_runtime import get_browser_runtime
+from monitoring.metrics_registry import get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+# Шаг фаз по золотому сечению: фазы равномерно заполняют интервал при любом числе рынков
+PHASE_STEP = 0.6180339887
+
+# Окно и корзины для оценки равномерности стартов снимков
+SPREAD_WINDOW_SECONDS = 600
+SPREAD_BUCKET_SECONDS = 10
+
+
+class MarketJob:
+    """Повторяющееся задание анализа одного рынка"""
+
+    def __init__(self, market_id, slug, runner, window_seconds, interval, min_samples=0, restored=False):
+        self.market_id = market_id
+        self.slug = slug
+        # runner(job) -> секунды до следующего запуска или None, если анализ рынка окончен
+        self.runner = runner
+        self.ends_at = time.monotonic() + window_seconds
+        # AdaptivePingInterval: интервал между снимками подстраивается под движение рынка
+        self.interval = interval
+        self.restored = restored
+        self.first_snapshot = not restored
+        self.retry_count = 0
+        self.due_at = time.monotonic()
+        self.samples = 0
+        self.min_samples = min_samples
+        # Доля интервала, на которую сдвинут первый цикл рынка
+        self.phase = 0.0
+        self.phased = False
+
+    def remaining(self):
+        """Остаток окна анализа рынка, сек"""
+        return max(0.0, self.ends_at - time.monotonic())
+
+    def is_expired(self):
+        return time.monotonic() >= self.ends_at
+
+    def record_sample(self):
+        """Учет успешного снимка"""
+        self.samples += 1
+
+    def deficit(self):
+        """Сколько снимков не хватает до минимума окна"""
+        return max(0, self.min_samples - self.samples)
+
+
+class MarketScheduler:
+    def __init__(self, workers, reserved_workers=0, jitter_fraction=0.0):
+        self.workers = workers
+        self.jitter_fraction = jitter_fraction
+        # Хотя бы один воркер остается для обновлений уже отслеживаемых рынков
+        self.reserved_workers = max(0, min(reserved_workers, workers - 1))
+        self.runtime = get_browser_runtime()
+        self.metrics = get_metrics_registry()
+        self.sequence = itertools.count()
+        self.phases = itertools.count()
+        self.recent_starts = collections.deque()
+        # Состояние ниже меняется только из цикла рантайма
+        self.heap = []
+        self.jobs = {}
+        self.ready = []
+        self.fast_ready = collections.deque()
+        self.ready_event = None
+        self.wakeup = None
+        self.tasks = []
+        self.busy_workers = 0
+        self.running = False
+
+    def add_job(self, job, delay=0):
+        """Постановка задания в кучу таймеров (из любого потока)"""
+        self.runtime.start()
+        self.runtime.loop.call_soon_threadsafe(self._add, job, delay)
+
+    def _add(self, job, delay):
+        current = self.jobs.get(job.market_id)
+        if current is not None and current is not job:
+            # Рынок заново взят в работу (восстановление, повторное открытие), пока старое задание
+            # еще в планировщике: новое задание его заменяет, старое отбрасывается при следующем шаге
+            logger.info(f"ℹ️ Рынок {job.slug} уже в планировщике - задание заменено новым")
+            self.metrics.inc('scheduler.replaced_jobs')
+        job.phase = (next(self.phases) * PHASE_STEP) % 1
+        if not job.first_snapshot:
+            # Рынки, восстановленные одной пачкой, стартуют с разными фазами
+            delay = max(delay, job.phase * min(job.interval.interval_seconds, job.remaining()))
+            job.phased = True
+        self._push(job, delay)
+
+    def _start_tasks(self):
+        self.ready_event = asyncio.Event()
+        self.wakeup = asyncio.Event()
+        loop = self.runtime.loop
+        self.tasks = [loop.create_task(self._timer_loop())]
+        self.tasks += [loop.create_task(self._worker_loop(fast_only=i < self.reserved_workers))
+                       for i in range(self.workers)]
+        self.running = True
+        logger.info(f"✅ Планировщик рынков запущен (воркеров: {self.workers}, "
+                    f"из них под первые снимки: {self.reserved_workers})")
+
+    def _push(self, job, delay):
+        if not self.running:
+            self._start_tasks()
+        self.jobs[job.market_id] = job
+        job.due_at = time.monotonic() + max(0, delay)
+        heapq.heappush(self.heap, (job.due_at, next(self.sequence), job))
+        self.metrics.set_gauge('scheduler.scheduled_markets', len(self.jobs))
+        self.metrics.set_gauge('scheduler.markets_behind_target',
+                               sum(1 for scheduled in self.jobs.values() if scheduled.deficit()))
+        self.wakeup.set()
+
+    def _is_current(self, job):
+        """Задание не заменено более новым заданием того же рынка"""
+        return self.jobs.get(job.market_id) is job
+
+    def _priority(self, job):
+        """Ключ выбора из очереди: сначала отстающие от минимума, по времени на недостающий снимок"""
+        deficit = job.deficit()
+        if deficit:
+            return (0, job.remaining() / deficit, job.ends_at)
+        return (1, job.ends_at, job.due_at)
+
+    def _next_delay(self, job, delay):
+        """Отстающий рынок снимаем чаще, чтобы минимум успел набраться до конца окна"""
+        deficit = job.deficit()
+        if deficit:
+            delay = min(delay, job.remaining() / deficit)
+        return delay
+
+    def _spread(self, job, delay):
+        """Первый цикл после первого снимка - со сдвигом на фазу рынка, дальше - со случайным сдвигом"""
+        if not job.phased and job.samples:
+            job.phased = True
+            # Среднее сохраняется, а рынки одной пачки расходятся по всему интервалу
+            return delay * (0.5 + job.phase)
+        return delay * (1 + random.uniform(-self.jitter_fraction, self.jitter_fraction))
+
+    def _record_start(self):
+        """Учет старта снимка и оценка равномерности стартов за последние SPREAD_WINDOW_SECONDS"""
+        now = time.monotonic()
+        self.recent_starts.append(now)
+        while self.recent_starts[0] < now - SPREAD_WINDOW_SECONDS:
+            self.recent_starts.popleft()
+
+        buckets = [0] * (SPREAD_WINDOW_SECONDS // SPREAD_BUCKET_SECONDS)
+        for started in self.recent_starts:
+            index = min(len(buckets) - 1, int((now - started) // SPREAD_BUCKET_SECONDS))
+            buckets[index] += 1
+        mean = len(self.recent_starts) / len(buckets)
+        variance = sum((count - mean) ** 2 for count in buckets) / len(buckets)
+        # Коэффициент вариации и пик к среднему: чем ближе к 0 и 1, тем ровнее нагрузка
+        self.metrics.set_gauge('scheduler.start_spread_cv', round(variance ** 0.5 / mean, 3))
+        self.metrics.set_gauge('scheduler.start_peak_to_mean', round(max(buckets) / mean, 2))
+
+    async def _take_ready(self, fast_only):
+        """Следующее задание: сначала быстрая очередь первых снимков, затем обновления"""
+        while True:
+            if self.fast_ready:
+                job = self.fast_ready.popleft()
+                self.metrics.set_gauge('scheduler.fast_lane_queue', len(self.fast_ready))
+                return job
+            if self.ready and not fast_only:
+                job = min(self.ready, key=self._priority)
+                self.ready.remove(job)
+                self.metrics.set_gauge('scheduler.ready_queue', len(self.ready))
+                return job
+            self.ready_event.clear()
+            await self.ready_event.wait()
+
+    def _report(self, job):
+        """Итог окна рынка: достигнутое число снимков против цели"""
+        self.metrics.observe('scheduler.samples_per_window', job.samples)
+        if job.samples < job.min_samples:
+            self.metrics.inc('scheduler.markets_below_target')
+            logger.warning(f"⚠️ Рынок {job.slug}: {job.samples} снимков из минимума {job.min_samples}")
+        else:
+            logger.info(f"📈 Рынок {job.slug}: {job.samples} снимков (минимум {job.min_samples})")
+
+    async def _timer_loop(self):
+        """Перенос подошедших заданий из кучи в очередь воркеров"""
+        while self.running:
+            now = time.monotonic()
+            while self.heap and self.heap[0][0] <= now:
+                _, _, job = heapq.heappop(self.heap)
+                # Пока первого снимка нет (включая повторы после неудачи), рынок в быстрой очереди
+                if job.first_snapshot:
+                    self.fast_ready.append(job)
+                else:
+                    self.ready.append(job)
+                self.ready_event.set()
+            self.metrics.set_gauge('scheduler.ready_queue', len(self.ready))
+            self.metrics.set_gauge('scheduler.fast_lane_queue', len(self.fast_ready))
+
+            timeout = self.heap[0][0] - now if self.heap else None
+            self.wakeup.clear()
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _worker_loop(self, fast_only=False):
+        """Воркер: один снимок рынка за раз, затем задание возвращается в кучу"""
+        while self.running:
+            job = await self._take_ready(fast_only)
+            if not self._is_current(job):
+                continue
+            lateness = time.monotonic() - job.due_at
+            if job.first_snapshot:
+                self.metrics.observe('scheduler.fast_lane_lateness_seconds', lateness)
+            else:
+                self.metrics.observe('scheduler.lateness_seconds', lateness)
+            self._record_start()
+            self.busy_workers += 1
+            self.metrics.set_gauge('scheduler.busy_workers', self.busy_workers)
+            try:
+                delay = await job.runner(job)
+            except Exception as e:
+                logger.error(f"❌ Ошибка задания рынка {job.slug}: {e}")
+                delay = None
+            finally:
+                self.busy_workers -= 1
+                self.metrics.set_gauge('scheduler.busy_workers', self.busy_workers)
+
+            if not self._is_current(job):
+                # Пока шел снимок, рынок получил новое задание - старое дальше не планируем
+                continue
+            if delay is None:
+                self.jobs.pop(job.market_id, None)
+                self.metrics.set_gauge('scheduler.scheduled_markets', len(self.jobs))
+                self._report(job)
+            else:
+                self._push(job, self._next_delay(job, self._spread(job, delay)))
+
+    def get_stats(self):
+        """Состояние планировщика"""
+        return {
+            'scheduled_markets': len(self.jobs),
+            'waiting_timers': len(self.heap),
+            'ready_queue': len(self.ready),
+            'fast_lane_queue': len(self.fast_ready),
+            'busy_workers': self.busy_workers,
+            'workers': self.workers,
+            'reserved_workers': self.reserved_workers,
+            'markets': {
+                job.slug: {
+                    'samples': job.samples,
+                    'target': job.min_samples,
+                    'interval_seconds': round(job.interval.interval_seconds),
+                    'remaining_seconds': round(job.remaining())
+                }
+                for job in list(self.jobs.values())
+            }
+        }
+
+    async def _stop(self):
+        self.running = False
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    def stop(self):
+        """Синхронная остановка планировщика"""
+        if not self.running:
+            return
+        try:
+            self.runtime.run(self._stop(), timeout=30)
+            logger.info("🛑 Планировщик рынков остановлен")
+        except Exception as e:
+            logger.error(f"❌ Ошибка остановки планировщика рынков: {e}")
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_market_scheduler():
+    """Получение общего планировщика рынков"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            config = ConfigLoader()
+            if config.get_worker_shards() > 0:
+                # В режиме шардов браузеры работают в процессах-воркерах
+                workers = config.get_worker_shards() * config.get_shard_worker_threads()
+            else:
+                workers = config.get_max_concurrent_analyses()
+            _scheduler = MarketScheduler(
+                workers, config.get_first_snapshot_reserved_workers(), config.get_schedule_jitter_fraction()
+            )
+        return _scheduler
@@ -1,163 +1,87 @@
-import re
 import logging
+import sys
+from analysis import boolean_rule_engine, slug_classifier
+from analysis.rate_limiter import is_checkpoint_page
+from analysis.boolean_rule_engine import get_boolean_rule_engine
+from database.decision_cache import get_decision_cache, rules_version
 
 logger = logging.getLogger(__name__)
 
 class BooleanMarketValidator:
     def __init__(self):
-        # Индикаторы булевых рынков (простой Yes/No)
-        self.boolean_indicators = [
-            r'yes\s*\d+[¢%]',  # Yes 21¢
-            r'no\s*\d+[¢%]',   # No 81¢
-            r'yes\s*\$\d+',    # Yes $0.21
-            r'no\s*\$\d+',     # No $0.81
-            r'yes\s*\d+%',     # Yes 21%
-            r'no\s*\d+%',      # No 79%
-            r'\d+%',           # 38% (просто процент)
-            r'\d+¢',           # 50¢ (просто центы)
-            r'\$\d+',          # $0.50 (просто доллары)
-        ]
-        
-        # Индикаторы не-булевых рынков (множественные варианты исхода)
-        self.non_boolean_indicators = [
-            # Множественные варианты исхода
-            r'bps\s*(?:decrease|increase)',  # bps decrease/increase
-            r'\d+\s*bps',  # 25 bps, 50 bps
-            r'Buy\s*Yes.*Buy\s*No',  # Buy Yes ... Buy No (множественные кнопки)
-            r'Outcome\s*\d+',  # Outcome 1, Outcome 2
-            r'Option\s*\d+',  # Option 1, Option 2
-            r'Choice\s*\d+',  # Choice 1, Choice 2
-            r'Result\s*\d+',  # Result 1, Result 2
-            
-            # Множественные страны/варианты
-            r'China.*India.*Canada',  # Множественные страны
-            r'China.*Mexico.*Brazil',  # Множественные страны
-            r'Which\s+countries',  # Вопросы о множественных странах
-            r'Which\s+of\s+the',  # Вопросы о выборе из множества
-            r'Multiple\s+outcomes',  # Множественные исходы
-            r'Select\s+all',  # Выберите все
-            r'Choose\s+from',  # Выберите из
-            
-            # Процентные ставки и экономические показатели
-            r'interest\s+rate',  # Процентная ставка
-            r'fed\s+rate',  # Ставка ФРС
-            r'inflation\s+rate',  # Инфляция
-            r'unemployment\s+rate',  # Безработица
-            
-            # Политические множественные выборы
-            r'which\s+candidate',  # Какой кандидат
-            r'who\s+will\s+win',  # Кто выиграет
-            r'which\s+party',  # Какая партия
-            r'which\s+state',  # Какой штат
-            
-            # Спортивные множественные выборы
-            r'which\s+team',  # Какая команда
-            r'who\s+will\s+score',  # Кто забьет
-            r'which\s+player',  # Какой игрок
-            
-            # Криптовалютные множественные выборы
-            r'which\s+crypto',  # Какая криптовалюта
-            r'which\s+token',  # Какой токен
-            r'which\s+blockchain',  # Какой блокчейн
-        ]
-        
-        # Ключевые слова для множественных вариантов
-        self.multiple_outcome_keywords = [
-            'countries', 'candidates', 'teams', 'players', 'states', 'parties',
-            'options', 'choices', 'outcomes', 'results', 'alternatives',
-            'which', 'who', 'what', 'where', 'when', 'how many'
-        ]
+        # Правила скомпилированы один раз в общем движке (analysis/boolean_rule_engine.py)
+        self.rule_engine = get_boolean_rule_engine()
+        self.decision_cache = get_decision_cache()
+        self.rules_version = rules_version(sys.modules[__name__], boolean_rule_engine, slug_classifier)
     
-    def validate_market_boolean(self, page_text, market_name=""):
+    def validate_market_boolean(self, page_text, market_name="", slug=None):
         """
         Определяет, является ли рынок булевым
         
         Args:
             page_text (str): Текст страницы
             market_name (str): Название рынка
+            slug (str): Slug рынка - вместе с названием ключ кэша решений (без него решение не кэшируется)
             
         Returns:
             dict: {'is_boolean': bool, 'reason': str}
         """
         try:
+            # Решение зависит и от названия (правила по названию), поэтому оно входит в ключ кэша
+            cache_key = f"{slug}\n{market_name.lower()}" if slug else None
+            cached = self.decision_cache.get('boolean', cache_key, self.rules_version)
+            if cached is not None:
+                logger.info(f"ℹ️ Булевость рынка {slug} из кэша решений: {cached['reason']}")
+                return cached
+            
             # Приводим к нижнему регистру для поиска
             text_lower = page_text.lower()
             name_lower = market_name.lower()
             
             # Проверяем на проблемы с браузером - в этом случае не определяем булевость
-            if "failed to verify your browser" in text_lower or "security checkpoint" in text_lower:
+            if is_checkpoint_page(page_text):
                 logger.warning("⚠️ Обнаружена проблема с браузером - не определяем булевость")
                 return {
                     'is_boolean': True,  # По умолчанию считаем булевым при проблемах с браузером
                     'reason': 'Проблема с браузером - используем значение по умолчанию'
                 }
             
-            # 1. Проверяем на явные не-булевые индикаторы (приоритет)
-            for pattern in self.non_boolean_indicators:
-                if re.search(pattern, text_lower, re.IGNORECASE):
-                    logger.warning(f"⚠️ Найден не-булевый индикатор: {pattern}")
-                    return {
-                        'is_boolean': False,
-                        'reason': f'Не-булевый индикатор: {pattern}'
-                    }
-            
-            # 2. Проверяем название рынка на множественные варианты
-            for keyword in self.multiple_outcome_keywords:
-                if keyword in name_lower:
-                    logger.warning(f"⚠️ Название содержит множественный индикатор: {keyword}")
-                    return {
-                        'is_boolean': False,
-                        'reason': f'Название содержит: {keyword}'
-                    }
+            # Правила по порядку: не-булевые индикаторы (приоритет), название рынка,
+            # множественные варианты в тексте, булевые кнопки, общие булевые индикаторы
+            stage, reason = self.rule_engine.evaluate(text_lower, name_lower)
             
-            # 3. Проверяем на множественные варианты в тексте
-            multiple_patterns = [
-                r'\d+%\s+chance.*\d+%\s+chance',  # Множественные проценты
-                r'Buy\s+Yes.*Buy\s+Yes',  # Множественные кнопки Buy Yes
-                r'Buy\s+No.*Buy\s+No',    # Множественные кнопки Buy No
-                r'Outcome.*Outcome',       # Множественные исходы
-                r'Option.*Option',         # Множественные опции
-            ]
-            
-            for pattern in multiple_patterns:
-                if re.search(pattern, text_lower, re.IGNORECASE):
-                    logger.warning(f"⚠️ Найдены множественные варианты: {pattern}")
-                    return {
-                        'is_boolean': False,
-                        'reason': f'Множественные варианты: {pattern}'
-                    }
-            
-            # 4. Проверяем на булевые индикаторы (Yes/No кнопки)
-            boolean_button_patterns = [
-                r'Yes\s+\d+[¢%]',  # Yes 57.3¢
-                r'No\s+\d+[¢%]',   # No 65¢
-                r'Trade\s+Yes',     # Trade Yes
-                r'Trade\s+No',      # Trade No
-                r'Buy\s+Yes',       # Buy Yes
-                r'Buy\s+No',        # Buy No
-            ]
+            if stage == 'non_boolean':
+                logger.warning(f"⚠️ Найден не-булевый индикатор: {reason}")
+                return self.remember(cache_key, {
+                    'is_boolean': False,
+                    'reason': f'Не-булевый индикатор: {reason}'
+                })
             
-            boolean_buttons_found = False
-            for pattern in boolean_button_patterns:
-                if re.search(pattern, text_lower, re.IGNORECASE):
-                    boolean_buttons_found = True
-                    logger.info(f"✅ Найдены булевые кнопки: {pattern}")
-                    break
+            if stage == 'name':
+                logger.warning(f"⚠️ Название содержит множественный индикатор: {reason}")
+                return self.remember(cache_key, {
+                    'is_boolean': False,
+                    'reason': f'Название содержит: {reason}'
+                })
             
-            # 5. Проверяем на общие булевые индикаторы
-            boolean_found = False
-            for pattern in self.boolean_indicators:
-                if re.search(pattern, text_lower, re.IGNORECASE):
-                    boolean_found = True
-                    logger.info(f"✅ Найден булевый индикатор: {pattern}")
-                    break
+            if stage == 'multiple':
+                logger.warning(f"⚠️ Найдены множественные варианты: {reason}")
+                return self.remember(cache_key, {
+                    'is_boolean': False,
+                    'reason': f'Множественные варианты: {reason}'
+                })
             
             # Если найдены булевые кнопки или индикаторы - рынок булевый
-            if boolean_buttons_found or boolean_found:
-                return {
+            if stage == 'boolean_button':
+                logger.info(f"✅ Найдены булевые кнопки: {reason}")
+            elif stage == 'boolean_indicator':
+                logger.info(f"✅ Найден булевый индикатор: {reason}")
+            
+            if stage:
+                return self.remember(cache_key, {
                     'is_boolean': True,
                     'reason': 'Найден булевый индикатор'
-                }
+                })
             else:
                 logger.warning("⚠️ Булевые индикаторы не найдены")
                 return {
@@ -170,4 +94,9 @@ class BooleanMarketValidator:
             return {
                 'is_boolean': True,  # По умолчанию считаем булевым при ошибках
                 'reason': f'Ошибка валидации: {e}'
-            } 
\ No newline at end of file
+            }
+    
+    def remember(self, cache_key, decision):
+        """Сохранение окончательного решения по булевости в кэше (ключ - slug и название)"""
+        self.decision_cache.put('boolean', cache_key, self.rules_version, decision)
+        return decision
\ No newline at end of file
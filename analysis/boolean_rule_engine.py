@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Скомпилированные правила BooleanMarketValidator
+Правила собираются один раз при импорте. В одиночных шаблонах за литералом идет одна серия
+символов одного класса, которой нечего перебирать при возврате («\\d+X» - это «цифра, за
+которой X»), а правила вида «A.*B» проверяются упорядоченным совместным вхождением
+терминов по индексу позиций текста.
+Каждое правило линейно по длине текста, поиск останавливается на первом срабатывании.
+"""
+
+import bisect
+import re
+from analysis.slug_classifier import MULTIPLE_OUTCOME_KEYWORDS
+
+# Правило: (исходный шаблон - он же причина в логах, скомпилированная форма).
+# Форма - строка (один шаблон) или кортеж терминов, которые должны встретиться по порядку
+# в пределах одной строки текста (как '.*' без DOTALL)
+
+# Индикаторы не-булевых рынков (множественные варианты исхода)
+NON_BOOLEAN_RULES = [
+    # Множественные варианты исхода
+    (r'bps\s*(?:decrease|increase)', r'bps\s*(?:decrease|increase)'),
+    (r'\d+\s*bps', r'\d\s*bps'),
+    (r'Buy\s*Yes.*Buy\s*No', (r'buy\s*yes', r'buy\s*no')),
+    (r'Outcome\s*\d+', r'outcome\s*\d'),
+    (r'Option\s*\d+', r'option\s*\d'),
+    (r'Choice\s*\d+', r'choice\s*\d'),
+    (r'Result\s*\d+', r'result\s*\d'),
+
+    # Множественные страны/варианты
+    (r'China.*India.*Canada', ('china', 'india', 'canada')),
+    (r'China.*Mexico.*Brazil', ('china', 'mexico', 'brazil')),
+    (r'Which\s+countries', r'which\s+countries'),
+    (r'Which\s+of\s+the', r'which\s+of\s+the'),
+    (r'Multiple\s+outcomes', r'multiple\s+outcomes'),
+    (r'Select\s+all', r'select\s+all'),
+    (r'Choose\s+from', r'choose\s+from'),
+
+    # Процентные ставки и экономические показатели
+    (r'interest\s+rate', r'interest\s+rate'),
+    (r'fed\s+rate', r'fed\s+rate'),
+    (r'inflation\s+rate', r'inflation\s+rate'),
+    (r'unemployment\s+rate', r'unemployment\s+rate'),
+
+    # Политические множественные выборы
+    (r'which\s+candidate', r'which\s+candidate'),
+    (r'who\s+will\s+win', r'who\s+will\s+win'),
+    (r'which\s+party', r'which\s+party'),
+    (r'which\s+state', r'which\s+state'),
+
+    # Спортивные множественные выборы
+    (r'which\s+team', r'which\s+team'),
+    (r'who\s+will\s+score', r'who\s+will\s+score'),
+    (r'which\s+player', r'which\s+player'),
+
+    # Криптовалютные множественные выборы
+    (r'which\s+crypto', r'which\s+crypto'),
+    (r'which\s+token', r'which\s+token'),
+    (r'which\s+blockchain', r'which\s+blockchain'),
+]
+
+# Множественные варианты в тексте
+MULTIPLE_RULES = [
+    (r'\d+%\s+chance.*\d+%\s+chance', (r'\d%\s+chance', r'\d%\s+chance')),
+    (r'Buy\s+Yes.*Buy\s+Yes', (r'buy\s+yes', r'buy\s+yes')),
+    (r'Buy\s+No.*Buy\s+No', (r'buy\s+no', r'buy\s+no')),
+    (r'Outcome.*Outcome', ('outcome', 'outcome')),
+    (r'Option.*Option', ('option', 'option')),
+]
+
+# Булевые индикаторы (Yes/No кнопки)
+BOOLEAN_BUTTON_RULES = [
+    (r'Yes\s+\d+[¢%]', r'yes\s+\d+[¢%]'),
+    (r'No\s+\d+[¢%]', r'no\s+\d+[¢%]'),
+    (r'Trade\s+Yes', r'trade\s+yes'),
+    (r'Trade\s+No', r'trade\s+no'),
+    (r'Buy\s+Yes', r'buy\s+yes'),
+    (r'Buy\s+No', r'buy\s+no'),
+]
+
+# Общие булевые индикаторы (простой Yes/No)
+BOOLEAN_INDICATOR_RULES = [
+    (r'yes\s*\d+[¢%]', r'yes\s*\d+[¢%]'),
+    (r'no\s*\d+[¢%]', r'no\s*\d+[¢%]'),
+    (r'yes\s*\$\d+', r'yes\s*\$\d'),
+    (r'no\s*\$\d+', r'no\s*\$\d'),
+    (r'yes\s*\d+%', r'yes\s*\d+%'),
+    (r'no\s*\d+%', r'no\s*\d+%'),
+    (r'\d+%', r'\d%'),
+    (r'\d+¢', r'\d¢'),
+    (r'\$\d+', r'\$\d'),
+]
+
+
+class TermIndex:
+    """Вхождения терминов в тексте: поиск идет только вперед и запоминается, каждый термин
+    просматривает текст не больше одного раза за проверку"""
+
+    def __init__(self, text, terms):
+        self.text = text
+        self.terms = terms
+        self.found = {}
+        self.newlines = None
+
+    def next_occurrence(self, term, position):
+        """Первое вхождение термина, начинающееся не левее position (None, если его нет)"""
+        found = self.found.get(term)
+        if found and found[0] <= position and (found[1] is None or position <= found[1].start()):
+            return found[1]
+        match = self.terms[term].search(self.text, position)
+        self.found[term] = (position, match)
+        return match
+
+    def line_of(self, position):
+        """Номер строки позиции (индекс переводов строки строится при первом обращении)"""
+        if self.newlines is None:
+            self.newlines = [match.start() for match in re.finditer('\n', self.text)]
+        return bisect.bisect_left(self.newlines, position)
+
+
+class BooleanRuleEngine:
+    def __init__(self):
+        self.terms = {}
+        self.rule_sets = {
+            name: [(reason, self.compile_rule(form)) for reason, form in rules]
+            for name, rules in (('non_boolean', NON_BOOLEAN_RULES), ('multiple', MULTIPLE_RULES),
+                                ('boolean_button', BOOLEAN_BUTTON_RULES), ('boolean_indicator', BOOLEAN_INDICATOR_RULES))
+        }
+
+    def compile_rule(self, form):
+        """Шаблон -> скомпилированная регулярка, кортеж терминов -> кортеж ключей TermIndex"""
+        if isinstance(form, tuple):
+            for term in form:
+                self.terms.setdefault(term, re.compile(term, re.IGNORECASE))
+            return form
+        return re.compile(form, re.IGNORECASE)
+
+    def first_match(self, rule_set, text, index):
+        """Первое по порядку сработавшее правило набора (исходный шаблон) или None"""
+        for reason, rule in self.rule_sets[rule_set]:
+            matched = self.terms_in_order(rule, index) if isinstance(rule, tuple) else rule.search(text)
+            if matched:
+                return reason
+        return None
+
+    def terms_in_order(self, terms, index):
+        """Вхождения терминов по порядку, без переводов строки между соседними (как 'A.*B')"""
+        position = 0
+        while True:
+            first = index.next_occurrence(terms[0], position)
+            if first is None:
+                return False
+            end = first.end()
+            for term in terms[1:]:
+                # Ближайшее следующее вхождение - лучший кандидат: дальше остается больше строки
+                following = index.next_occurrence(term, end)
+                if following is None:
+                    # Для более поздних вхождений первого термина его тем более нет
+                    return False
+                if index.line_of(following.start()) != index.line_of(end):
+                    break
+                end = following.end()
+            else:
+                return True
+            position = first.end()
+
+    def evaluate(self, text_lower, name_lower):
+        """
+        Первое сработавшее правило в порядке проверок BooleanMarketValidator
+
+        Returns:
+            tuple: (этап, причина) - этап 'non_boolean', 'name', 'multiple',
+            'boolean_button', 'boolean_indicator' или (None, None)
+        """
+        index = TermIndex(text_lower, self.terms)
+
+        reason = self.first_match('non_boolean', text_lower, index)
+        if reason:
+            return 'non_boolean', reason
+
+        for keyword in MULTIPLE_OUTCOME_KEYWORDS:
+            if keyword in name_lower:
+                return 'name', keyword
+
+        for stage in ('multiple', 'boolean_button', 'boolean_indicator'):
+            reason = self.first_match(stage, text_lower, index)
+            if reason:
+                return stage, reason
+        return None, None
+
+
+_engine = BooleanRuleEngine()
+
+
+def get_boolean_rule_engine():
+    """Получение общего движка правил (компилируется один раз при импорте)"""
+    return _engine
@@ -1,6 +1,11 @@
 import logging
 import asyncio
+import threading
 from playwright.async_api import async_playwright
+from analysis.browser_profiles import get_browser_profile, USER_AGENT
+from analysis.browser_runtime import get_browser_runtime
+from analysis.rate_limiter import get_navigation_rate_limiter
+from analysis.static_asset_cache import get_static_asset_cache
 
 logger = logging.getLogger(__name__)
 
@@ -9,6 +14,11 @@ class BrowserManager:
         self.browser = None
         self.page = None
         self.playwright = None
+        self.profile = get_browser_profile()
+        self.rate_limiter = get_navigation_rate_limiter()
+        self.static_cache = get_static_asset_cache()
+        self.runtime = get_browser_runtime()
+        self.init_lock = None
     
     def is_initialized(self):
         """Проверка инициализации браузера"""
@@ -19,23 +29,14 @@ class BrowserManager:
         try:
             logger.info("🔄 Инициализируем браузер...")
             self.playwright = await async_playwright().start()
-            self.browser = await self.playwright.chromium.launch(
-                headless=True,
-                args=[
-                    '--no-sandbox',
-                    '--disable-setuid-sandbox',
-                    '--disable-dev-shm-usage',
-                    '--disable-accelerated-2d-canvas',
-                    '--no-first-run',
-                    '--no-zygote',
-                    '--disable-gpu'
-                ]
-            )
-            self.page = await self.browser.new_page()
+            self.browser = await self.playwright.chromium.launch(**self.profile.get_launch_options())
+            self.page = await self.browser.new_page(**self.profile.get_page_options())
+            if self.static_cache:
+                await self.static_cache.attach_async(self.page)
             
             # Устанавливаем user agent
             await self.page.set_extra_http_headers({
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+                'User-Agent': USER_AGENT
             })
             
             logger.info("✅ Браузер инициализирован успешно")
@@ -45,25 +46,38 @@ class BrowserManager:
             return False
     
     def init_browser_sync(self):
-        """Синхронная инициализация браузера"""
+        """Синхронная инициализация браузера в цикле рантайма (браузер остается рабочим после возврата)"""
         try:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                loop.run_until_complete(asyncio.wait_for(self.init_browser(), timeout=60))
-            except asyncio.TimeoutError:
-                logger.error(f"⏰ Таймаут инициализации браузера (60 секунд)")
-                return False
-            finally:
-                loop.close()
+            return self.runtime.run(self.init_browser(), timeout=60)
         except Exception as e:
             logger.error(f"❌ Ошибка синхронной инициализации браузера: {e}")
             return False
-        return True
+    
+    async def ensure_browser(self):
+        """Запуск общего браузера, если он еще не запущен или отключился"""
+        if self.init_lock is None:
+            self.init_lock = asyncio.Lock()
+        async with self.init_lock:
+            if self.browser and self.browser.is_connected():
+                return True
+            if self.browser or self.playwright:
+                await self.close_browser_async()
+            return await self.init_browser()
+    
+    async def new_page(self, default_viewport=None):
+        """Новая страница в отдельном контексте общего браузера (закрывать через page.context.close())"""
+        if not await self.ensure_browser():
+            raise RuntimeError("браузер не инициализирован")
+        context = await self.browser.new_context(**self.profile.get_page_options(default_viewport=default_viewport))
+        if self.static_cache:
+            await self.static_cache.attach_async(context)
+        await context.set_extra_http_headers({'User-Agent': USER_AGENT})
+        return await context.new_page()
     
     async def goto_page(self, url):
         """Переход на страницу"""
         try:
+            await self.rate_limiter.acquire_async()
             logger.info(f"🌐 Переходим на страницу: {url}")
             logger.info(f"⏳ Начинаем загрузку страницы...")
             await self.page.goto(url, wait_until='domcontentloaded', timeout=60000)
@@ -93,14 +107,11 @@ class BrowserManager:
         return self.page
     
     def close_browser_sync(self):
-        """Синхронное закрытие браузера"""
+        """Синхронное закрытие браузера в цикле рантайма"""
+        if not self.runtime.is_running():
+            return
         try:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                loop.run_until_complete(self.close_browser_async())
-            finally:
-                loop.close()
+            self.runtime.run(self.close_browser_async(), timeout=30)
         except Exception as e:
             logger.error(f"Ошибка синхронного закрытия браузера: {e}")
     
@@ -112,4 +123,21 @@ class BrowserManager:
             if self.playwright:
                 await self.playwright.stop()
         except Exception as e:
-            logger.error(f"Ошибка закрытия браузера: {e}") 
\ No newline at end of file
+            logger.error(f"Ошибка закрытия браузера: {e}")
+        finally:
+            self.browser = None
+            self.page = None
+            self.playwright = None
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_browser_manager():
+    """Получение общего браузера процесса (живет в цикле рантайма)"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = BrowserManager()
+        return _manager 
\ No newline at end of file
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Профили запуска Chromium для всех анализаторов рынков
+"""
+
+import logging
+from config.config_loader import ConfigLoader
+
+logger = logging.getLogger(__name__)
+
+# Страница события рынка: POLYMARKET_EVENT_URL + slug
+POLYMARKET_EVENT_URL = 'https://polymarket.com/event/'
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# Базовые флаги, которые раньше копировались в каждый init_browser
+BASE_LAUNCH_ARGS = [
+    '--no-sandbox',
+    '--disable-setuid-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-accelerated-2d-canvas',
+    '--no-first-run',
+    '--no-zygote',
+    '--disable-gpu'
+]
+
+# Флаги плотного профиля: меньше памяти на вкладку, больше рынков на контейнер
+DENSE_LAUNCH_ARGS = [
+    '--js-flags=--max-old-space-size=128',  # Ограничение кучи JS
+    '--disable-background-networking',
+    '--disable-extensions',
+    '--disable-component-update',
+    '--renderer-process-limit=2',  # Общие процессы рендера для всех вкладок
+    '--disable-default-apps',
+    '--disable-sync'
+]
+
+
+class BrowserProfile:
+    def __init__(self, name, extra_args=None, viewport=None, device_scale_factor=None):
+        self.name = name
+        self.extra_args = extra_args or []
+        self.viewport = viewport
+        self.device_scale_factor = device_scale_factor
+
+    def get_launch_args(self):
+        """Флаги командной строки Chromium"""
+        return BASE_LAUNCH_ARGS + self.extra_args
+
+    def get_launch_options(self):
+        """Параметры для chromium.launch()"""
+        return {
+            'headless': True,
+            'args': self.get_launch_args()
+        }
+
+    def get_page_options(self, default_viewport=None):
+        """Параметры для browser.new_page() / browser.new_context()"""
+        options = {}
+        viewport = self.viewport or default_viewport
+        if viewport:
+            options['viewport'] = viewport
+        if self.device_scale_factor:
+            options['device_scale_factor'] = self.device_scale_factor
+        return options
+
+
+BROWSER_PROFILES = {
+    'default': BrowserProfile('default'),
+    'dense': BrowserProfile(
+        'dense',
+        extra_args=DENSE_LAUNCH_ARGS,
+        viewport={'width': 800, 'height': 600},
+        device_scale_factor=0.75
+    )
+}
+
+
+def get_browser_profile(name=None):
+    """Получение профиля браузера по имени (по умолчанию из BROWSER_PROFILE)"""
+    if name is None:
+        name = ConfigLoader().get_browser_profile()
+
+    profile = BROWSER_PROFILES.get(name)
+    if profile is None:
+        logger.warning(f"⚠️ Неизвестный профиль браузера '{name}', используем default")
+        profile = BROWSER_PROFILES['default']
+    return profile
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Единый asyncio-цикл для анализа рынков на асинхронном Playwright
+Все анализы выполняются задачами этого цикла, одновременность ограничена семафором,
+а блокирующая работа (OCR, psycopg2, синхронный HTTP) уходит в пулы потоков
+"""
+
+import asyncio
+import concurrent.futures
+import contextlib
+import functools
+import logging
+import threading
+from config.config_loader import ConfigLoader
+from monitoring.metrics_registry import get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+
+class BrowserRuntime:
+    def __init__(self):
+        self.loop = None
+        self.thread = None
+        self.lock = threading.Lock()
+        self.config = ConfigLoader()
+        self.metrics = get_metrics_registry()
+        self.max_concurrent_analyses = self.config.get_max_concurrent_analyses()
+        self.semaphore = None
+        self.active_analyses = 0
+        self.waiting_analyses = 0
+        # OCR нагружает CPU, psycopg2 и httpx ждут сеть - пулы раздельные
+        self.executors = {
+            'cpu': concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.config.get_ocr_workers(), thread_name_prefix='runtime-cpu'
+            ),
+            'io': concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.config.get_io_workers(), thread_name_prefix='runtime-io'
+            )
+        }
+
+    def is_running(self):
+        """Проверка, что цикл запущен"""
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self):
+        """Запуск цикла в отдельном потоке (повторный вызов ничего не делает)"""
+        with self.lock:
+            if self.is_running():
+                return
+
+            self.loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run_loop():
+                asyncio.set_event_loop(self.loop)
+                self.semaphore = asyncio.Semaphore(self.max_concurrent_analyses)
+                ready.set()
+                self.loop.run_forever()
+
+            self.thread = threading.Thread(target=run_loop, name='browser-runtime')
+            self.thread.daemon = True
+            self.thread.start()
+            ready.wait()
+            logger.info(f"✅ Цикл браузерного рантайма запущен (одновременных анализов: {self.max_concurrent_analyses})")
+
+    def submit(self, coro):
+        """Отправка корутины в цикл, возвращает concurrent.futures.Future"""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, timeout=None):
+        """Синхронное выполнение корутины в цикле рантайма"""
+        if self.is_loop_thread():
+            coro.close()
+            raise RuntimeError("run() нельзя вызывать из потока цикла рантайма - используйте await")
+        future = self.submit(coro)
+        try:
+            return future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            # Отменяем задачу в цикле, чтобы она не продолжала работу после таймаута
+            future.cancel()
+            raise
+
+    def is_loop_thread(self):
+        """Вызов из потока самого цикла (там нельзя ждать run())"""
+        return self.thread is not None and threading.current_thread() is self.thread
+
+    async def run_blocking(self, executor_name, func, *args, **kwargs):
+        """Выполнение блокирующей функции в пуле потоков, не останавливая цикл"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executors[executor_name], functools.partial(func, *args, **kwargs))
+
+    @contextlib.asynccontextmanager
+    async def analysis_slot(self):
+        """Слот одновременного анализа (браузерная часть); ждущие задачи не занимают потоков"""
+        self.waiting_analyses += 1
+        self.metrics.set_gauge('runtime.waiting_analyses', self.waiting_analyses)
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.waiting_analyses -= 1
+            self.metrics.set_gauge('runtime.waiting_analyses', self.waiting_analyses)
+
+        self.active_analyses += 1
+        self.metrics.set_gauge('runtime.active_analyses', self.active_analyses)
+        try:
+            yield
+        finally:
+            self.active_analyses -= 1
+            self.metrics.set_gauge('runtime.active_analyses', self.active_analyses)
+            self.semaphore.release()
+
+    def stop(self):
+        """Остановка цикла"""
+        with self.lock:
+            if not self.is_running():
+                return
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(timeout=5)
+            self.thread = None
+            logger.info("🛑 Цикл браузерного рантайма остановлен")
+
+
+_runtime = BrowserRuntime()
+
+
+def get_browser_runtime():
+    """Получение общего браузерного рантайма"""
+    return _runtime
@@ -1,40 +1,57 @@
 import logging
+import sys
+from analysis import slug_classifier
+from analysis.slug_classifier import get_slug_classifier
+from database.decision_cache import get_decision_cache, rules_version
 
 logger = logging.getLogger(__name__)
 
 class CategoryFilter:
     def __init__(self):
-        self.sports_keywords = [
-            'sports', 'football', 'basketball', 'soccer', 'tennis', 
-            'baseball', 'hockey', 'golf', 'olympics', 'championship', 
-            'league', 'cup', 'tournament', 'match', 'game', 'team'
-        ]
-        self.crypto_keywords = [
-            'crypto', 'bitcoin', 'ethereum', 'btc', 'eth', 'blockchain', 
-            'defi', 'nft', 'token', 'coin', 'cryptocurrency', 'altcoin'
-        ]
+        # Ключевые слова категорий собраны в общий автомат классификатора
+        self.classifier = get_slug_classifier()
+        # Решения по slug переживают перезапуски; версия меняется вместе с правилами
+        self.decision_cache = get_decision_cache()
+        self.rules_version = rules_version(sys.modules[__name__], slug_classifier)
     
-    def check_category(self, slug):
-        """Проверка категории рынка по slug"""
+    def cached_decision(self, slug):
+        """Сохраненное решение по категории slug или None"""
+        return self.decision_cache.get('category', slug, self.rules_version)
+    
+    def has_decision(self, slug):
+        """Есть ли сохраненное решение (без учета в метриках кэша)"""
+        return self.decision_cache.has('category', slug, self.rules_version)
+    
+    def check_category(self, slug, classification=None):
+        """Проверка категории рынка по slug (classification - готовый результат классификации пачки)"""
         try:
-            slug_lower = slug.lower()
-            
-            # Проверяем Sports категорию
-            for keyword in self.sports_keywords:
-                if keyword in slug_lower:
-                    logger.info(f"⚠️ Рынок {slug} исключен по категории Sports (содержит '{keyword}')")
-                    return {'is_boolean': False, 'category': 'sports'}
+            cached = self.cached_decision(slug)
+            if cached is not None:
+                logger.info(f"ℹ️ Категория рынка {slug} из кэша решений: {cached['category']}")
+                return cached
             
-            # Проверяем Crypto категорию
-            for keyword in self.crypto_keywords:
-                if keyword in slug_lower:
-                    logger.info(f"⚠️ Рынок {slug} исключен по категории Crypto (содержит '{keyword}')")
-                    return {'is_boolean': False, 'category': 'crypto'}
-            
-            # По умолчанию разрешаем все остальные рынки
-            logger.info(f"✅ Рынок {slug} прошел проверку категории")
-            return {'is_boolean': True, 'category': 'boolean'}
+            decision = self.decide_category(slug, classification)
+            self.decision_cache.put('category', slug, self.rules_version, decision)
+            return decision
             
         except Exception as e:
             logger.error(f"❌ Ошибка проверки категории для {slug}: {e}")
-            return {'is_boolean': True, 'category': 'unknown'}  # По умолчанию разрешаем 
\ No newline at end of file
+            return {'is_boolean': True, 'category': 'unknown'}  # По умолчанию разрешаем
+    
+    def decide_category(self, slug, classification=None):
+        """Решение по категории из классификации slug"""
+        if classification is None:
+            classification = self.classifier.classify(slug)
+        
+        # Sports проверяется раньше Crypto, как и прежде
+        if classification['category'] == 'sports':
+            logger.info(f"⚠️ Рынок {slug} исключен по категории Sports (содержит '{classification['category_keyword']}')")
+            return {'is_boolean': False, 'category': 'sports'}
+        
+        if classification['category'] == 'crypto':
+            logger.info(f"⚠️ Рынок {slug} исключен по категории Crypto (содержит '{classification['category_keyword']}')")
+            return {'is_boolean': False, 'category': 'crypto'}
+        
+        # По умолчанию разрешаем все остальные рынки
+        logger.info(f"✅ Рынок {slug} прошел проверку категории")
+        return {'is_boolean': True, 'category': 'boolean'}
\ No newline at end of file
@@ -4,53 +4,46 @@
 Проверяет, не является ли рынок из раздела Крипто или Спорт
 """
 
+import asyncio
+import concurrent.futures
 import logging
-from playwright.sync_api import sync_playwright
+import sys
+from analysis.browser_manager import get_browser_manager
+from analysis.browser_profiles import POLYMARKET_EVENT_URL
+from analysis.browser_runtime import get_browser_runtime
+from analysis.deadline import Deadline
+from config.config_loader import ConfigLoader
+from analysis.rate_limiter import get_navigation_rate_limiter
+from database.decision_cache import get_decision_cache, rules_version
 
 logger = logging.getLogger(__name__)
 
+# Запас сверх дедлайна на закрытие контекста после прерванной проверки
+DEADLINE_GRACE_SECONDS = 15
+
 class CategoryValidator:
     def __init__(self):
-        self.playwright = None
-        self.browser = None
-        self.page = None
-    
-    def init_browser(self):
-        """Инициализация браузера"""
-        try:
-            self.playwright = sync_playwright().start()
-            self.browser = self.playwright.chromium.launch(
-                headless=True,
-                args=[
-                    '--no-sandbox',
-                    '--disable-setuid-sandbox',
-                    '--disable-dev-shm-usage',
-                    '--disable-accelerated-2d-canvas',
-                    '--no-first-run',
-                    '--no-zygote',
-                    '--disable-gpu'
-                ]
-            )
-            self.page = self.browser.new_page()
-            self.page.set_viewport_size({"width": 1920, "height": 1080})
-            logger.info("✅ Браузер инициализирован для проверки категорий")
-            return True
-        except Exception as e:
-            logger.error(f"❌ Ошибка инициализации браузера: {e}")
-            return False
+        # Страницы открываются в контекстах общего браузера рантайма, а не в своем Chromium
+        self.browser_manager = get_browser_manager()
+        self.runtime = get_browser_runtime()
+        self.rate_limiter = get_navigation_rate_limiter()
+        self.config = ConfigLoader()
+        self.decision_cache = get_decision_cache()
+        self.rules_version = rules_version(sys.modules[__name__])
     
-    def goto_page(self, url):
+    async def goto_page(self, page, url, deadline):
         """Переход на страницу"""
         try:
+            await self.rate_limiter.acquire_async()
             logger.info(f"🌐 Переходим на страницу: {url}")
-            self.page.goto(url, wait_until='domcontentloaded', timeout=30000)
+            await page.goto(url, wait_until='domcontentloaded', timeout=deadline.stage_timeout_ms('navigation'))
             logger.info("✅ Страница загружена")
             return True
         except Exception as e:
             logger.error(f"❌ Ошибка загрузки страницы: {e}")
             return False
     
-    def check_category_color(self, category_name):
+    async def check_category_color(self, page, category_name):
         """Проверка цвета категории"""
         try:
             # Селекторы для категорий
@@ -64,10 +57,10 @@ class CategoryValidator:
             
             for selector in category_selectors:
                 try:
-                    element = self.page.query_selector(selector)
+                    element = await page.query_selector(selector)
                     if element:
                         # Получаем цвет элемента
-                        color = element.evaluate("""
+                        color = await element.evaluate("""
                             (element) => {
                                 const style = window.getComputedStyle(element);
                                 return style.color;
@@ -95,53 +88,70 @@ class CategoryValidator:
             logger.error(f"❌ Ошибка проверки цвета категории '{category_name}': {e}")
             return False
     
-    def validate_market_category(self, slug):
-        """Проверка категории рынка"""
+    def validate_market_category(self, slug, deadline=None):
+        """Проверка категории рынка в рамках дедлайна (сохраненное решение - без браузера)"""
+        cached = self.decision_cache.get('category_page', slug, self.rules_version)
+        if cached is not None:
+            logger.info(f"ℹ️ Категория рынка {slug} из кэша решений: {cached['reason']}")
+            return cached
+        
+        deadline = deadline or Deadline(self.config.get_category_check_deadline_seconds())
         try:
             logger.info(f"🔍 Проверяем категорию рынка: {slug}")
-            
-            # Инициализируем браузер
-            if not self.init_browser():
-                return {'is_valid': True, 'status': 'в работе', 'reason': 'браузер не инициализирован'}
-            
-            # Переходим на страницу
-            url = f"https://polymarket.com/event/{slug}"
-            if not self.goto_page(url):
-                return {'is_valid': True, 'status': 'в работе', 'reason': 'страница не загружена'}
-            
-            # Ждем загрузки контента
-            self.page.wait_for_timeout(3000)
-            
-            # Проверяем категорию Крипто
-            is_crypto = self.check_category_color("Crypto")
-            if is_crypto:
-                logger.warning(f"⚠️ Рынок {slug} относится к категории Крипто")
-                return {'is_valid': False, 'status': 'закрыт (Крипто)', 'reason': 'категория Крипто'}
-            
-            # Проверяем категорию Спорт
-            is_sports = self.check_category_color("Sports")
-            if is_sports:
-                logger.warning(f"⚠️ Рынок {slug} относится к категории Спорт")
-                return {'is_valid': False, 'status': 'закрыт (Спорт)', 'reason': 'категория Спорт'}
-            
-            # Если ни одна категория не активна, рынок валиден
-            logger.info(f"✅ Рынок {slug} не относится к запрещенным категориям")
-            return {'is_valid': True, 'status': 'в работе', 'reason': 'валидная категория'}
-            
+            return self.runtime.run(
+                self.validate_market_category_async(slug, deadline),
+                timeout=deadline.remaining() + DEADLINE_GRACE_SECONDS
+            )
+        except concurrent.futures.TimeoutError:
+            deadline.record_expiry()
+            logger.error(f"⏰ Таймаут проверки категории рынка {slug}")
+            return {'is_valid': True, 'status': 'в работе', 'reason': 'таймаут проверки'}
         except Exception as e:
             logger.error(f"❌ Ошибка проверки категории рынка {slug}: {e}")
             return {'is_valid': True, 'status': 'в работе', 'reason': f'ошибка проверки: {e}'}
-        finally:
-            # Закрываем браузер
-            self.close_browser()
     
-    def close_browser(self):
-        """Закрытие браузера"""
-        try:
-            if self.browser:
-                self.browser.close()
-            if self.playwright:
-                self.playwright.stop()
-            logger.info("🔒 Браузер закрыт")
-        except Exception as e:
-            logger.error(f"❌ Ошибка закрытия браузера: {e}") 
\ No newline at end of file
+    async def validate_market_category_async(self, slug, deadline):
+        """Проверка на странице в браузерном слоте рантайма: число одновременных браузерных проверок ограничено"""
+        async with self.runtime.analysis_slot():
+            deadline.check('navigation')
+            page = await self.browser_manager.new_page(default_viewport={"width": 1920, "height": 1080})
+            try:
+                return await self._validate_on_page(slug, page, deadline)
+            finally:
+                await page.context.close()
+    
+    async def _validate_on_page(self, slug, page, deadline):
+        # Переходим на страницу
+        url = f"{POLYMARKET_EVENT_URL}{slug}"
+        if not await self.goto_page(page, url, deadline):
+            return {'is_valid': True, 'status': 'в работе', 'reason': 'страница не загружена'}
+        
+        # Ждем загрузки контента
+        await asyncio.sleep(min(3, deadline.stage_budget('readiness')))
+        page.set_default_timeout(deadline.stage_timeout_ms('extraction'))
+        
+        # На странице Security Checkpoint категорий не видно - такое решение не сохраняем
+        if self.rate_limiter.report_page(await page.inner_text('body')):
+            logger.warning(f"⚠️ Вместо рынка {slug} получена страница Security Checkpoint")
+            return {'is_valid': True, 'status': 'в работе', 'reason': 'страница Security Checkpoint'}
+        
+        # Проверяем категорию Крипто
+        is_crypto = await self.check_category_color(page, "Crypto")
+        if is_crypto:
+            logger.warning(f"⚠️ Рынок {slug} относится к категории Крипто")
+            return self.remember(slug, {'is_valid': False, 'status': 'закрыт (Крипто)', 'reason': 'категория Крипто'})
+        
+        # Проверяем категорию Спорт
+        is_sports = await self.check_category_color(page, "Sports")
+        if is_sports:
+            logger.warning(f"⚠️ Рынок {slug} относится к категории Спорт")
+            return self.remember(slug, {'is_valid': False, 'status': 'закрыт (Спорт)', 'reason': 'категория Спорт'})
+        
+        # Если ни одна категория не активна, рынок валиден
+        logger.info(f"✅ Рынок {slug} не относится к запрещенным категориям")
+        return self.remember(slug, {'is_valid': True, 'status': 'в работе', 'reason': 'валидная категория'})
+    
+    def remember(self, slug, decision):
+        """Сохранение окончательного решения по категории (сбои загрузки не сохраняются)"""
+        self.decision_cache.put('category_page', slug, self.rules_version, decision)
+        return decision
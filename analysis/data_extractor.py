@@ -1,11 +1,13 @@
 import logging
-import re
 import asyncio
 from analysis.yes_percentage_extractor import YesPercentageExtractor
 from analysis.volume_extractor import VolumeExtractor
 from analysis.contract_extractor import ContractExtractor
 from analysis.market_name_extractor import MarketNameExtractor
 from analysis.boolean_market_validator import BooleanMarketValidator
+from analysis.rate_limiter import get_navigation_rate_limiter
+from analysis.browser_runtime import get_browser_runtime
+from analysis.page_text_scanner import get_page_text_scanner
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +18,8 @@ class DataExtractor:
         self.contract_extractor = ContractExtractor()
         self.name_extractor = MarketNameExtractor()
         self.boolean_validator = BooleanMarketValidator()
+        self.rate_limiter = get_navigation_rate_limiter()
+        self.text_scanner = get_page_text_scanner()
     
     async def extract_text_from_screenshot(self, page):
         """Извлечение текста из скриншота с помощью pytesseract"""
@@ -34,7 +38,7 @@ class DataExtractor:
             
             # Извлекаем текст
             logger.info("🔍 Извлекаем текст через OCR...")
-            text = pytesseract.image_to_string(image, lang='eng')
+            text = await get_browser_runtime().run_blocking('cpu', pytesseract.image_to_string, image, lang='eng')
             logger.info(f"📄 Извлеченный текст: {text[:200]}...")
             return text.strip()
             
@@ -63,8 +67,8 @@ class DataExtractor:
             page_text = await self.extract_text_from_screenshot(page)
             logger.info(f"📄 Извлеченный текст со страницы: {page_text[:300]}...")
             
-            # Проверяем на проблемы с браузером
-            if "Failed to verify your browser" in page_text or "Security Checkpoint" in page_text:
+            # Проверяем на проблемы с браузером и сообщаем ограничителю навигаций
+            if self.rate_limiter.report_page(page_text):
                 logger.warning("⚠️ Обнаружена проблема с браузером (Security Checkpoint) - сохраняем текущие данные")
                 # Не обновляем данные при проблемах с браузером, только сохраняем статус
                 data['status'] = 'в работе'  # Не закрываем рынок при временных проблемах
@@ -89,29 +93,10 @@ class DataExtractor:
             logger.info(f"✅ Рынок определен как булевый: {boolean_validation['reason']}")
             data['is_boolean'] = True
             
-            # Извлекаем процент Yes через RegEx
-            yes_patterns = [
-                r'(\d+(?:\.\d+)?)\s*%',  # 50%
-                r'(\d+(?:\.\d+)?)\s*¢',   # 50¢
-                r'(\d+(?:\.\d+)?)\s*chance',  # 50% chance
-                r'yes\s*(\d+(?:\.\d+)?)\s*%',  # Yes 50%
-                r'(\d+(?:\.\d+)?)\s*%\s*yes',  # 50% Yes
-            ]
-            
-            yes_percentage = 0
-            for pattern in yes_patterns:
-                matches = re.findall(pattern, page_text, re.IGNORECASE)
-                if matches:
-                    try:
-                        value = float(matches[0])
-                        if 0 <= value <= 100:
-                            yes_percentage = value
-                            logger.info(f"✅ Извлечен процент Yes: {yes_percentage}%")
-                            break
-                    except ValueError:
-                        continue
-            
-            data['yes_percentage'] = yes_percentage
+            # Извлекаем процент Yes через RegEx (шаблоны скомпилированы в сканере)
+            data['yes_percentage'] = self.text_scanner.extract_yes_percentage(page_text)
+            if data['yes_percentage']:
+                logger.info(f"✅ Извлечен процент Yes: {data['yes_percentage']}%")
             
             # Извлекаем объем через улучшенный VolumeExtractor
             volume = await self.volume_extractor.extract_volume(page)
@@ -121,20 +106,11 @@ class DataExtractor:
             else:
                 logger.warning("⚠️ Объем не найден")
             
-            # Извлекаем адрес контракта через RegEx
-            contract_patterns = [
-                r'0x[a-fA-F0-9]{40}',  # Ethereum адрес
-                r'Contract:\s*(0x[a-fA-F0-9]{40})',
-            ]
-            
-            for pattern in contract_patterns:
-                matches = re.findall(pattern, page_text, re.IGNORECASE)
-                if matches:
-                    contract = matches[0]
-                    if len(contract) == 42 and contract.startswith('0x'):
-                        data['contract_address'] = contract
-                        logger.info(f"✅ Извлечен адрес контракта: {contract}")
-                        break
+            # Извлекаем адрес контракта через RegEx (адрес или «Contract: адрес»)
+            contract = self.text_scanner.extract_contract(page_text, patterns=2)
+            if contract:
+                data['contract_address'] = contract
+                logger.info(f"✅ Извлечен адрес контракта: {contract}")
             
             logger.info("✅ Извлечение данных рынка завершено")
             return data
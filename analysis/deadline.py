@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Дедлайн одного цикла анализа рынка
+Создается один раз на цикл и передается через навигацию, ожидание, захват, OCR, извлечение и запись в БД
+"""
+
+import logging
+import threading
+import time
+from config.config_loader import ConfigLoader
+from monitoring.metrics_registry import get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+# Доли бюджета по стадиям в порядке выполнения
+STAGE_SHARES = [
+    ('navigation', 0.35),
+    ('readiness', 0.05),
+    ('capture', 0.15),
+    ('ocr', 0.25),
+    ('extraction', 0.05),
+    ('db_write', 0.15)
+]
+
+# Минимальный бюджет стадии, чтобы не передавать в Playwright нулевой таймаут
+MIN_STAGE_SECONDS = 0.5
+
+
+class DeadlineExceeded(Exception):
+    """Бюджет цикла анализа исчерпан или цикл отменен"""
+
+
+class Deadline:
+    def __init__(self, total_seconds):
+        self.total_seconds = total_seconds
+        self.started_at = time.monotonic()
+        self.expires_at = self.started_at + total_seconds
+        self.cancelled = False
+        self.cancel_callbacks = []
+        self.stage = None
+        self.expiry_recorded = False
+        self.lock = threading.Lock()
+
+    def remaining(self):
+        """Оставшееся время в секундах"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def is_expired(self):
+        """Бюджет исчерпан или цикл отменен"""
+        return self.cancelled or self.remaining() <= 0
+
+    def check(self, stage):
+        """Проверка перед стадией: исключение, если продолжать нельзя"""
+        self.stage = stage
+        if self.is_expired():
+            self.record_expiry()
+            raise DeadlineExceeded(f"дедлайн цикла истек перед стадией {stage}")
+
+    def stage_budget(self, stage):
+        """Бюджет стадии в секундах: ее доля от оставшегося времени среди текущей и следующих стадий"""
+        self.check(stage)
+        names = [name for name, _ in STAGE_SHARES]
+        if stage not in names:
+            return self.remaining()
+        index = names.index(stage)
+        remaining_shares = sum(share for _, share in STAGE_SHARES[index:])
+        share = STAGE_SHARES[index][1]
+        return max(MIN_STAGE_SECONDS, self.remaining() * share / remaining_shares)
+
+    def stage_timeout_ms(self, stage):
+        """Бюджет стадии в миллисекундах (для таймаутов Playwright)"""
+        return int(self.stage_budget(stage) * 1000)
+
+    def record_expiry(self):
+        """Учет истечения дедлайна в метриках (один раз на цикл, по стадии, на которой он истек)"""
+        with self.lock:
+            if self.expiry_recorded:
+                return
+            self.expiry_recorded = True
+        get_metrics_registry().inc(f'deadline.expired.{self.stage or "unknown"}')
+
+    def add_cancel_callback(self, callback):
+        """Регистрация действия при отмене (например, закрыть страницу)"""
+        with self.lock:
+            if not self.cancelled:
+                self.cancel_callbacks.append(callback)
+                return
+        callback()
+
+    def remove_cancel_callback(self, callback):
+        """Снятие действия, когда его объект (страница) больше не принадлежит циклу"""
+        with self.lock:
+            if callback in self.cancel_callbacks:
+                self.cancel_callbacks.remove(callback)
+
+    def cancel(self):
+        """Отмена цикла: выполняем зарегистрированные действия"""
+        with self.lock:
+            if self.cancelled:
+                return
+            self.cancelled = True
+            callbacks, self.cancel_callbacks = self.cancel_callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.debug(f"Ошибка при отмене цикла анализа: {e}")
+
+
+def new_analysis_deadline():
+    """Дедлайн нового цикла анализа рынка из конфигурации"""
+    return Deadline(ConfigLoader().get_analysis_deadline_seconds())
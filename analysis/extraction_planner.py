@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Планировщик уровней извлечения данных рынка
+Пробует источники от самого дешевого к самому дорогому, начиная с уровня,
+который последним сработал для этого рынка; постоянно падающие уровни понижаются
+"""
+
+import collections
+import logging
+import threading
+import time
+from analysis.deadline import DeadlineExceeded
+from monitoring.metrics_registry import get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+# Априорная стоимость уровней (сек), пока нет собственных замеров
+PRIOR_COST_SECONDS = {
+    'ssr_html': 0.3,
+    'dom_text': 0.2,
+    'selectors': 2.0,
+    'page_ocr': 8.0,
+    'element_ocr': 40.0
+}
+
+# Сколько неудач подряд у рынка, чтобы уровень ушел в конец очереди
+DEMOTE_AFTER_FAILURES = 3
+
+COST_ALPHA = 0.2
+
+MAX_TRACKED_MARKETS = 10000
+
+
+def is_useful_snapshot(data):
+    """Снимок годится: вердикт «не булевый» (окончательный, дальше идти незачем)
+    или булевый рынок с найденным процентом Yes"""
+    if not data:
+        return False
+    if data.get('is_boolean', True) is False:
+        return True
+    return data.get('yes_percentage', 0) > 0
+
+
+class ExtractionPlanner:
+    def __init__(self):
+        self.metrics = get_metrics_registry()
+        self.lock = threading.Lock()
+        self.global_stats = {}
+        self.markets = collections.OrderedDict()
+
+    def _get_tier_stats(self, tier):
+        if tier not in self.global_stats:
+            self.global_stats[tier] = {
+                'attempts': 0,
+                'successes': 0,
+                'latency': None
+            }
+        return self.global_stats[tier]
+
+    def _get_market_stats(self, slug):
+        market = self.markets.get(slug)
+        if market is None:
+            market = {'last_success': None, 'tiers': {}}
+            self.markets[slug] = market
+            if len(self.markets) > MAX_TRACKED_MARKETS:
+                self.markets.popitem(last=False)
+        else:
+            self.markets.move_to_end(slug)
+        return market
+
+    def get_cost(self, tier):
+        """Средняя стоимость уровня: задержка (EWMA), до первых замеров - априорная
+
+        CPU не учитываем: уровни ждут в общем цикле и в пулах потоков, а tesseract - дочерний процесс,
+        так что время CPU потока не относится к одному уровню; в задержку попадает все.
+        """
+        with self.lock:
+            stats = self.global_stats.get(tier)
+            if not stats or stats['latency'] is None:
+                return PRIOR_COST_SECONDS.get(tier, max(PRIOR_COST_SECONDS.values()))
+            return stats['latency']
+
+    def plan(self, slug, tiers):
+        """Порядок уровней для рынка"""
+        ordered = sorted(tiers, key=self.get_cost)
+        with self.lock:
+            market = self.markets.get(slug)
+            if not market:
+                return ordered
+
+            demoted = [tier for tier in ordered
+                       if market['tiers'].get(tier, {}).get('failures_in_row', 0) >= DEMOTE_AFTER_FAILURES]
+            ordered = [tier for tier in ordered if tier not in demoted] + demoted
+
+            last_success = market['last_success']
+            if last_success in ordered and last_success not in demoted:
+                ordered.remove(last_success)
+                ordered.insert(0, last_success)
+        return ordered
+
+    def record(self, slug, tier, success, latency):
+        """Учет попытки уровня для рынка и глобально"""
+        with self.lock:
+            stats = self._get_tier_stats(tier)
+            stats['attempts'] += 1
+            if success:
+                stats['successes'] += 1
+            if stats['latency'] is None:
+                stats['latency'] = latency
+            else:
+                stats['latency'] += COST_ALPHA * (latency - stats['latency'])
+            success_rate = stats['successes'] / stats['attempts']
+
+            market = self._get_market_stats(slug)
+            tier_stats = market['tiers'].setdefault(tier, {'attempts': 0, 'successes': 0, 'failures_in_row': 0})
+            tier_stats['attempts'] += 1
+            demoted = False
+            if success:
+                tier_stats['successes'] += 1
+                tier_stats['failures_in_row'] = 0
+                market['last_success'] = tier
+            else:
+                tier_stats['failures_in_row'] += 1
+                demoted = tier_stats['failures_in_row'] == DEMOTE_AFTER_FAILURES
+                if market['last_success'] == tier:
+                    market['last_success'] = None
+
+        self.metrics.inc(f'extraction.{tier}.attempts')
+        if success:
+            self.metrics.inc(f'extraction.{tier}.successes')
+        self.metrics.observe(f'extraction.{tier}.seconds', latency)
+        self.metrics.set_gauge(f'extraction.{tier}.success_rate', round(success_rate, 3))
+        if demoted:
+            self.metrics.inc('extraction.demotions')
+            logger.info(f"⬇️ Уровень извлечения {tier} понижен для рынка {slug} "
+                        f"после {DEMOTE_AFTER_FAILURES} неудач подряд")
+
+    def record_choice(self, slug, tier, baseline, spent):
+        """Учет выбранного уровня и экономии относительно базового"""
+        self.metrics.inc(f'extraction.chosen.{tier}')
+        if baseline is None:
+            return
+        saved = self.get_cost(baseline) - spent
+        if saved > 0:
+            self.metrics.inc('extraction.saved_seconds', saved)
+        logger.info(f"🧭 Рынок {slug}: данные получены уровнем {tier} за {spent:.1f} сек "
+                    f"(базовый {baseline} ~{self.get_cost(baseline):.1f} сек)")
+
+    def _finish_attempt(self, slug, tier, data, started):
+        latency = time.monotonic() - started
+        success = is_useful_snapshot(data)
+        self.record(slug, tier, success, latency)
+        return success, latency
+
+    def run_sync(self, slug, tiers, baseline=None):
+        """Выполнение уровней по плану, возвращает (data, tier)
+
+        tiers - словарь {уровень: функция без аргументов, возвращающая dict или None}.
+        Если ни один уровень не дал годного снимка, возвращается последний непустой результат
+        (например, булевый рынок без процента Yes) с tier=None.
+        """
+        spent = 0
+        fallback = None
+        for tier in self.plan(slug, list(tiers)):
+            started = time.monotonic()
+            try:
+                data = tiers[tier]()
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Уровень извлечения {tier} для рынка {slug}: {e}")
+                data = None
+            success, latency = self._finish_attempt(slug, tier, data, started)
+            spent += latency
+            if success:
+                self.record_choice(slug, tier, baseline, spent)
+                return data, tier
+            fallback = data or fallback
+
+        self.metrics.inc('extraction.all_tiers_failed')
+        return fallback, None
+
+    async def run_async(self, slug, tiers, baseline=None, final=True):
+        """Асинхронный вариант run_sync: функции уровней возвращают корутины
+
+        final=False - после этих уровней будут другие (стадии конвейера), общая неудача не учитывается.
+        """
+        spent = 0
+        fallback = None
+        for tier in self.plan(slug, list(tiers)):
+            started = time.monotonic()
+            try:
+                data = await tiers[tier]()
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Уровень извлечения {tier} для рынка {slug}: {e}")
+                data = None
+            success, latency = self._finish_attempt(slug, tier, data, started)
+            spent += latency
+            if success:
+                self.record_choice(slug, tier, baseline, spent)
+                return data, tier
+            fallback = data or fallback
+
+        if final:
+            self.metrics.inc('extraction.all_tiers_failed')
+        return fallback, None
+
+    def get_stats(self, slug=None):
+        """Статистика уровней: глобальная или по рынку"""
+        with self.lock:
+            if slug is not None:
+                market = self.markets.get(slug)
+                if not market:
+                    return {}
+                return {
+                    'last_success': market['last_success'],
+                    'tiers': {tier: dict(stats) for tier, stats in market['tiers'].items()}
+                }
+            return {
+                tier: {
+                    'attempts': stats['attempts'],
+                    'success_rate': stats['successes'] / stats['attempts'] if stats['attempts'] else 0,
+                    'latency': stats['latency']
+                }
+                for tier, stats in self.global_stats.items()
+            }
+
+
+_planner = ExtractionPlanner()
+
+
+def get_extraction_planner():
+    """Получение общего планировщика уровней извлечения"""
+    return _planner
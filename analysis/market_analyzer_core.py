@@ -1,104 +1,225 @@
 import logging
 import asyncio
-import threading
-from analysis.browser_manager import BrowserManager
+import concurrent.futures
+import re
+from analysis.browser_manager import get_browser_manager
+from analysis.browser_profiles import POLYMARKET_EVENT_URL
 from analysis.data_extractor import DataExtractor
 from analysis.category_filter import CategoryFilter
 from analysis.sync_market_analyzer import SyncMarketAnalyzer
+from analysis.browser_runtime import get_browser_runtime
+from analysis.warm_context_pool import get_warm_context_pool
+from analysis.rate_limiter import get_navigation_rate_limiter
+from analysis.deadline import DeadlineExceeded, new_analysis_deadline
+from analysis.extraction_planner import get_extraction_planner
+from analysis.ssr_extractor import get_ssr_extractor
+
+# Запас сверх дедлайна на закрытие контекста после прерванной стадии
+DEADLINE_GRACE_SECONDS = 15
 
 logger = logging.getLogger(__name__)
 
 class MarketAnalyzerCore:
     def __init__(self):
-        self.browser_manager = BrowserManager()
+        self.browser_manager = get_browser_manager()
         self.data_extractor = DataExtractor()
         self.category_filter = CategoryFilter()
-        self.sync_analyzer = SyncMarketAnalyzer()
+        # Только разбор текста и OCR скриншота - без собственного браузера
+        self.text_analyzer = SyncMarketAnalyzer()
+        self.runtime = get_browser_runtime()
+        self.warm_pool = get_warm_context_pool()
+        self.rate_limiter = get_navigation_rate_limiter()
+        self.planner = get_extraction_planner()
+        self.ssr_extractor = get_ssr_extractor()
     
-    def analyze_market(self, slug):
-        """Синхронная обертка для анализа рынка"""
+    def analyze_market(self, slug, deadline=None, warm=False):
+        """Синхронная обертка: анализ выполняется задачей в общем цикле рантайма"""
+        deadline = deadline or new_analysis_deadline()
         try:
-            logger.info(f"🔄 Начинаем синхронный анализ рынка: {slug}")
-            
-            # Используем синхронный анализатор в отдельном потоке
-            # чтобы не блокировать асинхронный код
-            result = None
-            exception = None
-            
-            def run_sync_analysis():
-                nonlocal result, exception
-                try:
-                    result = self.sync_analyzer.analyze_market(slug)
-                except Exception as e:
-                    exception = e
-            
-            # Запускаем синхронный анализ в отдельном потоке
-            thread = threading.Thread(target=run_sync_analysis)
-            thread.start()
-            thread.join(timeout=120)  # Таймаут 120 секунд
-            
-            if thread.is_alive():
-                logger.error(f"⏰ Таймаут синхронного анализа рынка {slug} (120 секунд)")
-                return None
-            
-            if exception:
-                logger.error(f"❌ Ошибка синхронного анализа рынка {slug}: {exception}")
-                return None
-            
-            if result:
-                logger.info(f"✅ Синхронный анализ рынка {slug} завершен успешно")
-                return result
-            else:
-                logger.warning(f"⚠️ Синхронный анализ рынка {slug} не вернул данных")
-                return None
-                
+            return self.runtime.run(
+                self.analyze_market_async(slug, deadline, warm),
+                timeout=deadline.remaining() + DEADLINE_GRACE_SECONDS
+            )
+        except concurrent.futures.TimeoutError:
+            deadline.cancel()
+            deadline.record_expiry()
+            logger.error(f"⏰ Таймаут анализа рынка {slug} ({deadline.total_seconds:.0f} секунд)")
+            return None
         except Exception as e:
-            logger.error(f"❌ Ошибка синхронного анализа рынка {slug}: {e}")
+            logger.error(f"❌ Ошибка анализа рынка {slug}: {e}")
             return None
     
-    async def analyze_market_async(self, slug):
-        """Асинхронный анализ рынка"""
+    def analyze_market_warm(self, slug, deadline=None):
+        """Анализ рынка в прогретом контексте (первый снимок нового рынка)"""
+        return self.analyze_market(slug, deadline, warm=True)
+    
+    async def analyze_market_async(self, slug, deadline=None, warm=False):
+        """Асинхронный анализ рынка: серверный HTML, затем браузер в слоте рантайма"""
+        deadline = deadline or new_analysis_deadline()
         try:
-            if not self.browser_manager.is_initialized():
-                if not await self.browser_manager.init_browser():
-                    return None
-            
-            # Переходим на страницу рынка
-            url = f"https://polymarket.com/event/{slug}"
-            logger.info(f"🌐 Переходим на страницу: {url}")
-            try:
-                await self.browser_manager.goto_page(url)
-            except Exception as e:
-                logger.error(f"❌ Ошибка перехода на страницу {url}: {e}")
-                return None
+            logger.info(f"🔄 Начинаем анализ рынка: {slug}")
             
-            # Ждем загрузки контента
-            logger.info(f"⏳ Ждем загрузки контента...")
-            try:
-                await self.browser_manager.wait_for_content()
-            except Exception as e:
-                logger.error(f"❌ Ошибка ожидания контента: {e}")
-                return None
+            # Серверный HTML не требует браузера и слота
+            ssr_data = await self.runtime.run_blocking('io', self.ssr_extractor.try_extract, slug, deadline)
+            if ssr_data:
+                return ssr_data
             
-            # Извлекаем данные
-            logger.info(f"🔍 Начинаем извлечение данных...")
-            market_data = await self.data_extractor.extract_market_data(self.browser_manager.get_page())
+            async with self.runtime.analysis_slot():
+                deadline.check('navigation')
+                # По истечении дедлайна задача отменяется, и контекст закрывается в finally
+                market_data = await asyncio.wait_for(
+                    self._analyze_in_browser(slug, deadline, warm), timeout=deadline.remaining()
+                )
             
             if market_data:
                 logger.info(f"✅ Анализ рынка {slug} завершен успешно")
-                return market_data
             else:
                 logger.warning(f"⚠️ Не удалось извлечь данные для {slug}")
-                return None
-            
+            return market_data
+        
+        except (DeadlineExceeded, asyncio.TimeoutError) as e:
+            # Отмена завершает и то, что задача оставила в пулах потоков (процесс OCR)
+            deadline.cancel()
+            deadline.record_expiry()
+            logger.error(f"⏰ Анализ рынка {slug} прерван по дедлайну: {e}")
+            return None
         except Exception as e:
             logger.error(f"❌ Ошибка анализа рынка {slug}: {e}")
             return None
     
+    async def _analyze_in_browser(self, slug, deadline, warm):
+        """Анализ на странице: прогретый контекст из пула или новый контекст общего браузера"""
+        warm_context = None
+        if warm and self.warm_pool.is_enabled():
+            logger.info(f"🔥 Анализ рынка {slug} в прогретом контексте")
+            warm_context = await self.warm_pool.acquire()
+            page = warm_context.page
+        else:
+            page = await self.browser_manager.new_page()
+        
+        # Отмена цикла закрывает страницу: ожидающие вызовы Playwright сразу получают ошибку
+        close_page = self.page_closer(page)
+        deadline.add_cancel_callback(close_page)
+        
+        healthy = False
+        try:
+            dom_text = await self.load_market_page(slug, page, deadline)
+            if dom_text is None:
+                # Контекст, получивший checkpoint, в пул прогретых не возвращаем
+                return None
+            
+            texts = {'dom_text': dom_text}
+            market_data, tier = await self.planner.run_async(
+                slug, self.page_tiers(slug, page, deadline, texts), baseline='page_ocr'
+            )
+            market_data = await self.fill_contract_address(market_data, texts.get(tier) or dom_text, page)
+            healthy = True
+            return market_data
+        finally:
+            # Страница уходит из цикла (прогретая - в пул), отмена цикла больше не должна ее закрывать
+            deadline.remove_cancel_callback(close_page)
+            if warm_context:
+                await self.warm_pool.release(warm_context, healthy and not deadline.cancelled)
+            else:
+                await page.context.close()
+    
+    def page_closer(self, page):
+        """Действие отмены цикла: закрыть страницу в цикле рантайма (вызывается из любого потока)"""
+        loop = asyncio.get_running_loop()
+        
+        def close_page():
+            asyncio.run_coroutine_threadsafe(page.close(), loop)
+        return close_page
+    
+    async def load_market_page(self, slug, page, deadline):
+        """Переход на страницу рынка: текст страницы или None, если получен Security Checkpoint"""
+        url = f"{POLYMARKET_EVENT_URL}{slug}"
+        await self.rate_limiter.acquire_async()
+        logger.info(f"🌐 Переходим на страницу: {url}")
+        await page.goto(url, wait_until='domcontentloaded', timeout=deadline.stage_timeout_ms('navigation'))
+        await asyncio.sleep(min(3, deadline.stage_budget('readiness')))
+        
+        deadline.check('extraction')
+        page.set_default_timeout(deadline.stage_timeout_ms('extraction'))
+        dom_text = await page.inner_text('body')
+        if self.rate_limiter.report_page(dom_text):
+            logger.warning("⚠️ Обнаружена проблема с браузером (Security Checkpoint) - сохраняем текущие данные")
+            return None
+        return dom_text
+    
+    def page_tiers(self, slug, page, deadline, texts):
+        """Уровни извлечения по загруженной странице (не checkpoint); тексты уровней складываются в texts"""
+        dom_text = texts['dom_text']
+        
+        async def extract_from_dom():
+            return self.text_analyzer.extract_market_data(dom_text)
+        
+        async def extract_from_selectors():
+            return await self._extract_with_selectors(slug, page, dom_text)
+        
+        async def extract_from_ocr():
+            screenshot = await page.screenshot(full_page=True, timeout=deadline.stage_timeout_ms('capture'))
+            return await self.extract_from_screenshot(screenshot, deadline, texts)
+        
+        async def extract_from_element_ocr():
+            # OCR по элементам уже открытой страницы, без своего браузера
+            from ocr_screenshot_analyzer import OCRScreenshotAnalyzer
+            return await asyncio.wait_for(
+                OCRScreenshotAnalyzer().extract_market_data(slug, page), timeout=deadline.stage_budget('ocr')
+            )
+        
+        # Уровни извлечения от дешевого к дорогому, порядок выбирает планировщик
+        return {
+            'dom_text': extract_from_dom,
+            'selectors': extract_from_selectors,
+            'page_ocr': extract_from_ocr,
+            'element_ocr': extract_from_element_ocr
+        }
+    
+    async def extract_from_screenshot(self, screenshot, deadline, texts):
+        """Уровень OCR страницы по готовому скриншоту (tesseract в пуле cpu)"""
+        texts['page_ocr'] = await self.runtime.run_blocking(
+            'cpu', self.text_analyzer.ocr_screenshot, screenshot, deadline
+        )
+        return self.text_analyzer.extract_market_data(texts['page_ocr']) if texts['page_ocr'] else None
+    
+    async def fill_contract_address(self, market_data, page_text, page=None):
+        """Адрес контракта булевого рынка: из текста уровня, иначе кликами по открытой странице"""
+        if market_data and market_data.get('is_boolean') and not market_data.get('contract_address'):
+            contract_match = re.search(r'0x[a-fA-F0-9]{40}', page_text or '')
+            if contract_match:
+                market_data['contract_address'] = contract_match.group(0)
+            elif page is not None:
+                market_data['contract_address'] = await self.data_extractor.contract_extractor.extract_contract(page) or ''
+        return market_data
+    
+    async def _extract_with_selectors(self, slug, page, page_text):
+        """Уровень селекторов: название, процент Yes и объем из элементов страницы"""
+        market_name = await self.data_extractor.name_extractor.extract_market_name(page)
+        data = {
+            'market_exists': True,
+            'is_boolean': True,
+            'yes_percentage': 0,
+            'volume': 'New',
+            'contract_address': '',
+            'status': 'в работе',
+            'market_name': market_name or 'Unknown Market'
+        }
+        
+        boolean_validation = self.data_extractor.boolean_validator.validate_market_boolean(page_text, market_name, slug)
+        if not boolean_validation['is_boolean']:
+            data['is_boolean'] = False
+            data['status'] = 'closed'
+            return data
+        
+        data['yes_percentage'] = await self.data_extractor.yes_extractor.extract_yes_percentage(page) or 0
+        data['volume'] = await self.data_extractor.volume_extractor.extract_volume(page) or 'New'
+        return data
+    
     def check_market_category_sync(self, slug):
         """Синхронная проверка категории рынка"""
         return self.category_filter.check_category(slug)
     
     def close_driver(self):
         """Закрытие браузера"""
-        return self.browser_manager.close_browser_sync() 
\ No newline at end of file
+        return self.browser_manager.close_browser_sync()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Сканер текста страницы рынка (OCR или DOM) на заранее скомпилированных шаблонах
+Каждое поле берется из первого подходящего шаблона по приоритету: поиск шаблона
+останавливается на первом совпадении, а следующие шаблоны не запускаются вовсе.
+Название ищется линейно, без возвратов [^.!?]* с каждой буквы текста.
+Результаты совпадают с прежними проверками re.findall по каждому шаблону.
+"""
+
+import itertools
+import re
+
+# Шаблоны названия рынка по приоритету
+TITLE_PATTERNS = [
+    r'Will any presidential candidate[^.!?]*[.!?]',
+    r'Will [^.!?]*[.!?]',
+    r'[A-Z][^.!?]*[.!?]',
+    r'[A-Z][a-z\s]+[?]'
+]
+
+# Индикаторы булевых рынков
+BOOLEAN_INDICATORS = [
+    r'yes\s*\d+[¢%]',  # Yes 21¢
+    r'no\s*\d+[¢%]',   # No 81¢
+    r'yes\s*\$\d+',    # Yes $0.21
+    r'no\s*\$\d+',     # No $0.81
+    r'yes\s*\d+%',     # Yes 21%
+    r'no\s*\d+%',      # No 79%
+    r'\d+%',           # 38% (просто процент)
+    r'\d+¢',           # 50¢ (просто центы)
+    r'\$\d+',          # $0.50 (просто доллары)
+]
+
+YES_PATTERNS = [
+    r'(\d+(?:\.\d+)?)\s*%',  # 50%
+    r'(\d+(?:\.\d+)?)\s*¢',   # 50¢
+    r'(\d+(?:\.\d+)?)\s*chance',  # 50% chance
+    r'yes\s*(\d+(?:\.\d+)?)\s*%',  # Yes 50%
+    r'(\d+(?:\.\d+)?)\s*%\s*yes',  # 50% Yes
+]
+
+VOLUME_PATTERNS = [
+    r'\$(\d+(?:,\d{3})*(?:\.\d+)?)\s*Vol',  # $8,937 Vol
+    r'(\d+(?:,\d{3})*(?:\.\d+)?)\s*Vol',    # 8,937 Vol
+    r'Volume:\s*\$(\d+(?:,\d{3})*(?:\.\d+)?)',
+    r'(\d+(?:,\d{3})*(?:\.\d+)?)\s*USD',
+    r'\$(\d+(?:,\d{3})*(?:\.\d+)?)',        # $8,937
+    r'Total Volume:\s*\$(\d+(?:,\d{3})*(?:\.\d+)?)',
+    r'Volume\s*\$(\d+(?:,\d{3})*(?:\.\d+)?)',
+    r'(\d+(?:,\d{3})*(?:\.\d+)?)\s*volume',
+    r'(\d+(?:,\d{3})*(?:\.\d+)?)\s*total',
+    r'Vol\s*\$(\d+(?:,\d{3})*(?:\.\d+)?)',  # Vol $8,937
+    r'Vol\s*(\d+(?:,\d{3})*(?:\.\d+)?)'     # Vol 8,937
+]
+
+CONTRACT_PATTERNS = [
+    r'0x[a-fA-F0-9]{40}',  # Ethereum адрес
+    r'Contract:\s*(0x[a-fA-F0-9]{40})',
+    r'contract\s*(0x[a-fA-F0-9]{40})',
+    r'address\s*(0x[a-fA-F0-9]{40})',
+    r'(0x[a-fA-F0-9]{40})\s*contract',
+    r'(0x[a-fA-F0-9]{40})\s*address'
+]
+
+# Для названия: начала «Will ...» и классы символов из TITLE_PATTERNS
+TITLE_STARTS = [
+    re.compile(r'Will any presidential candidate', re.IGNORECASE),
+    re.compile(r'Will ', re.IGNORECASE)
+]
+TITLE_TERMINATOR = re.compile(r'[.!?]')
+TITLE_LETTER = re.compile(r'[A-Z]', re.IGNORECASE)
+TITLE_QUESTION_RUN = re.compile(r'[a-z\s]+', re.IGNORECASE)
+
+
+class PageTextScanner:
+    def __init__(self):
+        self.fields = {
+            'boolean': [re.compile(pattern, re.IGNORECASE) for pattern in BOOLEAN_INDICATORS],
+            'yes': [re.compile(pattern, re.IGNORECASE) for pattern in YES_PATTERNS],
+            'volume': [re.compile(pattern, re.IGNORECASE) for pattern in VOLUME_PATTERNS],
+            'contract': [re.compile(pattern, re.IGNORECASE) for pattern in CONTRACT_PATTERNS]
+        }
+
+    def first_matches(self, text, field):
+        """Первые совпадения шаблонов поля по порядку; шаблон ищется, только когда до него дошла очередь.
+        Поиск останавливается на первом совпадении - то же, что re.findall(pattern)[0], без сбора остальных"""
+        for pattern in self.fields[field]:
+            match = pattern.search(text)
+            yield match.group(1 if pattern.groups else 0) if match else None
+
+    def extract_title(self, text):
+        """Название рынка по TITLE_PATTERNS: первое совпадение длиннее 10 символов"""
+        title_patterns = [
+            lambda: self.title_until_terminator(text, TITLE_STARTS[0]),
+            lambda: self.title_until_terminator(text, TITLE_STARTS[1]),
+            lambda: self.title_until_terminator(text, TITLE_LETTER),
+            lambda: self.title_question(text)
+        ]
+        for title_pattern in title_patterns:
+            title = title_pattern()
+            if title and len(title.strip()) > 10:
+                return title.strip()
+        return None
+
+    def title_until_terminator(self, text, start_pattern):
+        """«<начало>[^.!?]*[.!?]»: от первого вхождения начала до ближайшего знака конца предложения.
+        Если после первого вхождения знака нет, его нет и после следующих - повторные попытки не нужны"""
+        start = start_pattern.search(text)
+        if not start:
+            return None
+        end = TITLE_TERMINATOR.search(text, start.end())
+        return text[start.start():end.end()] if end else None
+
+    def title_question(self, text):
+        """«[A-Z][a-z\\s]+[?]»: первая серия букв и пробелов перед '?', начинающаяся с буквы"""
+        for run in TITLE_QUESTION_RUN.finditer(text):
+            if text[run.end():run.end() + 1] != '?':
+                continue
+            # После первой буквы в серии должен остаться хотя бы один символ
+            start = TITLE_LETTER.search(text, run.start(), run.end() - 1)
+            if start:
+                return text[start.start():run.end() + 1]
+        return None
+
+    def find_boolean_indicator(self, text):
+        """Первый найденный индикатор булевого рынка (шаблон) или None"""
+        for index, value in enumerate(self.first_matches(text, 'boolean')):
+            if value is not None:
+                return BOOLEAN_INDICATORS[index]
+        return None
+
+    def extract_yes_percentage(self, text):
+        """Процент Yes (0, если не найден)"""
+        for value in self.first_matches(text, 'yes'):
+            if value is None:
+                continue
+            try:
+                value = float(value)
+                if 0 <= value <= 100:
+                    return value
+            except ValueError:
+                continue
+        return 0
+
+    def extract_volume(self, text):
+        """Объем в формате $8,937 или 'New'"""
+        for value in self.first_matches(text, 'volume'):
+            if value is None:
+                continue
+            volume = value.replace(',', '')
+            try:
+                volume_float = float(volume)
+                if volume_float > 0:
+                    # Форматируем объем с запятыми для больших чисел
+                    return f"${volume_float:,.0f}" if volume_float >= 1000 else f"${volume}"
+                return 'New'
+            except ValueError:
+                continue
+        return 'New'
+
+    def extract_contract(self, text, patterns=len(CONTRACT_PATTERNS)):
+        """Адрес контракта по первым patterns шаблонам ('' если не найден)"""
+        for contract in itertools.islice(self.first_matches(text, 'contract'), patterns):
+            if contract and len(contract) == 42 and contract.startswith('0x'):
+                return contract
+        return ''
+
+    def scan(self, text):
+        """Все поля текста страницы: {'market_name', 'boolean_indicator', 'yes_percentage', 'volume', 'contract_address'}"""
+        return {
+            'market_name': self.extract_title(text),
+            'boolean_indicator': self.find_boolean_indicator(text),
+            'yes_percentage': self.extract_yes_percentage(text),
+            'volume': self.extract_volume(text),
+            'contract_address': self.extract_contract(text)
+        }
+
+
+_scanner = PageTextScanner()
+
+
+def get_page_text_scanner():
+    """Получение общего сканера (шаблоны компилируются один раз при импорте)"""
+    return _scanner
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Общий для процесса ограничитель навигаций на polymarket.com
+Token bucket + AIMD: скорость снижается при росте доли Security Checkpoint и медленно восстанавливается
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from config.config_loader import ConfigLoader
+from monitoring.metrics_registry import get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_MARKERS = [
+    'failed to verify your browser',
+    'security checkpoint'
+]
+
+
+def is_checkpoint_page(page_text):
+    """Проверка, что вместо рынка получена страница Security Checkpoint"""
+    if not page_text:
+        return False
+    text_lower = page_text.lower()
+    return any(marker in text_lower for marker in CHECKPOINT_MARKERS)
+
+
+class NavigationRateLimiter:
+    def __init__(self, rate_config):
+        self.min_rate = rate_config['min_rate']
+        self.max_rate = rate_config['max_rate']
+        self.rate = min(max(rate_config['initial_rate'], self.min_rate), self.max_rate)
+        self.burst = rate_config['burst']
+        self.increase_step = rate_config['increase_step']
+        self.decrease_step = rate_config['decrease_step']
+        self.decrease_factor = rate_config['decrease_factor']
+        self.checkpoint_threshold = rate_config['checkpoint_threshold']
+        self.checkpoint_alpha = rate_config['checkpoint_alpha']
+        self.decrease_cooldown_seconds = rate_config['decrease_cooldown_seconds']
+
+        self.tokens = float(self.burst)
+        self.last_refill = time.monotonic()
+        self.last_multiplicative_decrease = 0.0
+        self.checkpoint_ewma = 0.0
+        self.lock = threading.Lock()
+        self.metrics = get_metrics_registry()
+        self.metrics.set_gauge('rate_limiter.rate', self.rate)
+
+    def _refill(self, now):
+        """Пополнение корзины токенов"""
+        elapsed = now - self.last_refill
+        self.last_refill = now
+        self.tokens = min(float(self.burst), self.tokens + elapsed * self.rate)
+
+    def _reserve(self):
+        """Резервирование токена, возвращает время ожидания в секундах"""
+        with self.lock:
+            self._refill(time.monotonic())
+            # Токены могут уходить в минус: ожидающие встают в очередь по порядку
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def _record_wait(self, wait_seconds):
+        self.metrics.inc('rate_limiter.acquired')
+        self.metrics.observe('rate_limiter.queue_wait_seconds', wait_seconds)
+        if wait_seconds > 0:
+            self.metrics.inc('rate_limiter.queued_seconds_total', wait_seconds)
+            logger.debug(f"⏳ Навигация ожидала в ограничителе {wait_seconds:.2f} сек")
+
+    def acquire(self):
+        """Синхронное ожидание разрешения на навигацию"""
+        wait_seconds = self._reserve()
+        if wait_seconds > 0:
+            time.sleep(wait_seconds)
+        self._record_wait(wait_seconds)
+        return wait_seconds
+
+    async def acquire_async(self):
+        """Асинхронное ожидание разрешения на навигацию"""
+        wait_seconds = self._reserve()
+        if wait_seconds > 0:
+            await asyncio.sleep(wait_seconds)
+        self._record_wait(wait_seconds)
+        return wait_seconds
+
+    def report_success(self):
+        """Страница загружена без Security Checkpoint - медленно повышаем скорость"""
+        with self.lock:
+            self.checkpoint_ewma *= (1 - self.checkpoint_alpha)
+            if self.checkpoint_ewma < self.checkpoint_threshold / 2:
+                self._set_rate(self.rate + self.increase_step)
+            ewma = self.checkpoint_ewma
+        self.metrics.inc('rate_limiter.pages_ok')
+        self.metrics.set_gauge('rate_limiter.checkpoint_ewma', ewma)
+
+    def report_checkpoint(self):
+        """Получен Security Checkpoint - снижаем скорость"""
+        with self.lock:
+            now = time.monotonic()
+            self.checkpoint_ewma = self.checkpoint_ewma * (1 - self.checkpoint_alpha) + self.checkpoint_alpha
+            new_rate = self.rate - self.decrease_step
+            # Мультипликативное снижение не чаще раза за период, иначе серия checkpoint обнулит скорость
+            if (self.checkpoint_ewma >= self.checkpoint_threshold and
+                    now - self.last_multiplicative_decrease >= self.decrease_cooldown_seconds):
+                new_rate = self.rate * self.decrease_factor
+                self.last_multiplicative_decrease = now
+            self._set_rate(new_rate)
+            # Сжигаем накопленные токены, чтобы не отправить следующий всплеск
+            self.tokens = min(self.tokens, 0.0)
+            rate, ewma = self.rate, self.checkpoint_ewma
+        self.metrics.inc('rate_limiter.checkpoints')
+        self.metrics.set_gauge('rate_limiter.checkpoint_ewma', ewma)
+        logger.warning(f"🐢 Security Checkpoint: скорость навигаций снижена до {rate:.3f}/сек (доля {ewma:.2f})")
+
+    def report_page(self, page_text):
+        """Учет результата загрузки страницы, возвращает True если это checkpoint"""
+        if is_checkpoint_page(page_text):
+            self.report_checkpoint()
+            return True
+        self.report_success()
+        return False
+
+    def _set_rate(self, rate):
+        self.rate = min(max(rate, self.min_rate), self.max_rate)
+        self.metrics.set_gauge('rate_limiter.rate', self.rate)
+
+    def get_stats(self):
+        """Текущее состояние ограничителя"""
+        with self.lock:
+            return {
+                'rate': self.rate,
+                'tokens': self.tokens,
+                'checkpoint_ewma': self.checkpoint_ewma,
+                'queued_seconds_total': self.metrics.get_counter('rate_limiter.queued_seconds_total')
+            }
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_navigation_rate_limiter():
+    """Получение общего ограничителя навигаций"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = NavigationRateLimiter(ConfigLoader().get_rate_limit_config())
+        return _limiter
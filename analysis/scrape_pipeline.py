@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Конвейер анализа рынков: навигация/захват → OCR/извлечение → запись в БД
+Стадии - задачи цикла браузерного рантайма, связанные ограниченными очередями asyncio.
+Страница закрывается до OCR, поэтому браузерный слот загружает рынок B,
+пока пул cpu распознает скриншот рынка A
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from analysis.browser_manager import get_browser_manager
+from analysis.browser_runtime import get_browser_runtime
+from analysis.deadline import DeadlineExceeded, new_analysis_deadline
+from analysis.extraction_planner import get_extraction_planner
+from analysis.market_analyzer_core import MarketAnalyzerCore
+from config.config_loader import ConfigLoader
+from database.analytic_updater import AnalyticUpdater
+from monitoring.metrics_registry import get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+STAGES = ['capture', 'extract', 'persist']
+
+# Уровни планировщика в конвейере: OCR по элементам держал бы страницу открытой на все распознавание
+PIPELINE_TIERS = ['dom_text', 'selectors', 'page_ocr']
+
+# Запас сверх дедлайна на завершение стадии, которая уже выполняется
+DEADLINE_GRACE_SECONDS = 15
+
+
+class ScrapeJob:
+    def __init__(self, market_id, slug, deadline, future):
+        self.market_id = market_id
+        self.slug = slug
+        self.deadline = deadline
+        self.future = future
+        self.submitted_at = time.monotonic()
+        self.dom_text = None
+        self.screenshot = None
+        # Негодный, но непустой результат уровней захвата (например, булевый рынок без процента Yes)
+        self.fallback = None
+        self.analysis_data = None
+        self.stored = False
+
+
+class ScrapePipeline:
+    def __init__(self):
+        self.config = ConfigLoader()
+        self.metrics = get_metrics_registry()
+        self.runtime = get_browser_runtime()
+        self.browser_manager = get_browser_manager()
+        self.planner = get_extraction_planner()
+        # Загрузка страницы, уровни извлечения и поиск контракта - общие с обычным анализом
+        self.analyzer = MarketAnalyzerCore()
+        self.queue_size = self.config.get_pipeline_queue_size()
+        self.worker_counts = {
+            'capture': self.config.get_pipeline_capture_workers(),
+            'extract': self.config.get_pipeline_extract_workers(),
+            'persist': self.config.get_pipeline_persist_workers()
+        }
+        self.busy = {stage: 0 for stage in STAGES}
+        # Очереди и задачи стадий создаются в цикле рантайма при первом запуске
+        self.queues = None
+        self.workers = []
+        self.running = False
+        # AnalyticUpdater - свой у каждого потока io
+        self.thread_state = threading.local()
+
+    async def _start(self):
+        """Запуск задач всех стадий в цикле рантайма"""
+        if self.running:
+            return
+        self.running = True
+        self.queues = {stage: asyncio.Queue(maxsize=self.queue_size) for stage in STAGES}
+
+        handlers = {
+            'capture': self._capture,
+            'extract': self._extract,
+            'persist': self._persist
+        }
+        for stage in STAGES:
+            for i in range(self.worker_counts[stage]):
+                self.workers.append(asyncio.ensure_future(self._stage_worker(stage, handlers[stage])))
+
+        logger.info(f"✅ Конвейер анализа запущен: захват={self.worker_counts['capture']}, "
+                    f"извлечение={self.worker_counts['extract']}, запись={self.worker_counts['persist']}")
+
+    def stop(self):
+        """Синхронная остановка стадий (незавершенные задачи получают (None, False))"""
+        if not self.running or not self.runtime.is_running():
+            return
+        try:
+            self.runtime.run(self._stop(), timeout=30)
+        except Exception as e:
+            logger.error(f"❌ Ошибка остановки конвейера анализа: {e}")
+
+    async def _stop(self):
+        self.running = False
+        for worker in self.workers:
+            worker.cancel()
+        self.workers = []
+        for stage in STAGES:
+            while not self.queues[stage].empty():
+                self._finish(self.queues[stage].get_nowait())
+
+    async def submit(self, market_id, slug, deadline=None):
+        """Постановка рынка в конвейер, возвращает Future с (analysis_data, stored)
+
+        Место в очереди захвата ожидается в цикле рантайма, не блокируя другие задачи.
+        """
+        await self._start()
+        job = ScrapeJob(market_id, slug, deadline or new_analysis_deadline(), asyncio.get_running_loop().create_future())
+        await self._put('capture', job)
+        return job.future
+
+    async def analyze_and_store(self, market_id, slug, deadline=None):
+        """Анализ с записью в БД через конвейер, возвращает (analysis_data, stored)"""
+        deadline = deadline or new_analysis_deadline()
+
+        async def run_job():
+            return await (await self.submit(market_id, slug, deadline))
+
+        try:
+            return await asyncio.wait_for(run_job(), timeout=deadline.remaining() + DEADLINE_GRACE_SECONDS)
+        except asyncio.TimeoutError:
+            # Отменяем цикл: следующие стадии пропустят задачу
+            deadline.cancel()
+            deadline.record_expiry()
+            logger.error(f"⏰ Таймаут конвейера для рынка {slug}")
+            return None, False
+
+    async def _put(self, stage, job):
+        # Переполненная следующая стадия притормаживает предыдущую, не блокируя цикл
+        await self.queues[stage].put(job)
+        if not self.running:
+            # Конвейер остановлен, пока задача ждала места в очереди
+            self._finish(job)
+            return
+        self.metrics.set_gauge(f'pipeline.{stage}.queue_depth', self.queues[stage].qsize())
+
+    async def _get(self, stage):
+        job = await self.queues[stage].get()
+        self.metrics.set_gauge(f'pipeline.{stage}.queue_depth', self.queues[stage].qsize())
+        return job
+
+    async def _stage_worker(self, stage, handler):
+        """Задача стадии: обработчик возвращает следующую стадию или None - задача завершена"""
+        while True:
+            job = await self._get(stage)
+            try:
+                next_stage = await self._run_stage(stage, job, handler)
+                if next_stage:
+                    await self._put(next_stage, job)
+                    continue
+            except asyncio.CancelledError:
+                job.analysis_data = None
+                self._finish(job)
+                raise
+            self._finish(job)
+
+    async def _run_stage(self, stage, job, handler):
+        """Выполнение стадии с учетом занятости и времени"""
+        self.busy[stage] += 1
+        self.metrics.set_gauge(f'pipeline.{stage}.busy', self.busy[stage])
+        started = time.monotonic()
+        try:
+            return await handler(job)
+        except DeadlineExceeded as e:
+            logger.error(f"⏰ Стадия {stage} для рынка {job.slug} пропущена: {e}")
+            return None
+        except Exception as e:
+            if job.deadline.is_expired():
+                job.deadline.record_expiry()
+            logger.error(f"❌ Ошибка стадии {stage} для рынка {job.slug}: {e}")
+            return None
+        finally:
+            self.metrics.observe(f'pipeline.{stage}.seconds', time.monotonic() - started)
+            self.busy[stage] -= 1
+            self.metrics.set_gauge(f'pipeline.{stage}.busy', self.busy[stage])
+
+    def _finish(self, job):
+        if not job.future.done():
+            job.future.set_result((job.analysis_data, job.stored))
+        self.metrics.observe('pipeline.total_seconds', time.monotonic() - job.submitted_at)
+
+    async def _capture(self, job):
+        """Стадия 1: серверный HTML, иначе навигация и дешевые уровни на странице в браузерном слоте"""
+        # Рынок, разобранный по серверному HTML, сразу уходит на запись
+        job.analysis_data = await self.runtime.run_blocking(
+            'io', self.analyzer.ssr_extractor.try_extract, job.slug, job.deadline
+        )
+        if job.analysis_data:
+            return 'persist'
+
+        async with self.runtime.analysis_slot():
+            job.deadline.check('navigation')
+            page = await self.browser_manager.new_page()
+            close_page = self.analyzer.page_closer(page)
+            job.deadline.add_cancel_callback(close_page)
+            try:
+                return await self._capture_page(job, page)
+            finally:
+                job.deadline.remove_cancel_callback(close_page)
+                await page.context.close()
+
+    async def _capture_page(self, job, page):
+        job.dom_text = await self.analyzer.load_market_page(job.slug, page, job.deadline)
+        if job.dom_text is None:
+            return None
+
+        # Уровни, которые планировщик ставит до OCR страницы, выполняются, пока страница открыта
+        texts = {'dom_text': job.dom_text}
+        tiers = self.analyzer.page_tiers(job.slug, page, job.deadline, texts)
+        order = self.planner.plan(job.slug, PIPELINE_TIERS)
+        page_tiers = order[:order.index('page_ocr')]
+        if page_tiers:
+            data, tier = await self.planner.run_async(
+                job.slug, {name: tiers[name] for name in page_tiers}, baseline='page_ocr', final=False
+            )
+            if tier:
+                job.analysis_data = await self.analyzer.fill_contract_address(data, texts.get(tier) or job.dom_text, page)
+                return 'persist'
+            job.fallback = data
+
+        job.screenshot = await page.screenshot(full_page=True, timeout=job.deadline.stage_timeout_ms('capture'))
+        return 'extract'
+
+    async def _extract(self, job):
+        """Стадия 2: OCR скриншота в пуле cpu и извлечение полей (страница уже закрыта)"""
+        texts = {}
+
+        async def extract_from_ocr():
+            return await self.analyzer.extract_from_screenshot(job.screenshot, job.deadline, texts)
+
+        try:
+            data, tier = await self.planner.run_async(job.slug, {'page_ocr': extract_from_ocr}, baseline='page_ocr')
+        finally:
+            job.screenshot = None
+        job.deadline.check('extraction')
+
+        data = data or job.fallback
+        if not data:
+            return None
+        job.analysis_data = await self.analyzer.fill_contract_address(data, texts.get('page_ocr') or job.dom_text)
+        return 'persist'
+
+    async def _persist(self, job):
+        """Стадия 3: запись в БД в пуле io"""
+        job.stored = bool(await self.runtime.run_blocking(
+            'io', self.update_market_analysis, job.market_id, job.analysis_data, job.deadline
+        ))
+        return None
+
+    def update_market_analysis(self, market_id, analysis_data, deadline):
+        """Запись анализа через AnalyticUpdater текущего потока"""
+        if not hasattr(self.thread_state, 'updater'):
+            self.thread_state.updater = AnalyticUpdater()
+        return self.thread_state.updater.update_market_analysis(market_id, analysis_data, deadline)
+
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+def get_scrape_pipeline():
+    """Получение общего конвейера анализа (None, если конвейер выключен)"""
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            if not ConfigLoader().get_pipeline_enabled():
+                return None
+            _pipeline = ScrapePipeline()
+        return _pipeline
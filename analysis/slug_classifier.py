@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Компилируемый классификатор slug и названий рынков
+Ключевые слова категорий и множественных исходов ищутся одним автоматом Ахо-Корасик,
+шаблоны названий - одной объединенной регуляркой; пачка текстов проверяется за один проход.
+Решения и причины совпадают с CategoryFilter и MarketBooleanPrechecker.
+"""
+
+import bisect
+import collections
+import re
+
+SPORTS_KEYWORDS = [
+    'sports', 'football', 'basketball', 'soccer', 'tennis',
+    'baseball', 'hockey', 'golf', 'olympics', 'championship',
+    'league', 'cup', 'tournament', 'match', 'game', 'team'
+]
+
+CRYPTO_KEYWORDS = [
+    'crypto', 'bitcoin', 'ethereum', 'btc', 'eth', 'blockchain',
+    'defi', 'nft', 'token', 'coin', 'cryptocurrency', 'altcoin'
+]
+
+# Ключевые слова для множественных вариантов
+MULTIPLE_OUTCOME_KEYWORDS = [
+    'countries', 'candidates', 'teams', 'players', 'states', 'parties',
+    'options', 'choices', 'outcomes', 'results', 'alternatives',
+    'which', 'who', 'what', 'where', 'when', 'how many'
+]
+
+NON_BOOLEAN_NAME_PATTERNS = [
+    r'which\s+countries',  # Which countries
+    r'which\s+of\s+the',  # Which of the
+    r'which\s+candidate',  # Which candidate
+    r'which\s+team',       # Which team
+    r'which\s+player',     # Which player
+    r'which\s+state',      # Which state
+    r'which\s+party',      # Which party
+    r'who\s+will\s+win',   # Who will win
+    r'who\s+will\s+score', # Who will score
+    r'what\s+will\s+happen', # What will happen
+    r'how\s+many',         # How many
+    r'multiple\s+outcomes', # Multiple outcomes
+    r'select\s+all',       # Select all
+    r'choose\s+from',      # Choose from
+]
+
+BOOLEAN_NAME_PATTERNS = [
+    r'will\s+.*\s+before',  # Will X before Y
+    r'will\s+.*\s+by',      # Will X by Y
+    r'will\s+.*\s+in',      # Will X in Y
+    r'will\s+.*\s+on',      # Will X on Y
+    r'will\s+.*\s+after',   # Will X after Y
+    r'will\s+.*\s+until',   # Will X until Y
+    r'will\s+.*\s+by\s+the\s+end',  # Will X by the end
+    r'will\s+.*\s+resolve',  # Will X resolve
+    r'will\s+.*\s+end',     # Will X end
+    r'will\s+.*\s+start',   # Will X start
+    r'will\s+.*\s+begin',   # Will X begin
+    r'will\s+.*\s+stop',    # Will X stop
+    r'will\s+.*\s+continue', # Will X continue
+    r'will\s+.*\s+change',  # Will X change
+    r'will\s+.*\s+increase', # Will X increase
+    r'will\s+.*\s+decrease', # Will X decrease
+    r'will\s+.*\s+rise',    # Will X rise
+    r'will\s+.*\s+fall',    # Will X fall
+    r'will\s+.*\s+go\s+up', # Will X go up
+    r'will\s+.*\s+go\s+down', # Will X go down
+]
+
+# Тексты пачки склеиваются через перевод строки; в объединенных шаблонах \s не пересекает его,
+# а '.' без DOTALL и так не пересекает, поэтому совпадение не может захватить соседний текст.
+# Тексты, сами содержащие перевод строки, проверяются шаблонами по отдельности
+TEXT_SEPARATOR = '\n'
+
+
+class AhoCorasick:
+    """Автомат Ахо-Корасик: все вхождения набора ключевых слов за один проход по тексту"""
+
+    def __init__(self, keywords):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for keyword_id, keyword in enumerate(keywords):
+            state = 0
+            for char in keyword:
+                if char not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                    self.goto[state][char] = len(self.goto) - 1
+                state = self.goto[state][char]
+            self.output[state].append((keyword_id, len(keyword)))
+
+        queue = collections.deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+    def iter_matches(self, text):
+        """(id ключевого слова, позиция начала) для каждого вхождения"""
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for keyword_id, length in output[state]:
+                yield keyword_id, index - length + 1
+
+
+def compile_alternation(patterns):
+    """Одна регулярка из списка шаблонов, не пересекающая границу текстов пачки"""
+    bounded = [pattern.replace(r'\s', r'[^\S\n]') for pattern in patterns]
+    return re.compile('|'.join(f'(?:{pattern})' for pattern in bounded), re.IGNORECASE)
+
+
+class SlugClassifier:
+    def __init__(self):
+        # Один автомат на все списки: id слова -> (список, позиция в списке)
+        self.keyword_lists = {
+            'sports': SPORTS_KEYWORDS,
+            'crypto': CRYPTO_KEYWORDS,
+            'multiple': MULTIPLE_OUTCOME_KEYWORDS
+        }
+        self.keyword_index = []
+        keywords = []
+        for list_name, list_keywords in self.keyword_lists.items():
+            for position, keyword in enumerate(list_keywords):
+                self.keyword_index.append((list_name, position))
+                keywords.append(keyword)
+        self.automaton = AhoCorasick(keywords)
+
+        self.non_boolean_any = compile_alternation(NON_BOOLEAN_NAME_PATTERNS)
+        self.non_boolean_patterns = [re.compile(pattern, re.IGNORECASE) for pattern in NON_BOOLEAN_NAME_PATTERNS]
+        self.boolean_any = compile_alternation(BOOLEAN_NAME_PATTERNS)
+        self.boolean_patterns = [re.compile(pattern, re.IGNORECASE) for pattern in BOOLEAN_NAME_PATTERNS]
+
+    def classify_batch(self, texts):
+        """Классификация пачки slug/названий за один проход, порядок результатов - как у texts"""
+        lowered = [str(text).lower() for text in texts]
+        joined = TEXT_SEPARATOR.join(lowered)
+        offsets = []
+        position = 0
+        for text in lowered:
+            offsets.append(position)
+            position += len(text) + len(TEXT_SEPARATOR)
+
+        # Для каждого текста - первое по порядку списка слово каждого списка
+        first_keywords = [{} for _ in lowered]
+        for keyword_id, start in self.automaton.iter_matches(joined):
+            list_name, list_position = self.keyword_index[keyword_id]
+            found = first_keywords[bisect.bisect_right(offsets, start) - 1]
+            if list_position < found.get(list_name, len(self.keyword_lists[list_name])):
+                found[list_name] = list_position
+
+        multiline = {index for index, text in enumerate(lowered) if TEXT_SEPARATOR in text}
+        non_boolean_hits = multiline | {bisect.bisect_right(offsets, match.start()) - 1
+                                        for match in self.non_boolean_any.finditer(joined)}
+        boolean_hits = multiline | {bisect.bisect_right(offsets, match.start()) - 1
+                                    for match in self.boolean_any.finditer(joined)}
+
+        results = []
+        for index, text in enumerate(lowered):
+            found = first_keywords[index]
+            result = {
+                'category': None,
+                'category_keyword': None,
+                'multiple_keyword': None,
+                'non_boolean_pattern': None,
+                'boolean_pattern': None
+            }
+            for category in ('sports', 'crypto'):
+                if category in found:
+                    result['category'] = category
+                    result['category_keyword'] = self.keyword_lists[category][found[category]]
+                    break
+            if 'multiple' in found:
+                result['multiple_keyword'] = MULTIPLE_OUTCOME_KEYWORDS[found['multiple']]
+
+            # Объединенная регулярка лишь отсеивает; первый шаблон по порядку списка уточняем только при попадании
+            if index in non_boolean_hits:
+                result['non_boolean_pattern'] = next(
+                    (NON_BOOLEAN_NAME_PATTERNS[i] for i, pattern in enumerate(self.non_boolean_patterns)
+                     if pattern.search(text)), None)
+            if index in boolean_hits:
+                result['boolean_pattern'] = next(
+                    (BOOLEAN_NAME_PATTERNS[i] for i, pattern in enumerate(self.boolean_patterns)
+                     if pattern.search(text)), None)
+            results.append(result)
+        return results
+
+    def classify(self, text):
+        """Классификация одного slug/названия"""
+        return self.classify_batch([text])[0]
+
+
+_classifier = SlugClassifier()
+
+
+def get_slug_classifier():
+    """Получение общего классификатора (собирается один раз при импорте)"""
+    return _classifier
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Извлечение данных рынка из серверного HTML без браузера
+Страница события Polymarket уже содержит в __NEXT_DATA__ и meta-тегах название,
+цены исходов, объем и категорию; браузер нужен, только если этот путь не сработал
+"""
+
+import collections
+import html
+import json
+import logging
+import re
+import threading
+import time
+import httpx
+from config.config_loader import ConfigLoader
+from analysis.browser_profiles import USER_AGENT, POLYMARKET_EVENT_URL
+from analysis.extraction_planner import get_extraction_planner, is_useful_snapshot
+from analysis.rate_limiter import get_navigation_rate_limiter
+from monitoring.metrics_registry import get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+NEXT_DATA_PATTERN = re.compile(
+    r'<script[^>]*id="__NEXT_DATA__"[^>]*>(.*?)</script>', re.DOTALL | re.IGNORECASE
+)
+OG_TITLE_PATTERN = re.compile(
+    r'<meta[^>]*property="og:title"[^>]*content="([^"]*)"', re.IGNORECASE
+)
+ADDRESS_PATTERN = re.compile(r'^0x[a-fA-F0-9]{40}$')
+
+# Валидаторы и разобранные данные храним для ограниченного числа страниц
+MAX_CACHED_PAGES = 2000
+
+
+def find_event(node, slug):
+    """Поиск объекта события (с рынками) в дереве __NEXT_DATA__
+
+    На странице бывают и чужие события (связанные, рекомендованные), поэтому берем только
+    событие, у которого slug или slug одного из рынков совпадает с запрошенным; иначе None.
+    """
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, dict):
+            if isinstance(current.get('markets'), list) and current.get('title'):
+                if current.get('slug') == slug:
+                    return current
+                if any(isinstance(market, dict) and market.get('slug') == slug for market in current['markets']):
+                    return current
+            stack.extend(current.values())
+        elif isinstance(current, list):
+            stack.extend(current)
+    return None
+
+
+def parse_json_list(value):
+    """Поля outcomes/outcomePrices приходят строкой с JSON-массивом"""
+    if isinstance(value, list):
+        return value
+    try:
+        return json.loads(value or '[]')
+    except (TypeError, ValueError):
+        return []
+
+
+def format_volume(volume):
+    """Объем в том же формате, что и у извлечения из браузера"""
+    try:
+        volume_float = float(volume or 0)
+    except (TypeError, ValueError):
+        return 'New'
+    if volume_float <= 0:
+        return 'New'
+    if volume_float >= 1000:
+        return f"${volume_float:,.0f}"
+    return f"${volume_float:g}"
+
+
+def parse_event_html(page_html, slug):
+    """Разбор HTML страницы события в словарь DataExtractor.extract_market_data (None, если данных нет)"""
+    match = NEXT_DATA_PATTERN.search(page_html)
+    if not match:
+        return None
+    try:
+        next_data = json.loads(match.group(1))
+    except ValueError:
+        return None
+
+    event = find_event(next_data, slug)
+    if not event or not event['markets']:
+        return None
+
+    title_match = OG_TITLE_PATTERN.search(page_html)
+    data = {
+        'market_exists': True,
+        'is_boolean': True,
+        'yes_percentage': 0,
+        'volume': format_volume(event.get('volume')),
+        'contract_address': '',
+        'status': 'в работе',
+        'market_name': event.get('title') or (html.unescape(title_match.group(1)) if title_match else 'Unknown Market'),
+        'category': None
+    }
+
+    tags = event.get('tags') or []
+    if tags and isinstance(tags[0], dict):
+        data['category'] = tags[0].get('label')
+
+    market = event['markets'][0]
+    outcomes = [str(outcome).lower() for outcome in parse_json_list(market.get('outcomes'))]
+    if len(event['markets']) != 1 or outcomes != ['yes', 'no']:
+        data['is_boolean'] = False
+        data['status'] = 'closed'
+        return data
+
+    prices = parse_json_list(market.get('outcomePrices'))
+    try:
+        data['yes_percentage'] = round(float(prices[0]) * 100, 1)
+    except (IndexError, TypeError, ValueError):
+        return None
+
+    address = market.get('marketMakerAddress') or ''
+    if ADDRESS_PATTERN.match(address):
+        data['contract_address'] = address
+    return data
+
+
+class SsrExtractor:
+    def __init__(self, base_url=POLYMARKET_EVENT_URL):
+        self.base_url = base_url
+        self.config = ConfigLoader()
+        self.metrics = get_metrics_registry()
+        self.planner = get_extraction_planner()
+        self.rate_limiter = get_navigation_rate_limiter()
+        self.lock = threading.Lock()
+        self.cache = collections.OrderedDict()
+        # Один клиент на процесс: соединения к polymarket.com переиспользуются между рынками
+        self.client = httpx.Client(
+            headers={'User-Agent': USER_AGENT, 'Accept': 'text/html'},
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
+            follow_redirects=True
+        )
+
+    def _get_cached(self, url):
+        with self.lock:
+            entry = self.cache.get(url)
+            if entry:
+                self.cache.move_to_end(url)
+            return entry
+
+    def _store_cached(self, url, etag, last_modified, data):
+        with self.lock:
+            self.cache[url] = {'etag': etag, 'last_modified': last_modified, 'data': data}
+            self.cache.move_to_end(url)
+            if len(self.cache) > MAX_CACHED_PAGES:
+                self.cache.popitem(last=False)
+
+    def fetch_market_data(self, slug, timeout=15):
+        """Условный GET страницы события и разбор; None, если данных нет или запрос не удался"""
+        url = f"{self.base_url}{slug}"
+        cached = self._get_cached(url)
+        headers = {}
+        if cached and cached['etag']:
+            headers['If-None-Match'] = cached['etag']
+        if cached and cached['last_modified']:
+            headers['If-Modified-Since'] = cached['last_modified']
+
+        try:
+            self.rate_limiter.acquire()
+            response = self.client.get(url, headers=headers, timeout=timeout)
+        except httpx.HTTPError as e:
+            logger.warning(f"⚠️ SSR: не удалось загрузить {url}: {e}")
+            self.metrics.inc('ssr.errors')
+            return None
+
+        if response.status_code == 304 and cached:
+            self.metrics.inc('ssr.not_modified')
+            logger.info(f"♻️ SSR: страница {slug} не изменилась (304)")
+            return dict(cached['data'])
+
+        if response.status_code != 200:
+            logger.warning(f"⚠️ SSR: {url} вернул статус {response.status_code}")
+            self.metrics.inc('ssr.errors')
+            return None
+
+        if self.rate_limiter.report_page(response.text):
+            logger.warning(f"⚠️ SSR: Security Checkpoint для рынка {slug}")
+            return None
+
+        data = parse_event_html(response.text, slug)
+        if data is None:
+            self.metrics.inc('ssr.parse_failures')
+            logger.info(f"ℹ️ SSR: в HTML рынка {slug} нет данных события")
+            return None
+
+        self.metrics.inc('ssr.fetched')
+        self.metrics.inc('ssr.bytes', len(response.content))
+        self._store_cached(url, response.headers.get('etag'), response.headers.get('last-modified'), data)
+        return dict(data)
+
+    def try_extract(self, slug, deadline=None):
+        """Снимок рынка без браузера; None - нужен браузер"""
+        if not self.config.get_ssr_extractor_enabled():
+            return None
+        timeout = deadline.stage_budget('navigation') if deadline else 15
+        started = time.monotonic()
+        data = self.fetch_market_data(slug, timeout)
+        latency = time.monotonic() - started
+        success = is_useful_snapshot(data)
+        self.planner.record(slug, 'ssr_html', success, latency)
+        if success:
+            self.planner.record_choice(slug, 'ssr_html', 'page_ocr', latency)
+            logger.info(f"✅ Рынок {slug} проанализирован по серверному HTML без браузера")
+            return data
+        return None
+
+    def close(self):
+        """Закрытие пула соединений"""
+        self.client.close()
+
+
+_extractor = None
+_extractor_lock = threading.Lock()
+
+
+def get_ssr_extractor():
+    """Получение общего SSR-экстрактора"""
+    global _extractor
+    with _extractor_lock:
+        if _extractor is None:
+            _extractor = SsrExtractor()
+        return _extractor
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Общий дисковый кэш неизменяемых статических ресурсов Polymarket (JS/CSS/шрифты/картинки)
+Подключается к странице или контексту через route(); безопасен между потоками и процессами
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import struct
+import tempfile
+import threading
+from config.config_loader import ConfigLoader
+from monitoring.metrics_registry import get_metrics_registry
+from analysis.browser_runtime import get_browser_runtime
+
+logger = logging.getLogger(__name__)
+
+# Через Python пропускаем только запросы статики, остальное идет напрямую
+STATIC_URL_PATTERN = re.compile(r'\.(?:js|mjs|css|woff2?|ttf|otf|png|jpe?g|gif|svg|webp|ico)(?:\?|$)', re.IGNORECASE)
+
+STATIC_RESOURCE_TYPES = {'script', 'stylesheet', 'font', 'image'}
+
+# Заголовки, которые нельзя отдавать повторно вместе с уже распакованным телом
+SKIPPED_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'set-cookie'}
+
+MIN_IMMUTABLE_MAX_AGE = 86400
+
+
+def is_immutable_response(headers):
+    """Ресурс можно кэшировать надолго: immutable или max-age не меньше суток"""
+    cache_control = headers.get('cache-control', '').lower()
+    if 'no-store' in cache_control or 'private' in cache_control:
+        return False
+    if 'immutable' in cache_control:
+        return True
+    match = re.search(r'max-age=(\d+)', cache_control)
+    return bool(match) and int(match.group(1)) >= MIN_IMMUTABLE_MAX_AGE
+
+
+class StaticAssetCache:
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.metrics = get_metrics_registry()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.size_bytes = self._scan_size()
+
+    def _path_for(self, url):
+        digest = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], digest)
+
+    def _scan_size(self):
+        total = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    continue
+        return total
+
+    def lookup(self, url):
+        """Поиск ресурса в кэше, возвращает (status, headers, body) или None"""
+        path = self._path_for(url)
+        try:
+            with open(path, 'rb') as f:
+                meta_length = struct.unpack('>I', f.read(4))[0]
+                meta = json.loads(f.read(meta_length).decode('utf-8'))
+                body = f.read()
+            # Обновляем mtime - по нему работает вытеснение LRU
+            os.utime(path)
+        except (OSError, ValueError, struct.error):
+            return None
+        return meta['status'], meta['headers'], body
+
+    def store(self, url, status, headers, body):
+        """Сохранение ресурса: пишем во временный файл и атомарно переименовываем"""
+        path = self._path_for(url)
+        clean_headers = {k: v for k, v in headers.items() if k.lower() not in SKIPPED_HEADERS}
+        meta = json.dumps({'url': url, 'status': status, 'headers': clean_headers}).encode('utf-8')
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(struct.pack('>I', len(meta)))
+                f.write(meta)
+                f.write(body)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.debug(f"Не удалось сохранить {url} в кэш статики: {e}")
+            return
+
+        with self.lock:
+            self.size_bytes += 4 + len(meta) + len(body)
+            over_limit = self.size_bytes > self.max_bytes
+        if over_limit:
+            self._evict()
+
+    def _evict(self):
+        """Вытеснение самых давно использованных файлов до 90% лимита"""
+        with self.lock:
+            entries = []
+            for root, _, files in os.walk(self.cache_dir):
+                for name in files:
+                    if name.endswith('.tmp'):
+                        continue
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            target = self.max_bytes * 0.9
+            evicted = 0
+            for _, size, path in sorted(entries):
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                    evicted += 1
+                except OSError:
+                    continue
+            self.size_bytes = total
+
+        self.metrics.inc('static_cache.evictions', evicted)
+        self.metrics.set_gauge('static_cache.size_bytes', total)
+        logger.info(f"🧹 Кэш статики: вытеснено {evicted} файлов, размер {total / (1024 * 1024):.1f} МБ")
+
+    def _record_hit(self, body):
+        with self.lock:
+            self.hits += 1
+            hit_rate = self.hits / (self.hits + self.misses)
+        self.metrics.inc('static_cache.hits')
+        self.metrics.inc('static_cache.bytes_saved', len(body))
+        self.metrics.set_gauge('static_cache.hit_rate', round(hit_rate, 3))
+
+    def _record_miss(self):
+        with self.lock:
+            self.misses += 1
+            hit_rate = self.hits / (self.hits + self.misses)
+        self.metrics.inc('static_cache.misses')
+        self.metrics.set_gauge('static_cache.hit_rate', round(hit_rate, 3))
+
+    async def handle_route_async(self, route, request):
+        """Обработчик route() для асинхронного Playwright; файлы кэша читаются и пишутся в пуле io"""
+        if request.method != 'GET' or request.resource_type not in STATIC_RESOURCE_TYPES:
+            await route.continue_()
+            return
+
+        runtime = get_browser_runtime()
+        cached = await runtime.run_blocking('io', self.lookup, request.url)
+        if cached:
+            status, headers, body = cached
+            self._record_hit(body)
+            await route.fulfill(status=status, headers=headers, body=body)
+            return
+
+        self._record_miss()
+        try:
+            response = await route.fetch()
+        except Exception as e:
+            # Сетевая ошибка или контекст закрывается: запрос нельзя оставлять без ответа
+            logger.debug(f"Не удалось загрузить {request.url} для кэша статики: {e}")
+            await self._release_route_async(route)
+            return
+        if response.ok and is_immutable_response(response.headers):
+            await runtime.run_blocking(
+                'io', self.store, request.url, response.status, response.headers, await response.body()
+            )
+        await route.fulfill(response=response)
+
+    async def _release_route_async(self, route):
+        """Отпускаем запрос в сеть как есть, а если страница уже закрывается - отменяем"""
+        try:
+            await route.continue_()
+        except Exception:
+            try:
+                await route.abort()
+            except Exception:
+                pass
+
+    async def attach_async(self, target):
+        """Подключение кэша к странице или контексту (асинхронный API)"""
+        await target.route(STATIC_URL_PATTERN, self.handle_route_async)
+
+    def get_stats(self):
+        """Статистика кэша"""
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0,
+                'bytes_saved': self.metrics.get_counter('static_cache.bytes_saved'),
+                'size_bytes': self.size_bytes
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_static_asset_cache():
+    """Получение общего кэша статики (None, если кэш выключен)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            config = ConfigLoader()
+            if not config.get_static_cache_enabled():
+                return None
+            _cache = StaticAssetCache(
+                config.get_static_cache_dir(),
+                config.get_static_cache_max_mb() * 1024 * 1024
+            )
+            logger.info(f"✅ Кэш статики: {config.get_static_cache_dir()} ({_cache.size_bytes / (1024 * 1024):.1f} МБ)")
+        return _cache
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Пул прогретых контекстов браузера для первого снимка новых рынков
+Каждый контекст уже открыл polymarket.com: DNS/TLS установлены, статические бандлы в кэше
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from playwright.async_api import async_playwright
+from analysis.browser_profiles import get_browser_profile, USER_AGENT
+from analysis.browser_runtime import get_browser_runtime
+from analysis.rate_limiter import get_navigation_rate_limiter
+from analysis.static_asset_cache import get_static_asset_cache
+from config.config_loader import ConfigLoader
+from monitoring.metrics_registry import get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+POLYMARKET_ORIGIN = 'https://polymarket.com/'
+
+
+class WarmContext:
+    def __init__(self, context, page):
+        self.context = context
+        self.page = page
+        self.created_at = time.monotonic()
+        self.uses = 0
+
+
+class WarmContextPool:
+    def __init__(self):
+        self.config = ConfigLoader()
+        self.min_size = self.config.get_warm_pool_min_size()
+        self.max_size = max(self.config.get_warm_pool_max_size(), self.min_size)
+        self.max_uses = self.config.get_warm_pool_max_uses()
+        self.max_age_seconds = self.config.get_warm_pool_max_age_minutes() * 60
+        self.profile = get_browser_profile()
+        self.rate_limiter = get_navigation_rate_limiter()
+        self.static_cache = get_static_asset_cache()
+        self.runtime = get_browser_runtime()
+        self.metrics = get_metrics_registry()
+
+        # Состояние ниже меняется только из цикла рантайма
+        self.playwright = None
+        self.browser = None
+        self.idle = []
+        self.creating = 0
+        self.refill_event = None
+        self.refill_task = None
+        self.running = False
+
+    def is_enabled(self):
+        """Пул включен, если задан минимальный размер"""
+        return self.min_size > 0
+
+    def start(self):
+        """Синхронный запуск пула в фоне"""
+        if not self.is_enabled():
+            return
+        self.runtime.submit(self._start())
+
+    def stop(self):
+        """Синхронная остановка пула"""
+        if not self.running:
+            return
+        try:
+            self.runtime.run(self._stop(), timeout=30)
+        except Exception as e:
+            logger.error(f"❌ Ошибка остановки пула прогретых контекстов: {e}")
+
+    async def _start(self):
+        if self.running:
+            return
+        self.running = True
+        self.refill_event = asyncio.Event()
+        self.refill_task = asyncio.ensure_future(self._refill_loop())
+        logger.info(f"🔥 Пул прогретых контекстов запущен (минимум {self.min_size})")
+
+    async def _stop(self):
+        self.running = False
+        if self.refill_task:
+            self.refill_task.cancel()
+        while self.idle:
+            await self._close(self.idle.pop())
+        try:
+            if self.browser:
+                await self.browser.close()
+            if self.playwright:
+                await self.playwright.stop()
+        except Exception as e:
+            logger.error(f"Ошибка закрытия браузера пула: {e}")
+        self.browser = None
+        self.playwright = None
+        logger.info("🛑 Пул прогретых контекстов остановлен")
+
+    async def _ensure_browser(self):
+        """Запуск браузера пула при первом использовании или после падения"""
+        if self.browser and self.browser.is_connected():
+            return
+        if not self.playwright:
+            self.playwright = await async_playwright().start()
+        self.browser = await self.playwright.chromium.launch(**self.profile.get_launch_options())
+        logger.info("✅ Браузер пула прогретых контекстов запущен")
+
+    async def _create_context(self, warm_up=True):
+        """Создание контекста; при warm_up открываем главную Polymarket"""
+        await self._ensure_browser()
+        context = await self.browser.new_context(
+            user_agent=USER_AGENT,
+            **self.profile.get_page_options()
+        )
+        if self.static_cache:
+            # Кэш общий для всех контекстов пула и остальных браузеров процесса
+            await self.static_cache.attach_async(context)
+        page = await context.new_page()
+        if warm_up:
+            started = time.monotonic()
+            try:
+                await self.rate_limiter.acquire_async()
+                # load, а не domcontentloaded: ждем статические бандлы, чтобы они попали в кэш контекста
+                await page.goto(POLYMARKET_ORIGIN, wait_until='load', timeout=60000)
+                self.metrics.observe('warm_pool.warm_up_seconds', time.monotonic() - started)
+            except Exception as e:
+                logger.warning(f"⚠️ Не удалось прогреть контекст: {e}")
+        return WarmContext(context, page)
+
+    async def _close(self, warm):
+        try:
+            await warm.context.close()
+        except Exception as e:
+            logger.debug(f"Ошибка закрытия контекста: {e}")
+
+    async def _refill_loop(self):
+        """Фоновое пополнение пула до минимального размера"""
+        while self.running:
+            try:
+                while self.running and len(self.idle) + self.creating < self.min_size:
+                    self.creating += 1
+                    try:
+                        warm = await self._create_context()
+                        self.idle.append(warm)
+                    finally:
+                        self.creating -= 1
+                self.metrics.set_gauge('warm_pool.idle', len(self.idle))
+                self.refill_event.clear()
+                await asyncio.wait_for(self.refill_event.wait(), timeout=60)
+            except asyncio.TimeoutError:
+                self._drop_expired()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"❌ Ошибка пополнения пула прогретых контекстов: {e}")
+                await asyncio.sleep(10)
+
+    def _drop_expired(self):
+        """Удаление слишком старых контекстов, чтобы пул не держал протухшие сессии"""
+        now = time.monotonic()
+        for warm in [w for w in self.idle if now - w.created_at > self.max_age_seconds]:
+            self.idle.remove(warm)
+            asyncio.ensure_future(self._close(warm))
+
+    async def acquire(self):
+        """Получение контекста: прогретого сразу или холодного, если пул пуст"""
+        if not self.running:
+            await self._start()
+
+        if self.idle:
+            warm = self.idle.pop()
+            self.metrics.inc('warm_pool.warm_acquires')
+        else:
+            logger.warning("⚠️ Пул прогретых контекстов пуст, создаем холодный контекст")
+            self.metrics.inc('warm_pool.cold_acquires')
+            warm = await self._create_context(warm_up=False)
+
+        warm.uses += 1
+        self.metrics.set_gauge('warm_pool.idle', len(self.idle))
+        self.refill_event.set()
+        return warm
+
+    async def release(self, warm, healthy=True):
+        """Возврат контекста в пул (кэш контекста остается прогретым)"""
+        if (self.running and healthy and warm.uses < self.max_uses and
+                len(self.idle) < self.max_size):
+            self.idle.append(warm)
+        else:
+            await self._close(warm)
+            self.refill_event.set()
+        self.metrics.set_gauge('warm_pool.idle', len(self.idle))
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_warm_context_pool():
+    """Получение общего пула прогретых контекстов"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = WarmContextPool()
+        return _pool
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Микробенчмарк скомпилированных правил BooleanMarketValidator против прежних re.search с '.*'
+Использование: python benchmark_boolean_rules.py <папка с сохраненными текстами *.txt> [--repeat N]
+
+Первая строка файла считается названием рынка. Перед замером проверяется, что этап и причина
+решения движка совпадают с прежним алгоритмом на каждом тексте.
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from analysis.boolean_rule_engine import (
+    get_boolean_rule_engine, NON_BOOLEAN_RULES, MULTIPLE_RULES, BOOLEAN_BUTTON_RULES, BOOLEAN_INDICATOR_RULES
+)
+from analysis.slug_classifier import MULTIPLE_OUTCOME_KEYWORDS
+
+
+def evaluate_legacy(text_lower, name_lower):
+    """Прежний порядок проверок validate_market_boolean: re.search по каждому исходному шаблону"""
+    for pattern, _ in NON_BOOLEAN_RULES:
+        if re.search(pattern, text_lower, re.IGNORECASE):
+            return 'non_boolean', pattern
+    for keyword in MULTIPLE_OUTCOME_KEYWORDS:
+        if keyword in name_lower:
+            return 'name', keyword
+    for stage, rules in (('multiple', MULTIPLE_RULES), ('boolean_button', BOOLEAN_BUTTON_RULES),
+                         ('boolean_indicator', BOOLEAN_INDICATOR_RULES)):
+        for pattern, _ in rules:
+            if re.search(pattern, text_lower, re.IGNORECASE):
+                return stage, pattern
+    return None, None
+
+
+def measure(func, repeat):
+    """Лучшее время из repeat прогонов"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Микробенчмарк правил булевости рынка')
+    parser.add_argument('directory', help='папка с сохраненными текстами страниц (OCR или DOM) *.txt')
+    parser.add_argument('--repeat', type=int, default=5, help='число прогонов, берется лучший')
+    args = parser.parse_args()
+
+    cases = []
+    for name in sorted(os.listdir(args.directory)):
+        if name.endswith('.txt'):
+            with open(os.path.join(args.directory, name), encoding='utf-8') as text_file:
+                text = text_file.read()
+            cases.append((name, text.lower(), text.split('\n', 1)[0].lower()))
+    if not cases:
+        print("Нет сохраненных текстов")
+        return 1
+
+    engine = get_boolean_rule_engine()
+    mismatches = 0
+    for name, text_lower, name_lower in cases:
+        new, old = engine.evaluate(text_lower, name_lower), evaluate_legacy(text_lower, name_lower)
+        if new != old:
+            mismatches += 1
+            if mismatches <= 10:
+                print(f"⚠️ {name}: движок {new}, прежний алгоритм {old}")
+    if mismatches:
+        print(f"Расхождений: {mismatches}/{len(cases)}")
+        return 1
+
+    legacy_seconds = measure(lambda: [evaluate_legacy(text, title) for _, text, title in cases], args.repeat)
+    engine_seconds = measure(lambda: [engine.evaluate(text, title) for _, text, title in cases], args.repeat)
+
+    total_kb = sum(len(text) for _, text, _ in cases) / 1024
+    print(f"Текстов: {len(cases)} ({total_kb:.0f} КБ), решения совпадают с прежним алгоритмом")
+    for name, seconds in (('прежний алгоритм', legacy_seconds), ('движок правил', engine_seconds)):
+        print(f"  {name:<18} {seconds * 1000:8.1f} мс  {total_kb / seconds:10.0f} КБ/с  "
+              f"x{legacy_seconds / seconds:.2f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Микробенчмарк однопроходного сканера текста страницы против прежних re.findall по каждому шаблону
+Использование: python benchmark_page_text_scanner.py <папка с сохраненными текстами *.txt> [--repeat N]
+
+Перед замером проверяется, что поля сканера совпадают с прежним алгоритмом на каждом тексте.
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from analysis.page_text_scanner import (
+    get_page_text_scanner, TITLE_PATTERNS, BOOLEAN_INDICATORS, YES_PATTERNS, VOLUME_PATTERNS, CONTRACT_PATTERNS
+)
+
+
+def scan_legacy(page_text):
+    """Прежний алгоритм SyncMarketAnalyzer.extract_market_data: отдельный проход на каждый шаблон"""
+    result = {
+        'market_name': None,
+        'boolean_indicator': None,
+        'yes_percentage': 0,
+        'volume': 'New',
+        'contract_address': ''
+    }
+
+    for pattern in TITLE_PATTERNS:
+        match = re.search(pattern, page_text, re.IGNORECASE)
+        if match:
+            title = match.group(0).strip()
+            if len(title) > 10:
+                result['market_name'] = title
+                break
+
+    for pattern in BOOLEAN_INDICATORS:
+        if re.search(pattern, page_text, re.IGNORECASE):
+            result['boolean_indicator'] = pattern
+            break
+
+    for pattern in YES_PATTERNS:
+        matches = re.findall(pattern, page_text, re.IGNORECASE)
+        if matches:
+            try:
+                value = float(matches[0])
+                if 0 <= value <= 100:
+                    result['yes_percentage'] = value
+                    break
+            except ValueError:
+                continue
+
+    for pattern in VOLUME_PATTERNS:
+        matches = re.findall(pattern, page_text, re.IGNORECASE)
+        if matches:
+            volume = matches[0].replace(',', '')
+            try:
+                volume_float = float(volume)
+                if volume_float > 0:
+                    result['volume'] = f"${volume_float:,.0f}" if volume_float >= 1000 else f"${volume}"
+                break
+            except ValueError:
+                continue
+
+    for pattern in CONTRACT_PATTERNS:
+        matches = re.findall(pattern, page_text, re.IGNORECASE)
+        if matches:
+            contract = matches[0]
+            if len(contract) == 42 and contract.startswith('0x'):
+                result['contract_address'] = contract
+                break
+
+    return result
+
+
+def measure(func, repeat):
+    """Лучшее время из repeat прогонов"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Микробенчмарк сканера текста страницы')
+    parser.add_argument('directory', help='папка с сохраненными текстами страниц (OCR или DOM) *.txt')
+    parser.add_argument('--repeat', type=int, default=5, help='число прогонов, берется лучший')
+    args = parser.parse_args()
+
+    texts = []
+    for name in sorted(os.listdir(args.directory)):
+        if name.endswith('.txt'):
+            with open(os.path.join(args.directory, name), encoding='utf-8') as text_file:
+                texts.append((name, text_file.read()))
+    if not texts:
+        print("Нет сохраненных текстов")
+        return 1
+
+    scanner = get_page_text_scanner()
+    mismatches = 0
+    for name, text in texts:
+        new, old = scanner.scan(text), scan_legacy(text)
+        if new != old:
+            mismatches += 1
+            if mismatches <= 10:
+                print(f"⚠️ {name}: сканер {new}, прежний алгоритм {old}")
+    if mismatches:
+        print(f"Расхождений: {mismatches}/{len(texts)}")
+        return 1
+
+    legacy_seconds = measure(lambda: [scan_legacy(text) for _, text in texts], args.repeat)
+    scanner_seconds = measure(lambda: [scanner.scan(text) for _, text in texts], args.repeat)
+
+    total_kb = sum(len(text) for _, text in texts) / 1024
+    print(f"Текстов: {len(texts)} ({total_kb:.0f} КБ), поля совпадают с прежним алгоритмом")
+    for name, seconds in (('прежний алгоритм', legacy_seconds), ('сканер', scanner_seconds)):
+        print(f"  {name:<18} {seconds * 1000:8.1f} мс  {total_kb / seconds:10.0f} КБ/с  "
+              f"x{legacy_seconds / seconds:.2f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Микробенчмарк классификатора slug: пакетный автомат против прежних построчных проверок
+Использование: python benchmark_slug_classifier.py [файл со slug по одному в строке] [--repeat N]
+
+Без файла slug читаются из таблицы markets. Перед замером проверяется,
+что решения и причины классификатора совпадают с прежним алгоритмом на каждом slug.
+"""
+
+import argparse
+import re
+import sys
+import time
+from analysis.slug_classifier import (
+    get_slug_classifier, SPORTS_KEYWORDS, CRYPTO_KEYWORDS, MULTIPLE_OUTCOME_KEYWORDS,
+    NON_BOOLEAN_NAME_PATTERNS, BOOLEAN_NAME_PATTERNS
+)
+
+
+def classify_legacy(slug):
+    """Прежний алгоритм CategoryFilter и MarketBooleanPrechecker: перебор слов и re.search по каждому шаблону"""
+    slug_lower = slug.lower()
+    result = {
+        'category': None,
+        'category_keyword': None,
+        'multiple_keyword': None,
+        'non_boolean_pattern': None,
+        'boolean_pattern': None
+    }
+    for category, keywords in (('sports', SPORTS_KEYWORDS), ('crypto', CRYPTO_KEYWORDS)):
+        keyword = next((keyword for keyword in keywords if keyword in slug_lower), None)
+        if keyword:
+            result['category'] = category
+            result['category_keyword'] = keyword
+            break
+    result['multiple_keyword'] = next((keyword for keyword in MULTIPLE_OUTCOME_KEYWORDS if keyword in slug_lower), None)
+    result['non_boolean_pattern'] = next(
+        (pattern for pattern in NON_BOOLEAN_NAME_PATTERNS if re.search(pattern, slug_lower, re.IGNORECASE)), None)
+    result['boolean_pattern'] = next(
+        (pattern for pattern in BOOLEAN_NAME_PATTERNS if re.search(pattern, slug_lower, re.IGNORECASE)), None)
+    return result
+
+
+def load_slugs_from_db():
+    """Все slug из таблицы markets"""
+    from database.database_connection import DatabaseConnection
+    conn = DatabaseConnection().get_connection()
+    if not conn:
+        return []
+    cursor = conn.cursor()
+    cursor.execute("SELECT slug FROM markets WHERE slug IS NOT NULL")
+    slugs = [row[0] for row in cursor.fetchall()]
+    cursor.close()
+    conn.commit()
+    return slugs
+
+
+def measure(func, repeat):
+    """Лучшее время из repeat прогонов"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Микробенчмарк классификатора slug')
+    parser.add_argument('slugs_file', nargs='?', help='файл со slug (по умолчанию - таблица markets)')
+    parser.add_argument('--repeat', type=int, default=5, help='число прогонов, берется лучший')
+    args = parser.parse_args()
+
+    if args.slugs_file:
+        with open(args.slugs_file, encoding='utf-8') as slugs_file:
+            slugs = [line.strip() for line in slugs_file if line.strip()]
+    else:
+        slugs = load_slugs_from_db()
+    if not slugs:
+        print("Нет slug для замера")
+        return 1
+
+    classifier = get_slug_classifier()
+    batch = classifier.classify_batch(slugs)
+    mismatches = [(slug, new, old) for slug, new in zip(slugs, batch)
+                  for old in [classify_legacy(slug)] if new != old]
+    for slug, new, old in mismatches[:10]:
+        print(f"⚠️ {slug}: классификатор {new}, прежний алгоритм {old}")
+    if mismatches:
+        print(f"Расхождений: {len(mismatches)}/{len(slugs)}")
+        return 1
+
+    legacy_seconds = measure(lambda: [classify_legacy(slug) for slug in slugs], args.repeat)
+    single_seconds = measure(lambda: [classifier.classify(slug) for slug in slugs], args.repeat)
+    batch_seconds = measure(lambda: classifier.classify_batch(slugs), args.repeat)
+
+    print(f"Slug: {len(slugs)}, решения совпадают с прежним алгоритмом")
+    for name, seconds in (('прежний алгоритм', legacy_seconds),
+                          ('классификатор по одному', single_seconds),
+                          ('классификатор пачкой', batch_seconds)):
+        print(f"  {name:<24} {seconds * 1000:8.1f} мс  {len(slugs) / seconds:10.0f} slug/с  "
+              f"x{legacy_seconds / seconds:.2f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Проверка SSR-экстрактора на сохраненных страницах событий, отдаваемых локальным HTTP-сервером
+Использование: python check_ssr_extractor.py <папка с <slug>.html> [slug ...]
+
+Каждая страница запрашивается дважды: второй запрос должен вернуть 304 и те же данные.
+"""
+
+import argparse
+import functools
+import http.server
+import os
+import sys
+import threading
+from analysis.ssr_extractor import SsrExtractor
+
+
+class SavedPageHandler(http.server.SimpleHTTPRequestHandler):
+    """Отдает /event/<slug> из файла <slug>.html (If-Modified-Since поддерживается базовым классом)"""
+
+    def translate_path(self, path):
+        slug = path.split('?')[0].rstrip('/').split('/')[-1]
+        return os.path.join(self.directory, f"{slug}.html")
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Проверка SSR-экстрактора на сохраненном HTML')
+    parser.add_argument('directory', help='папка с сохраненными страницами <slug>.html')
+    parser.add_argument('slugs', nargs='*', help='рынки (по умолчанию - все файлы папки)')
+    args = parser.parse_args()
+
+    slugs = args.slugs or sorted(name[:-5] for name in os.listdir(args.directory) if name.endswith('.html'))
+    if not slugs:
+        print("Нет сохраненных страниц")
+        return 1
+
+    handler = functools.partial(SavedPageHandler, directory=os.path.abspath(args.directory))
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    extractor = SsrExtractor(base_url=f"http://127.0.0.1:{server.server_port}/event/")
+    failed = 0
+    try:
+        for slug in slugs:
+            first = extractor.fetch_market_data(slug)
+            second = extractor.fetch_market_data(slug)
+            print(f"{slug}: {first}")
+            if first is None:
+                failed += 1
+            elif first != second:
+                print(f"  ⚠️ повторный (условный) запрос вернул другие данные: {second}")
+                failed += 1
+        not_modified = extractor.metrics.get_counter('ssr.not_modified')
+        print(f"\nРазобрано: {len(slugs) - failed}/{len(slugs)}, ответов 304: {not_modified:g}")
+    finally:
+        extractor.close()
+        server.shutdown()
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -42,6 +42,84 @@ class ConfigLoader:
         # MKRT Analytic config
         self.mkrt_analytic_time_min = int(os.getenv('MKRT_ANALYTIC_TIME_MIN', '60'))
         self.mkrt_analytic_ping_min = int(os.getenv('MKRT_ANALYTIC_PING_MIN', '5'))
+        # Границы адаптивного интервала опроса рынка (базовый - MKRT_ANALYTIC_PING_MIN)
+        self.ping_interval_min_seconds = int(os.getenv('PING_INTERVAL_MIN_SECONDS', '60'))
+        self.ping_interval_max_seconds = int(os.getenv('PING_INTERVAL_MAX_SECONDS', '900'))
+        
+        # New markets intake config (LISTEN/NOTIFY на вставки в markets + страховочный опрос)
+        self.new_markets_listen_enabled = os.getenv('NEW_MARKETS_LISTEN_ENABLED', 'false').lower() == 'true'
+        self.new_markets_safety_poll_seconds = int(os.getenv('NEW_MARKETS_SAFETY_POLL_SECONDS', '300'))
+        # Размер страницы чтения markets по водяному знаку (created_at, id)
+        self.markets_ingest_batch_size = int(os.getenv('MARKETS_INGEST_BATCH_SIZE', '100'))
+        # Параллельный допуск рынков одной пачки (каждый поток - свой браузер проверки категории)
+        self.intake_workers = int(os.getenv('INTAKE_WORKERS', '4'))
+        # Индекс известных slug: exact - множество, bloom - фильтр Блума (проверка в БД при возможном совпадении), off
+        self.seen_slug_index_mode = os.getenv('SEEN_SLUG_INDEX_MODE', 'exact').lower()
+        self.seen_slug_bloom_capacity = int(os.getenv('SEEN_SLUG_BLOOM_CAPACITY', '200000'))
+        # Кэш решений по slug (предпроверка, категория, булевость): LRU в памяти + таблица в БД
+        self.decision_cache_enabled = os.getenv('DECISION_CACHE_ENABLED', 'true').lower() == 'true'
+        self.decision_cache_ttl_hours = float(os.getenv('DECISION_CACHE_TTL_HOURS', '24'))
+        self.decision_cache_max_entries = int(os.getenv('DECISION_CACHE_MAX_ENTRIES', '50000'))
+        
+        # Concurrency config
+        self.max_concurrent_analyses = int(os.getenv('MAX_CONCURRENT_ANALYSES', '3'))
+        
+        # Market scheduler config (гарантированный минимум снимков за окно анализа рынка)
+        self.min_samples_per_window = int(os.getenv('MIN_SAMPLES_PER_WINDOW', '5'))
+        # Воркеры, занятые только первыми снимками новых рынков (из общего числа воркеров)
+        self.first_snapshot_reserved_workers = int(os.getenv('FIRST_SNAPSHOT_RESERVED_WORKERS', '1'))
+        # Случайный сдвиг каждого цикла опроса (доля интервала)
+        self.schedule_jitter_fraction = float(os.getenv('SCHEDULE_JITTER_FRACTION', '0.1'))
+        
+        # Worker shards config (0 - весь анализ в текущем процессе)
+        self.worker_shards = int(os.getenv('WORKER_SHARDS', '0'))
+        self.shard_worker_threads = int(os.getenv('SHARD_WORKER_THREADS', '2'))
+        
+        # Runtime executors (OCR - CPU, psycopg2/httpx - ожидание сети)
+        self.ocr_workers = int(os.getenv('OCR_WORKERS', str(os.cpu_count() or 2)))
+        self.io_workers = int(os.getenv('IO_WORKERS', '8'))
+        
+        # Analysis deadline config (бюджет одного цикла анализа в секундах)
+        self.analysis_deadline_seconds = float(os.getenv('ANALYSIS_DEADLINE_SECONDS', '120'))
+        self.category_check_deadline_seconds = float(os.getenv('CATEGORY_CHECK_DEADLINE_SECONDS', '45'))
+        
+        # SSR extractor config (разбор серверного HTML без браузера)
+        self.ssr_extractor_enabled = os.getenv('SSR_EXTRACTOR_ENABLED', 'true').lower() == 'true'
+        
+        # Scrape pipeline config
+        self.pipeline_enabled = os.getenv('SCRAPE_PIPELINE_ENABLED', 'false').lower() == 'true'
+        self.pipeline_queue_size = int(os.getenv('PIPELINE_QUEUE_SIZE', '8'))
+        self.pipeline_capture_workers = int(os.getenv('PIPELINE_CAPTURE_WORKERS', '2'))
+        self.pipeline_extract_workers = int(os.getenv('PIPELINE_EXTRACT_WORKERS', '2'))
+        self.pipeline_persist_workers = int(os.getenv('PIPELINE_PERSIST_WORKERS', '1'))
+        
+        # Browser config
+        self.browser_profile = os.getenv('BROWSER_PROFILE', 'default')
+        
+        # Warm context pool config (0 - пул выключен)
+        self.warm_pool_min_size = int(os.getenv('WARM_POOL_MIN_SIZE', '1'))
+        self.warm_pool_max_size = int(os.getenv('WARM_POOL_MAX_SIZE', '2'))
+        self.warm_pool_max_uses = int(os.getenv('WARM_POOL_MAX_USES', '20'))
+        self.warm_pool_max_age_minutes = int(os.getenv('WARM_POOL_MAX_AGE_MINUTES', '30'))
+        
+        # Static asset cache config
+        self.static_cache_enabled = os.getenv('STATIC_CACHE_ENABLED', 'true').lower() == 'true'
+        self.static_cache_dir = os.getenv('STATIC_CACHE_DIR', '.cache/static_assets')
+        self.static_cache_max_mb = int(os.getenv('STATIC_CACHE_MAX_MB', '200'))
+        
+        # Navigation rate limit config (навигаций в секунду на polymarket.com)
+        self.rate_limit_config = {
+            'initial_rate': float(os.getenv('NAV_RATE_INITIAL', '0.5')),
+            'min_rate': float(os.getenv('NAV_RATE_MIN', '0.05')),
+            'max_rate': float(os.getenv('NAV_RATE_MAX', '2.0')),
+            'burst': int(os.getenv('NAV_RATE_BURST', '3')),
+            'increase_step': float(os.getenv('NAV_RATE_INCREASE_STEP', '0.01')),
+            'decrease_step': float(os.getenv('NAV_RATE_DECREASE_STEP', '0.05')),
+            'decrease_factor': float(os.getenv('NAV_RATE_DECREASE_FACTOR', '0.5')),
+            'checkpoint_threshold': float(os.getenv('NAV_CHECKPOINT_THRESHOLD', '0.1')),
+            'checkpoint_alpha': float(os.getenv('NAV_CHECKPOINT_ALPHA', '0.2')),
+            'decrease_cooldown_seconds': float(os.getenv('NAV_RATE_DECREASE_COOLDOWN_SECONDS', '30'))
+        }
     
     def get_database_config(self):
         """Получение конфигурации базы данных"""
@@ -77,4 +155,149 @@ class ConfigLoader:
     
     def get_mkrt_analytic_ping_min(self):
         """Получение интервала пинга для анализа рынка в минутах"""
-        return self.mkrt_analytic_ping_min 
\ No newline at end of file
+        return self.mkrt_analytic_ping_min 
+    
+    def get_browser_profile(self):
+        """Получение имени профиля браузера (default/dense)"""
+        return self.browser_profile
+    
+    def get_rate_limit_config(self):
+        """Получение конфигурации ограничителя навигаций"""
+        return self.rate_limit_config
+    
+    def get_warm_pool_min_size(self):
+        """Получение минимального размера пула прогретых контекстов"""
+        return self.warm_pool_min_size
+    
+    def get_warm_pool_max_size(self):
+        """Получение максимального размера пула прогретых контекстов"""
+        return self.warm_pool_max_size
+    
+    def get_warm_pool_max_uses(self):
+        """Получение максимального числа использований одного контекста"""
+        return self.warm_pool_max_uses
+    
+    def get_warm_pool_max_age_minutes(self):
+        """Получение максимального возраста прогретого контекста в минутах"""
+        return self.warm_pool_max_age_minutes
+    
+    def get_static_cache_enabled(self):
+        """Включен ли дисковый кэш статики"""
+        return self.static_cache_enabled
+    
+    def get_static_cache_dir(self):
+        """Получение каталога дискового кэша статики"""
+        return self.static_cache_dir
+    
+    def get_static_cache_max_mb(self):
+        """Получение лимита размера кэша статики в мегабайтах"""
+        return self.static_cache_max_mb
+    
+    def get_max_concurrent_analyses(self):
+        """Получение лимита одновременных анализов в процессе"""
+        return self.max_concurrent_analyses
+    
+    def get_worker_shards(self):
+        """Получение количества процессов-шардов"""
+        return self.worker_shards
+    
+    def get_shard_worker_threads(self):
+        """Получение количества потоков анализа в одном шарде"""
+        return self.shard_worker_threads
+    
+    def get_pipeline_enabled(self):
+        """Включен ли конвейер анализа"""
+        return self.pipeline_enabled
+    
+    def get_pipeline_queue_size(self):
+        """Получение размера очередей между стадиями конвейера"""
+        return self.pipeline_queue_size
+    
+    def get_pipeline_capture_workers(self):
+        """Получение числа воркеров стадии захвата"""
+        return self.pipeline_capture_workers
+    
+    def get_pipeline_extract_workers(self):
+        """Получение числа воркеров стадии OCR/извлечения"""
+        return self.pipeline_extract_workers
+    
+    def get_pipeline_persist_workers(self):
+        """Получение числа воркеров стадии записи в БД"""
+        return self.pipeline_persist_workers
+
+    
+    def get_analysis_deadline_seconds(self):
+        """Получение бюджета одного цикла анализа рынка"""
+        return self.analysis_deadline_seconds
+    
+    def get_category_check_deadline_seconds(self):
+        """Получение бюджета проверки категории рынка"""
+        return self.category_check_deadline_seconds
+    
+    def get_ssr_extractor_enabled(self):
+        """Получение флага извлечения данных из серверного HTML"""
+        return self.ssr_extractor_enabled
+    
+    def get_ocr_workers(self):
+        """Получение числа потоков для OCR"""
+        return self.ocr_workers
+    
+    def get_io_workers(self):
+        """Получение числа потоков для блокирующего ввода-вывода (БД, HTTP)"""
+        return self.io_workers
+    
+    def get_min_samples_per_window(self):
+        """Получение минимального числа снимков рынка за окно анализа"""
+        return self.min_samples_per_window
+    
+    def get_first_snapshot_reserved_workers(self):
+        """Получение числа воркеров, зарезервированных под первые снимки"""
+        return self.first_snapshot_reserved_workers
+    
+    def get_ping_interval_min_seconds(self):
+        """Получение нижней границы интервала опроса рынка"""
+        return self.ping_interval_min_seconds
+    
+    def get_ping_interval_max_seconds(self):
+        """Получение верхней границы интервала опроса рынка"""
+        return self.ping_interval_max_seconds
+    
+    def get_schedule_jitter_fraction(self):
+        """Получение доли интервала для случайного сдвига циклов опроса"""
+        return self.schedule_jitter_fraction
+    
+    def get_new_markets_listen_enabled(self):
+        """Получение флага приема новых рынков через LISTEN/NOTIFY"""
+        return self.new_markets_listen_enabled
+    
+    def get_new_markets_safety_poll_seconds(self):
+        """Получение интервала страховочного опроса markets при активной подписке"""
+        return self.new_markets_safety_poll_seconds
+    
+    def get_markets_ingest_batch_size(self):
+        """Получение размера страницы чтения новых рынков"""
+        return self.markets_ingest_batch_size
+    
+    def get_seen_slug_index_mode(self):
+        """Получение режима индекса известных рынков"""
+        return self.seen_slug_index_mode
+    
+    def get_seen_slug_bloom_capacity(self):
+        """Получение расчетной емкости фильтра Блума известных рынков"""
+        return self.seen_slug_bloom_capacity
+    
+    def get_intake_workers(self):
+        """Получение числа потоков приема новых рынков"""
+        return self.intake_workers
+    
+    def get_decision_cache_enabled(self):
+        """Получение флага кэша решений по slug"""
+        return self.decision_cache_enabled
+    
+    def get_decision_cache_ttl_hours(self):
+        """Получение срока жизни решения в кэше (часы)"""
+        return self.decision_cache_ttl_hours
+    
+    def get_decision_cache_max_entries(self):
+        """Получение максимального числа решений в памяти"""
+        return self.decision_cache_max_entries
\ No newline at end of file
@@ -1,5 +1,11 @@
 import logging
 from telegram.telegram_connector import TelegramConnector
+from analysis.warm_context_pool import get_warm_context_pool
+from sharding.shard_coordinator import get_shard_coordinator
+from analysis.scrape_pipeline import get_scrape_pipeline
+from analysis.ssr_extractor import get_ssr_extractor
+from analysis.browser_runtime import get_browser_runtime
+from active_markets.market_scheduler import get_market_scheduler
 
 logger = logging.getLogger(__name__)
 
@@ -14,10 +20,23 @@ class BotShutdown:
         self.bot.running = False
         self.telegram.log_bot_stop()
         
-        # Закрываем браузер
+        # Останавливаем планировщик снимков, затем закрываем браузер
+        get_market_scheduler().stop()
         if hasattr(self.bot, 'market_analyzer'):
             self.bot.market_analyzer.close_driver()
         
+        # Закрываем пул прогретых контекстов и шарды
+        get_warm_context_pool().stop()
+        shard_coordinator = get_shard_coordinator()
+        if shard_coordinator:
+            shard_coordinator.stop()
+        pipeline = get_scrape_pipeline()
+        if pipeline:
+            pipeline.stop()
+        get_ssr_extractor().close()
+        # Цикл рантайма останавливаем последним: пул и браузер закрываются через него
+        get_browser_runtime().stop()
+        
         # Закрываем соединения с БД
         if hasattr(self.bot, 'db_manager'):
             self.bot.db_manager.close_connections()
@@ -3,6 +3,8 @@ from datetime import datetime
 from telegram.telegram_connector import TelegramConnector
 from restoration.stuck_markets_restorer import StuckMarketsRestorer
 from planning.task_scheduler import TaskScheduler
+from analysis.warm_context_pool import get_warm_context_pool
+from sharding.shard_coordinator import get_shard_coordinator
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +21,13 @@ class BotStartup:
         self.telegram.log_bot_start()
         self.bot.running = True
         
+        # Запускаем шарды или прогреваем контексты браузера в текущем процессе
+        shard_coordinator = get_shard_coordinator()
+        if shard_coordinator:
+            shard_coordinator.start()
+        else:
+            get_warm_context_pool().start()
+        
         # Восстанавливаем зависшие рынки при запуске
         self.restorer.restore_stuck_markets()
         
@@ -1,6 +1,7 @@
 import logging
 from datetime import datetime, timezone
 from database.database_connection import DatabaseConnection
+from analysis.deadline import DeadlineExceeded
 
 logger = logging.getLogger(__name__)
 
@@ -8,8 +9,9 @@ class AnalyticUpdater:
     def __init__(self):
         self.db_connection = DatabaseConnection()
     
-    def update_market_analysis(self, market_id, analysis_data):
-        """Обновление данных анализа рынка"""
+    def update_market_analysis(self, market_id, analysis_data, deadline=None):
+        """Обновление данных анализа рынка (с дедлайном цикла - в пределах его остатка)"""
+        conn = None
         try:
             logger.info(f"🔄 Обновление анализа для рынка ID: {market_id}")
             
@@ -19,6 +21,9 @@ class AnalyticUpdater:
                 return False
             
             cursor = conn.cursor()
+            if deadline:
+                # statement_timeout действует только до конца текущей транзакции
+                cursor.execute("SET LOCAL statement_timeout = %s", (deadline.stage_timeout_ms('db_write'),))
             current_time = datetime.now(timezone.utc)
             
             # Подготавливаем данные для обновления
@@ -65,6 +70,11 @@ class AnalyticUpdater:
                 cursor.close()
                 return False
                 
+        except DeadlineExceeded as e:
+            logger.error(f"⏰ Запись анализа рынка ID: {market_id} пропущена: {e}")
+            if conn:
+                conn.rollback()
+            return False
         except Exception as e:
             logger.error(f"❌ Ошибка обновления анализа рынка: {e}")
             if conn:
@@ -1,6 +1,7 @@
 import logging
 from datetime import datetime, timezone
 from database.database_connection import DatabaseConnection
+from database.seen_slug_index import get_seen_slug_index
 
 logger = logging.getLogger(__name__)
 
@@ -66,6 +67,7 @@ class AnalyticWriter:
                 market_id = result[0]
                 conn.commit()
                 cursor.close()
+                get_seen_slug_index().add(market_data['slug'])
                 logger.info(f"✅ Рынок {market_data['slug']} успешно вставлен/обновлен! ID: {market_id}")
                 return market_id
             else:
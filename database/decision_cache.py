@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Кэш решений по slug: предварительная проверка, категория и булевость рынка
+Решения лежат в памяти (LRU со сроком жизни) и в таблице mkrt_analytic_decision_cache,
+общей для всех экземпляров бота. Ключ - (вид решения, slug, версия правил): версия -
+хеш исходного кода модулей с правилами, так что после их изменения старые решения
+перестают находиться сами собой и вычищаются по сроку жизни.
+"""
+
+import hashlib
+import inspect
+import json
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from config.config_loader import ConfigLoader
+from database.database_connection import DatabaseConnection
+from monitoring.metrics_registry import get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+# Сколько решений записываем в БД одним запросом
+WRITE_BATCH_SIZE = 200
+
+
+def rules_version(*modules):
+    """Версия правил: короткий хеш исходного кода модулей, от которых зависит решение"""
+    digest = hashlib.sha1()
+    for module in modules:
+        try:
+            source = inspect.getsource(module)
+        except (OSError, TypeError):
+            # Исходник недоступен - хешируем константы модуля (шаблоны и списки слов)
+            source = repr(sorted((name, repr(value)) for name, value in vars(module).items() if name.isupper()))
+        digest.update(module.__name__.encode('utf-8'))
+        digest.update(source.encode('utf-8'))
+    return digest.hexdigest()[:12]
+
+
+class DecisionCache:
+    """Решения по slug в памяти и в БД; запись в БД - в фоновом потоке пачками"""
+
+    def __init__(self, enabled=True, ttl_seconds=86400, max_entries=50000):
+        self.enabled = enabled
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.db_connection = DatabaseConnection()
+        self.metrics = get_metrics_registry()
+        self.lock = threading.Lock()
+        # (вид, slug, версия) -> (решение, время истечения по time.monotonic)
+        self.entries = OrderedDict()
+        self.table_ready = False
+        self.pending = queue.Queue()
+        self.writer = None
+
+    def ensure_table(self, conn):
+        """Создание таблицы решений, если ее нет"""
+        if self.table_ready:
+            return
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS mkrt_analytic_decision_cache (
+                slug TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                rules_version TEXT NOT NULL,
+                decision TEXT NOT NULL,
+                decided_at TIMESTAMPTZ NOT NULL,
+                PRIMARY KEY (slug, kind, rules_version)
+            )
+        """)
+        conn.commit()
+        cursor.close()
+        self.table_ready = True
+
+    def load(self):
+        """Предзагрузка свежих решений из БД и удаление просроченных"""
+        if not self.enabled:
+            return False
+
+        conn = None
+        try:
+            conn = self.db_connection.get_connection()
+            if not conn:
+                return False
+
+            self.ensure_table(conn)
+            expires_before = datetime.now(timezone.utc) - timedelta(seconds=self.ttl_seconds)
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM mkrt_analytic_decision_cache WHERE decided_at < %s", (expires_before,))
+            cursor.execute("""
+                SELECT kind, slug, rules_version, decision, decided_at
+                FROM mkrt_analytic_decision_cache
+                ORDER BY decided_at DESC
+                LIMIT %s
+            """, (self.max_entries,))
+            rows = cursor.fetchall()
+            cursor.close()
+            conn.commit()
+
+            now_wall, now = datetime.now(timezone.utc), time.monotonic()
+            with self.lock:
+                # Старые решения первыми, чтобы свежие оказались в конце LRU
+                for kind, slug, version, decision, decided_at in reversed(rows):
+                    if decided_at.tzinfo is None:
+                        decided_at = decided_at.replace(tzinfo=timezone.utc)
+                    left = self.ttl_seconds - (now_wall - decided_at).total_seconds()
+                    self.entries[(kind, slug, version)] = (json.loads(decision), now + left)
+            logger.info(f"✅ Кэш решений загружен: {len(rows)} решений")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Ошибка загрузки кэша решений: {e}")
+            if conn:
+                conn.rollback()
+            return False
+
+    def get(self, kind, slug, version):
+        """Сохраненное решение (копия) или None"""
+        if not self.enabled or not slug:
+            return None
+
+        key = (kind, slug, version)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[1] <= time.monotonic():
+                del self.entries[key]
+                entry = None
+            if entry is not None:
+                self.entries.move_to_end(key)
+
+        if entry is None:
+            self.metrics.inc('decision_cache.misses')
+            return None
+        self.metrics.inc('decision_cache.hits')
+        return dict(entry[0])
+
+    def has(self, kind, slug, version):
+        """Есть ли непросроченное решение (без учета в метриках и порядке LRU)"""
+        if not self.enabled or not slug:
+            return False
+        with self.lock:
+            entry = self.entries.get((kind, slug, version))
+            return entry is not None and entry[1] > time.monotonic()
+
+    def put(self, kind, slug, version, decision):
+        """Запоминание окончательного решения; в БД оно уйдет фоновой записью"""
+        if not self.enabled or not slug:
+            return
+
+        with self.lock:
+            self.entries[(kind, slug, version)] = (dict(decision), time.monotonic() + self.ttl_seconds)
+            self.entries.move_to_end((kind, slug, version))
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            if self.writer is None:
+                self.writer = threading.Thread(target=self.write_loop, name='decision-cache-writer', daemon=True)
+                self.writer.start()
+        self.pending.put((slug, kind, version, json.dumps(decision, ensure_ascii=False), datetime.now(timezone.utc)))
+
+    def write_loop(self):
+        """Фоновая запись решений в БД пачками"""
+        while True:
+            rows = [self.pending.get()]
+            while len(rows) < WRITE_BATCH_SIZE:
+                try:
+                    rows.append(self.pending.get_nowait())
+                except queue.Empty:
+                    break
+            self.save(rows)
+
+    def save(self, rows):
+        """Пакетная запись решений в БД"""
+        conn = None
+        try:
+            conn = self.db_connection.get_connection()
+            if not conn:
+                return False
+
+            self.ensure_table(conn)
+            cursor = conn.cursor()
+            cursor.executemany("""
+                INSERT INTO mkrt_analytic_decision_cache (slug, kind, rules_version, decision, decided_at)
+                VALUES (%s, %s, %s, %s, %s)
+                ON CONFLICT (slug, kind, rules_version) DO UPDATE SET
+                decision = EXCLUDED.decision,
+                decided_at = EXCLUDED.decided_at
+            """, rows)
+            conn.commit()
+            cursor.close()
+            return True
+        except Exception as e:
+            logger.error(f"❌ Ошибка записи кэша решений ({len(rows)} решений): {e}")
+            if conn:
+                conn.rollback()
+            return False
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_decision_cache():
+    """Получение общего кэша решений (загружается из БД при первом обращении)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            config = ConfigLoader()
+            _cache = DecisionCache(
+                config.get_decision_cache_enabled(),
+                config.get_decision_cache_ttl_hours() * 3600,
+                config.get_decision_cache_max_entries()
+            )
+            _cache.load()
+        return _cache
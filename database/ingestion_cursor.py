@@ -0,0 +1,82 @@
+import logging
+from datetime import datetime, timezone
+from database.database_connection import DatabaseConnection
+
+logger = logging.getLogger(__name__)
+
+class IngestionCursor:
+    """Водяной знак (created_at, id) последнего прочитанного рынка, переживает перезапуски"""
+
+    def __init__(self, name):
+        self.name = name
+        self.db_connection = DatabaseConnection()
+        self.table_ready = False
+
+    def ensure_table(self, conn):
+        """Создание таблицы курсоров, если ее нет"""
+        if self.table_ready:
+            return
+        cursor = conn.cursor()
+        # id храним текстом: в запрос он уходит нетипизированным литералом и приводится к типу markets.id
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS mkrt_analytic_ingestion_cursor (
+                name TEXT PRIMARY KEY,
+                created_at TIMESTAMPTZ NOT NULL,
+                market_id TEXT NOT NULL,
+                updated_at TIMESTAMPTZ NOT NULL
+            )
+        """)
+        conn.commit()
+        cursor.close()
+        self.table_ready = True
+
+    def load(self):
+        """Чтение водяного знака: (created_at, market_id) или None"""
+        conn = None
+        try:
+            conn = self.db_connection.get_connection()
+            if not conn:
+                return None
+
+            self.ensure_table(conn)
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT created_at, market_id
+                FROM mkrt_analytic_ingestion_cursor
+                WHERE name = %s
+            """, (self.name,))
+            result = cursor.fetchone()
+            cursor.close()
+            return (result[0], result[1]) if result else None
+        except Exception as e:
+            logger.error(f"❌ Ошибка чтения курсора приема {self.name}: {e}")
+            if conn:
+                conn.rollback()
+            return None
+
+    def save(self, created_at, market_id):
+        """Сохранение водяного знака"""
+        conn = None
+        try:
+            conn = self.db_connection.get_connection()
+            if not conn:
+                return False
+
+            self.ensure_table(conn)
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO mkrt_analytic_ingestion_cursor (name, created_at, market_id, updated_at)
+                VALUES (%s, %s, %s, %s)
+                ON CONFLICT (name) DO UPDATE SET
+                created_at = EXCLUDED.created_at,
+                market_id = EXCLUDED.market_id,
+                updated_at = EXCLUDED.updated_at
+            """, (self.name, created_at, str(market_id), datetime.now(timezone.utc)))
+            conn.commit()
+            cursor.close()
+            return True
+        except Exception as e:
+            logger.error(f"❌ Ошибка сохранения курсора приема {self.name}: {e}")
+            if conn:
+                conn.rollback()
+            return False
@@ -0,0 +1,114 @@
+import psycopg2
+import psycopg2.extensions
+import logging
+import select
+import time
+from config.config_loader import ConfigLoader
+from monitoring.metrics_registry import get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+NEW_MARKETS_CHANNEL = 'mkrt_analytic_new_markets'
+
+TRIGGER_NAME = 'mkrt_analytic_notify_new_market'
+
+# В уведомлении только id: полезная нагрузка pg_notify ограничена 8000 байт,
+# а ошибка в триггере сорвала бы вставку в markets
+TRIGGER_FUNCTION_SQL = f"""
+    CREATE OR REPLACE FUNCTION {TRIGGER_NAME}() RETURNS trigger AS $$
+    BEGIN
+        PERFORM pg_notify('{NEW_MARKETS_CHANNEL}', NEW.id::text);
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+"""
+
+TRIGGER_SQL = f"""
+    CREATE TRIGGER {TRIGGER_NAME}
+    AFTER INSERT ON markets
+    FOR EACH ROW EXECUTE PROCEDURE {TRIGGER_NAME}()
+"""
+
+# Пауза между попытками переподключения выделенного соединения
+RECONNECT_DELAY_SECONDS = 30
+
+class MarketsListener:
+    def __init__(self):
+        self.config = ConfigLoader()
+        self.metrics = get_metrics_registry()
+        self.conn = None
+        self.last_connect_attempt = 0
+
+    def connect(self):
+        """Выделенное соединение: установка триггера и LISTEN"""
+        self.last_connect_attempt = time.monotonic()
+        try:
+            db_config = self.config.get_database_config()
+            db_config['sslmode'] = 'require'
+
+            conn = psycopg2.connect(**db_config)
+            conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+            cursor = conn.cursor()
+            self.install_trigger(cursor)
+            cursor.execute(f"LISTEN {NEW_MARKETS_CHANNEL}")
+            cursor.close()
+
+            self.conn = conn
+            logger.info(f"✅ Подписка на новые рынки (LISTEN {NEW_MARKETS_CHANNEL}) установлена")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Не удалось подписаться на новые рынки: {e}")
+            self.metrics.inc('intake.listen_errors')
+            return False
+
+    def install_trigger(self, cursor):
+        """Триггер на вставку в markets (создается, только если его еще нет)"""
+        cursor.execute(TRIGGER_FUNCTION_SQL)
+        cursor.execute("""
+            SELECT 1 FROM pg_trigger
+            WHERE tgname = %s AND tgrelid = 'markets'::regclass
+        """, (TRIGGER_NAME,))
+        if cursor.fetchone() is None:
+            cursor.execute(TRIGGER_SQL)
+            logger.info(f"✅ Триггер {TRIGGER_NAME} на markets установлен")
+
+    def is_connected(self):
+        """Проверка, что подписка активна"""
+        return self.conn is not None and not self.conn.closed
+
+    def wait(self, timeout):
+        """Ожидание уведомлений до timeout секунд, возвращает id новых рынков (без повторов)"""
+        if not self.is_connected():
+            if time.monotonic() - self.last_connect_attempt < RECONNECT_DELAY_SECONDS or not self.connect():
+                time.sleep(timeout)
+                return []
+
+        try:
+            readable, _, _ = select.select([self.conn], [], [], timeout)
+            if not readable:
+                return []
+
+            self.conn.poll()
+            market_ids = []
+            while self.conn.notifies:
+                notify = self.conn.notifies.pop(0)
+                if notify.payload and notify.payload not in market_ids:
+                    market_ids.append(notify.payload)
+
+            self.metrics.inc('intake.notifications', len(market_ids))
+            return market_ids
+        except Exception as e:
+            logger.error(f"❌ Ошибка чтения уведомлений о новых рынках: {e}")
+            self.metrics.inc('intake.listen_errors')
+            self.close()
+            return []
+
+    def close(self):
+        """Закрытие выделенного соединения"""
+        try:
+            if self.conn:
+                self.conn.close()
+        except Exception as e:
+            logger.error(f"Error closing listener connection: {e}")
+        finally:
+            self.conn = None
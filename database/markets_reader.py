@@ -51,4 +51,95 @@ class MarketsReader:
             return markets
         except Exception as e:
             logger.error(f"Error getting new markets after time: {e}")
-            return [] 
\ No newline at end of file
+            return [] 
+    
+    def ensure_keyset_index(self):
+        """Индекс markets(created_at, id) под чтение по водяному знаку, если его нет"""
+        # Отдельное короткое соединение: общее соединение чтения остается в транзакционном режиме
+        db_connection = DatabaseConnection()
+        try:
+            if not db_connection.connect():
+                return False
+            
+            # CONCURRENTLY не блокирует вставки в markets, но работает только вне транзакции
+            db_connection.conn.autocommit = True
+            cursor = db_connection.conn.cursor()
+            cursor.execute("""
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS markets_created_at_id_idx
+                ON markets (created_at, id)
+            """)
+            cursor.close()
+            return True
+        except Exception as e:
+            logger.error(f"Error creating markets keyset index: {e}")
+            return False
+        finally:
+            db_connection.close_connections()
+    
+    def get_markets_after_watermark(self, created_at, market_id, limit):
+        """Страница рынков строго после водяного знака (created_at, id) в порядке возрастания"""
+        conn = None
+        try:
+            conn = self.db_connection.get_connection()
+            if not conn:
+                return []
+            
+            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            if market_id is None:
+                # Начальный знак - только время (граница окна анализа)
+                cursor.execute("""
+                    SELECT id, question, slug, created_at
+                    FROM markets
+                    WHERE created_at >= %s
+                    ORDER BY created_at, id
+                    LIMIT %s
+                """, (created_at, limit))
+            else:
+                cursor.execute("""
+                    SELECT id, question, slug, created_at
+                    FROM markets
+                    WHERE (created_at, id) > (%s, %s)
+                    ORDER BY created_at, id
+                    LIMIT %s
+                """, (created_at, market_id, limit))
+            
+            markets = cursor.fetchall()
+            cursor.close()
+            return markets
+        except Exception as e:
+            logger.error(f"Error getting markets after watermark: {e}")
+            if conn:
+                conn.rollback()
+            return []
+    
+    def get_markets_by_ids(self, market_ids):
+        """Получение рынков по id (из уведомлений о вставке)"""
+        try:
+            # id из уведомлений приходят текстом; сравниваем с id без приведения столбца, чтобы работал индекс
+            ids = []
+            for market_id in market_ids:
+                try:
+                    ids.append(int(market_id))
+                except (TypeError, ValueError):
+                    logger.warning(f"⚠️ Некорректный id рынка в уведомлении: {market_id}")
+            if not ids:
+                return []
+            
+            conn = self.db_connection.get_connection()
+            if not conn:
+                return []
+            
+            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            cursor.execute("""
+                SELECT id, question, slug, created_at
+                FROM markets
+                WHERE id = ANY(%s)
+                ORDER BY created_at DESC
+            """, (ids,))
+            
+            markets = cursor.fetchall()
+            cursor.close()
+            return markets
+        except Exception as e:
+            logger.error(f"Error getting markets by ids: {e}")
+            return []
\ No newline at end of file
@@ -0,0 +1,160 @@
+import hashlib
+import logging
+import math
+import threading
+from config.config_loader import ConfigLoader
+from database.database_connection import DatabaseConnection
+from monitoring.metrics_registry import get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+# Доля ложных срабатываний фильтра Блума
+BLOOM_ERROR_RATE = 0.001
+
+class BloomFilter:
+    """Фильтр Блума по slug: «точно нет» или «возможно есть»"""
+
+    def __init__(self, capacity, error_rate=BLOOM_ERROR_RATE):
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value):
+        # Двойное хеширование: k позиций из двух половин одного дайджеста
+        digest = hashlib.blake2b(value.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def might_contain(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class SeenSlugIndex:
+    """Slug рынков, уже записанных в mkrt_analytic, без запроса к БД на каждый рынок каждого опроса"""
+
+    def __init__(self, mode='exact', bloom_capacity=200000):
+        self.mode = mode
+        self.bloom_capacity = bloom_capacity
+        self.db_connection = DatabaseConnection()
+        self.metrics = get_metrics_registry()
+        self.lock = threading.Lock()
+        self.slugs = set()
+        self.bloom = None
+        self.loaded = False
+
+    def load(self):
+        """Предзагрузка slug из mkrt_analytic"""
+        if self.mode == 'off':
+            return False
+
+        conn = None
+        try:
+            conn = self.db_connection.get_connection()
+            if not conn:
+                return False
+
+            cursor = conn.cursor()
+            cursor.execute("SELECT slug FROM mkrt_analytic WHERE slug IS NOT NULL")
+            rows = cursor.fetchall()
+            cursor.close()
+            conn.commit()
+
+            with self.lock:
+                if self.mode == 'bloom':
+                    self.bloom = BloomFilter(max(self.bloom_capacity, len(rows) * 2))
+                    for (slug,) in rows:
+                        self.bloom.add(slug)
+                else:
+                    self.slugs = {slug for (slug,) in rows}
+                self.loaded = True
+            logger.info(f"✅ Индекс известных рынков загружен ({self.mode}): {len(rows)} slug")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Ошибка загрузки индекса известных рынков: {e}")
+            if conn:
+                conn.rollback()
+            return False
+
+    def add(self, slug):
+        """Учет нового рынка в mkrt_analytic"""
+        with self.lock:
+            if not self.loaded:
+                return
+            if self.bloom is not None:
+                self.bloom.add(slug)
+            else:
+                self.slugs.add(slug)
+
+    def find_existing(self, slugs):
+        """Какие из slug уже есть в mkrt_analytic; БД спрашиваем одним запросом и только о неокончательных ответах"""
+        slugs = list(dict.fromkeys(slugs))
+        if not slugs:
+            return set()
+
+        known = set()
+        with self.lock:
+            loaded = self.loaded
+            exact = loaded and self.bloom is None
+            if exact:
+                # Совпадение точного индекса окончательное, а промах - нет: рынок мог записать
+                # другой процесс (add_market_by_slug.py, второй экземпляр бота) уже после загрузки
+                known = {slug for slug in slugs if slug in self.slugs}
+                candidates = [slug for slug in slugs if slug not in known]
+            elif loaded:
+                candidates = [slug for slug in slugs if self.bloom.might_contain(slug)]
+            else:
+                candidates = slugs
+
+        self.metrics.inc('seen_index.lookups', len(slugs))
+        if not candidates:
+            return known
+        self.metrics.inc('seen_index.db_confirmations', len(candidates))
+        existing = self.query_existing(candidates)
+        if exact:
+            # Записанные другими процессами запоминаем, чтобы больше о них не спрашивать
+            for slug in existing:
+                self.add(slug)
+        elif loaded:
+            self.metrics.inc('seen_index.false_positives', len(candidates) - len(existing))
+        return known | existing
+
+    def query_existing(self, slugs):
+        """Пакетная проверка slug в mkrt_analytic"""
+        conn = None
+        try:
+            conn = self.db_connection.get_connection()
+            if not conn:
+                return set()
+
+            cursor = conn.cursor()
+            cursor.execute("SELECT slug FROM mkrt_analytic WHERE slug = ANY(%s)", (list(slugs),))
+            existing = {row[0] for row in cursor.fetchall()}
+            cursor.close()
+            conn.commit()
+            return existing
+        except Exception as e:
+            logger.error(f"Error checking markets existence: {e}")
+            if conn:
+                conn.rollback()
+            return set()
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_seen_slug_index():
+    """Получение общего индекса известных рынков (загружается при первом обращении)"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            config = ConfigLoader()
+            _index = SeenSlugIndex(config.get_seen_slug_index_mode(), config.get_seen_slug_bloom_capacity())
+            _index.load()
+        return _index
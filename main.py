@@ -4,6 +4,7 @@ import logging
 from core.bot_startup import BotStartup
 from core.bot_shutdown import BotShutdown
 from planning.task_scheduler import TaskScheduler
+from active_markets.active_market_registry import ActiveMarketRegistry
 
 # Импортируем настройку логирования
 import logging_config
@@ -13,7 +14,8 @@ logger = logging.getLogger(__name__)
 class MarketAnalysisBot:
     def __init__(self):
         self.running = False
-        self.active_markets = {}
+        # Рынки в анализе: общий потокобезопасный реестр
+        self.active_markets = ActiveMarketRegistry()
         
         # Инициализируем модули
         self.startup = BotStartup(self)
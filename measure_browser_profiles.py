@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Скрипт для замера памяти на вкладку и времени навигации для профилей браузера
+Использование: python measure_browser_profiles.py [--tabs N] [--profile NAME] <slug> [slug ...]
+"""
+
+import argparse
+import os
+import sys
+import time
+from playwright.sync_api import sync_playwright
+from analysis.browser_profiles import BROWSER_PROFILES, USER_AGENT, POLYMARKET_EVENT_URL
+
+
+def get_chromium_pids():
+    """PID всех процессов Chromium (только Linux)"""
+    pids = set()
+    if not os.path.isdir('/proc'):
+        return pids
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/cmdline', 'rb') as f:
+                cmdline = f.read()
+            if b'chrom' in cmdline:
+                pids.add(int(entry))
+        except OSError:
+            continue
+    return pids
+
+
+def get_rss_mb(pids):
+    """Суммарный RSS процессов в мегабайтах"""
+    total_kb = 0
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total_kb += int(line.split()[1])
+                        break
+        except OSError:
+            continue
+    return total_kb / 1024
+
+
+def measure_profile(playwright, profile, slugs, tabs):
+    """Замер одного профиля: открываем вкладки и собираем метрики"""
+    pids_before = get_chromium_pids()
+    browser = playwright.chromium.launch(**profile.get_launch_options())
+    pages = []
+    nav_times = []
+    heap_sizes = []
+    try:
+        for i in range(tabs):
+            slug = slugs[i % len(slugs)]
+            page = browser.new_page(**profile.get_page_options())
+            page.set_extra_http_headers({'User-Agent': USER_AGENT})
+            pages.append(page)
+
+            started = time.monotonic()
+            try:
+                page.goto(f"{POLYMARKET_EVENT_URL}{slug}", wait_until='domcontentloaded', timeout=60000)
+            except Exception as e:
+                print(f"  ⚠️ Вкладка {i + 1}: ошибка загрузки {slug}: {e}")
+                continue
+            nav_times.append(time.monotonic() - started)
+
+        # Даем странице догрузиться, как в анализаторах
+        time.sleep(3)
+
+        for page in pages:
+            try:
+                session = page.context.new_cdp_session(page)
+                session.send('Performance.enable')
+                metrics = {m['name']: m['value'] for m in session.send('Performance.getMetrics')['metrics']}
+                heap_sizes.append(metrics.get('JSHeapUsedSize', 0) / (1024 * 1024))
+                session.detach()
+            except Exception as e:
+                print(f"  ⚠️ Не удалось получить метрики вкладки: {e}")
+
+        rss_mb = get_rss_mb(get_chromium_pids() - pids_before)
+    finally:
+        browser.close()
+
+    return {
+        'tabs': len(pages),
+        'rss_mb': rss_mb,
+        'rss_per_tab_mb': rss_mb / len(pages) if pages else 0,
+        'heap_per_tab_mb': sum(heap_sizes) / len(heap_sizes) if heap_sizes else 0,
+        'nav_avg_s': sum(nav_times) / len(nav_times) if nav_times else 0,
+        'nav_max_s': max(nav_times) if nav_times else 0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Замер памяти и времени навигации для профилей браузера')
+    parser.add_argument('slugs', nargs='+', help='Slug рынков для открытия во вкладках')
+    parser.add_argument('--tabs', type=int, default=3, help='Количество вкладок на профиль')
+    parser.add_argument('--profile', action='append', help='Профиль для замера (по умолчанию все)')
+    args = parser.parse_args()
+
+    profile_names = args.profile or list(BROWSER_PROFILES.keys())
+    unknown = [name for name in profile_names if name not in BROWSER_PROFILES]
+    if unknown:
+        print(f"❌ Неизвестные профили: {', '.join(unknown)}")
+        sys.exit(1)
+
+    results = {}
+    with sync_playwright() as playwright:
+        for name in profile_names:
+            print(f"🔍 Замер профиля '{name}' ({args.tabs} вкладок)...")
+            results[name] = measure_profile(playwright, BROWSER_PROFILES[name], args.slugs, args.tabs)
+
+    print()
+    print(f"{'профиль':<10} {'вкладок':>7} {'RSS МБ':>9} {'RSS/вкл':>9} {'JS heap/вкл':>12} {'нав. ср. с':>11} {'нав. макс. с':>13}")
+    for name, r in results.items():
+        print(f"{name:<10} {r['tabs']:>7} {r['rss_mb']:>9.1f} {r['rss_per_tab_mb']:>9.1f} "
+              f"{r['heap_per_tab_mb']:>12.1f} {r['nav_avg_s']:>11.2f} {r['nav_max_s']:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# Monitoring module initialization
\ No newline at end of file
@@ -0,0 +1,97 @@
+import bisect
+import threading
+
+# Границы корзин гистограмм по умолчанию (секунды)
+DEFAULT_BUCKETS = [0.01, 0.05, 0.1, 0.5, 1, 2, 5, 10, 30, 60, 120, 300]
+
+
+class Histogram:
+    def __init__(self, buckets=None):
+        self.buckets = buckets or DEFAULT_BUCKETS
+        self.bucket_counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        """Добавление наблюдения"""
+        self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def get_quantile(self, q):
+        """Оценка квантиля по корзинам (верхняя граница корзины)"""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.bucket_counts):
+            seen += bucket_count
+            if seen >= target:
+                return self.buckets[i] if i < len(self.buckets) else self.max
+        return self.max
+
+    def get_summary(self):
+        """Сводка по гистограмме"""
+        return {
+            'count': self.count,
+            'avg': self.total / self.count if self.count else None,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.get_quantile(0.5),
+            'p95': self.get_quantile(0.95)
+        }
+
+
+class MetricsRegistry:
+    """Общий для процесса реестр счетчиков, показателей и гистограмм"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+
+    def inc(self, name, value=1):
+        """Увеличение счетчика"""
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def set_gauge(self, name, value):
+        """Установка текущего значения показателя"""
+        with self.lock:
+            self.gauges[name] = value
+
+    def observe(self, name, value, buckets=None):
+        """Добавление наблюдения в гистограмму"""
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = Histogram(buckets)
+                self.histograms[name] = histogram
+            histogram.observe(value)
+
+    def get_counter(self, name):
+        """Текущее значение счетчика"""
+        with self.lock:
+            return self.counters.get(name, 0)
+
+    def get_snapshot(self):
+        """Снимок всех метрик"""
+        with self.lock:
+            return {
+                'counters': dict(self.counters),
+                'gauges': dict(self.gauges),
+                'histograms': {name: h.get_summary() for name, h in self.histograms.items()}
+            }
+
+
+_registry = MetricsRegistry()
+
+
+def get_metrics_registry():
+    """Получение общего реестра метрик"""
+    return _registry
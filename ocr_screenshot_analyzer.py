@@ -9,7 +9,10 @@ import logging
 import re
 from datetime import datetime
 from playwright.async_api import async_playwright
-from config import POLYMARKET_BASE_URL
+from analysis.browser_profiles import get_browser_profile, USER_AGENT, POLYMARKET_EVENT_URL
+from analysis.rate_limiter import get_navigation_rate_limiter
+from analysis.static_asset_cache import get_static_asset_cache
+from analysis.browser_runtime import get_browser_runtime
 
 # Импортируем настройку логирования
 import logging_config
@@ -20,28 +23,22 @@ class OCRScreenshotAnalyzer:
     def __init__(self):
         self.browser = None
         self.page = None
+        self.profile = get_browser_profile()
+        self.rate_limiter = get_navigation_rate_limiter()
+        self.static_cache = get_static_asset_cache()
         
     async def init_browser(self):
         """Инициализация браузера"""
         try:
             self.playwright = await async_playwright().start()
-            self.browser = await self.playwright.chromium.launch(
-                headless=True,
-                args=[
-                    '--no-sandbox',
-                    '--disable-setuid-sandbox',
-                    '--disable-dev-shm-usage',
-                    '--disable-accelerated-2d-canvas',
-                    '--no-first-run',
-                    '--no-zygote',
-                    '--disable-gpu'
-                ]
-            )
-            self.page = await self.browser.new_page()
+            self.browser = await self.playwright.chromium.launch(**self.profile.get_launch_options())
+            self.page = await self.browser.new_page(**self.profile.get_page_options())
+            if self.static_cache:
+                await self.static_cache.attach_async(self.page)
             
             # Устанавливаем user agent
             await self.page.set_extra_http_headers({
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+                'User-Agent': USER_AGENT
             })
             
             logger.info("Браузер инициализирован для OCR анализа")
@@ -78,16 +75,18 @@ class OCRScreenshotAnalyzer:
         except Exception as e:
             logger.error(f"Ошибка закрытия браузера: {e}")
     
-    async def capture_and_extract_text(self, slug):
-        """Захват скриншотов и извлечение текста"""
+    async def capture_and_extract_text(self, slug, navigate=True):
+        """Захват скриншотов и извлечение текста (navigate=False - страница рынка уже открыта)"""
         try:
-            url = f"{POLYMARKET_BASE_URL}{slug}"
-            
-            # Увеличиваем timeout и используем более мягкие условия
-            await self.page.goto(url, wait_until='domcontentloaded', timeout=60000)
-            
-            # Ждем загрузки контента
-            await asyncio.sleep(3)
+            if navigate:
+                url = f"{POLYMARKET_EVENT_URL}{slug}"
+                
+                # Увеличиваем timeout и используем более мягкие условия
+                await self.rate_limiter.acquire_async()
+                await self.page.goto(url, wait_until='domcontentloaded', timeout=60000)
+                
+                # Ждем загрузки контента
+                await asyncio.sleep(3)
             
             extracted_data = {}
             
@@ -323,7 +322,7 @@ class OCRScreenshotAnalyzer:
             # 5. Открываем новую страницу с полным адресом
             try:
                 # Создаем новую страницу
-                new_page = await self.browser.new_page()
+                new_page = await (self.browser or self.page.context).new_page()
                 await new_page.set_extra_http_headers({
                     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
                 })
@@ -459,8 +458,8 @@ class OCRScreenshotAnalyzer:
             # Конвертируем bytes в PIL Image
             image = Image.open(io.BytesIO(image_data))
             
-            # Извлекаем текст
-            text = pytesseract.image_to_string(image, lang='eng')
+            # Извлекаем текст в пуле потоков рантайма, чтобы не блокировать цикл
+            text = await get_browser_runtime().run_blocking('cpu', pytesseract.image_to_string, image, lang='eng')
             
             return text.strip()
             
@@ -735,16 +734,18 @@ class OCRScreenshotAnalyzer:
             logger.error(f"Ошибка парсинга данных: {e}")
             return {}
     
-    async def analyze_market(self, slug):
-        """Полный анализ рынка через OCR"""
+    async def analyze_market(self, slug, page=None):
+        """Полный анализ рынка через OCR (page - уже открытая страница рынка, без своего браузера)"""
         try:
             logger.info(f"🔍 OCR анализ рынка: {slug}")
             
-            if not await self.init_browser():
+            if page is not None:
+                self.page = page
+            elif not await self.init_browser():
                 return None
             
             # Захватываем скриншоты и извлекаем текст
-            extracted_data = await self.capture_and_extract_text(slug)
+            extracted_data = await self.capture_and_extract_text(slug, navigate=page is None)
             
             if not extracted_data:
                 logger.warning(f"Не удалось извлечь данные для {slug}")
@@ -796,7 +797,24 @@ class OCRScreenshotAnalyzer:
             logger.error(f"Ошибка OCR анализа {slug}: {e}")
             return None
         finally:
-            await self.close_browser()
+            # Чужую страницу закрывает ее владелец
+            if page is None:
+                await self.close_browser()
+    
+    async def extract_market_data(self, slug, page=None):
+        """Анализ рынка в формате DataExtractor.extract_market_data (None, если не удалось)"""
+        result = await self.analyze_market(slug, page)
+        if not result:
+            return None
+        return {
+            'market_exists': result.get('market_exists', True),
+            'is_boolean': result.get('is_boolean', True),
+            'yes_percentage': result.get('yes_percentage', 0),
+            'volume': result.get('volume', 'New'),
+            'contract_address': result.get('contract_address', ''),
+            'status': 'в работе' if result.get('is_boolean', True) else 'closed',
+            'market_name': result.get('title') or 'Unknown Market'
+        }
     
     async def save_extracted_data(self, extracted_data, parsed_data, slug):
         """Сохранение извлеченных данных"""
@@ -17,10 +17,16 @@ class ActiveMarketsUpdater:
     def update_active_markets(self):
         """Обновление активных рынков каждую минуту"""
         try:
+            # Рынки с истекшим окном по индексу реестра - без запроса к БД
+            for expired_market in self.bot.active_markets.expired():
+                logger.warning(f"⚠️ Рынок {expired_market.market_id} закрыт по истечении времени анализа ({self.analysis_time_minutes} мин)")
+                self.lifecycle_manager.stop_market_analysis(expired_market.market_id, "закрыт")
+            
             active_markets = self.reader.get_active_markets()
+            tracked = self.bot.active_markets.snapshot()
             
             for market in active_markets:
-                if market['id'] in self.bot.active_markets:
+                if market['id'] in tracked:
                     # Проверяем время создания из базы данных, а не из active_markets
                     created_at = market.get('created_at_analytic')
                     if created_at:
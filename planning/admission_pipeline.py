@@ -0,0 +1,47 @@
+import logging
+import time
+from monitoring.metrics_registry import get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+# Классы стоимости фильтров: чем больше, тем дороже проверка
+COST_CLASSES = {
+    'string': 0,    # разбор slug/названия в памяти
+    'db': 1,        # запрос к БД
+    'http': 2,      # HTTP-запрос без браузера
+    'browser': 3    # страница в браузере
+}
+
+class AdmissionFilter:
+    """Фильтр допуска нового рынка: check(market) -> None (пропустить) или статус отказа"""
+
+    def __init__(self, name, cost_class, check):
+        if cost_class not in COST_CLASSES:
+            raise ValueError(f"Неизвестный класс стоимости фильтра {name}: {cost_class}")
+        self.name = name
+        self.cost_class = cost_class
+        self.check = check
+
+class AdmissionPipeline:
+    """Цепочка фильтров допуска: от дешевых к дорогим, до первого отказа"""
+
+    def __init__(self, filters):
+        self.metrics = get_metrics_registry()
+        # Сортировка устойчивая: внутри одного класса сохраняется порядок объявления
+        self.filters = sorted(filters, key=lambda admission_filter: COST_CLASSES[admission_filter.cost_class])
+        logger.info(f"✅ Фильтры допуска рынков: {' → '.join(f.name for f in self.filters)}")
+
+    def admit(self, market):
+        """Прогон рынка по фильтрам, возвращает (имя фильтра, статус отказа) или (None, None)"""
+        for admission_filter in self.filters:
+            started = time.monotonic()
+            status = admission_filter.check(market)
+            self.metrics.observe(f'admission.{admission_filter.name}.seconds', time.monotonic() - started)
+
+            if status:
+                self.metrics.inc(f'admission.{admission_filter.name}.rejected')
+                return admission_filter.name, status
+            self.metrics.inc(f'admission.{admission_filter.name}.passed')
+
+        self.metrics.inc('admission.admitted')
+        return None, None
@@ -15,15 +15,17 @@ class MarketSummariesLogger:
         """Логирование сводки по рынкам каждые 10 минут"""
         try:
             active_markets = self.reader.get_active_markets()
+            # Снимок реестра: рынок может быть остановлен другим потоком во время обхода
+            tracked = self.bot.active_markets.snapshot()
             
             for market in active_markets:
-                if market['id'] in self.bot.active_markets:
+                tracked_market = tracked.get(market['id'])
+                if tracked_market:
                     # Проверяем, прошло ли 10 минут с последнего логирования
-                    last_log = self.bot.active_markets[market['id']]['last_log']
-                    if datetime.now() - last_log > timedelta(minutes=10):
+                    if datetime.now() - tracked_market.last_log > timedelta(minutes=10):
                         # Логируем данные рынка
                         self.data_logger.log_market_data(market)
-                        self.bot.active_markets[market['id']]['last_log'] = datetime.now()
+                        self.bot.active_markets.update(market['id'], last_log=datetime.now())
         
         except Exception as e:
             error_msg = f"Error logging market summaries: {e}"
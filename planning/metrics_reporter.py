@@ -0,0 +1,39 @@
+import logging
+from monitoring.metrics_registry import get_metrics_registry
+from active_markets.market_scheduler import get_market_scheduler
+
+logger = logging.getLogger(__name__)
+
+class MetricsReporter:
+    def __init__(self, bot_instance):
+        self.bot = bot_instance
+        self.metrics = get_metrics_registry()
+
+    def log_metrics(self):
+        """Периодический вывод метрик в лог"""
+        try:
+            snapshot = self.metrics.get_snapshot()
+
+            for name, value in sorted(snapshot['counters'].items()):
+                logger.info(f"📈 {name} = {value:g}")
+
+            for name, value in sorted(snapshot['gauges'].items()):
+                logger.info(f"📊 {name} = {value}")
+
+            for name, summary in sorted(snapshot['histograms'].items()):
+                if not summary['count']:
+                    continue
+                logger.info(
+                    f"⏱ {name}: n={summary['count']} avg={summary['avg']:.3f} "
+                    f"p50≤{summary['p50']:g} p95≤{summary['p95']:g} max={summary['max']:.3f}"
+                )
+
+            # Рынки в планировщике: снимки против цели и текущий интервал опроса
+            for slug, market in sorted(get_market_scheduler().get_stats()['markets'].items()):
+                logger.info(
+                    f"🗓 {slug}: снимков {market['samples']}/{market['target']}, "
+                    f"интервал {market['interval_seconds']} сек, до конца окна {market['remaining_seconds']} сек"
+                )
+
+        except Exception as e:
+            logger.error(f"Error logging metrics: {e}")
@@ -1,52 +1,220 @@
 import logging
+import time
 import threading
+import concurrent.futures
 from datetime import datetime, timedelta, timezone
 from database.markets_reader import MarketsReader
 from database.analytic_writer import AnalyticWriter
+from database.ingestion_cursor import IngestionCursor
+from database.seen_slug_index import get_seen_slug_index
 from analysis.category_filter import CategoryFilter
 from analysis.category_validator import CategoryValidator
 from analysis.market_boolean_prechecker import MarketBooleanPrechecker
+from analysis.slug_classifier import get_slug_classifier
 from telegram.new_market_logger import NewMarketLogger
 from active_markets.market_lifecycle_manager import MarketLifecycleManager
 from config.config_loader import ConfigLoader
+from planning.admission_pipeline import AdmissionPipeline, AdmissionFilter
+from monitoring.metrics_registry import get_metrics_registry
 
 logger = logging.getLogger(__name__)
 
+# Насколько раньше водяного знака перечитываем рынки: строка с меньшим created_at может закоммититься позже
+WATERMARK_LAG_SECONDS = 60
+
+def to_utc(value):
+    """Время из БД с часовым поясом UTC (столбцы без пояса хранят UTC)"""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
 class NewMarketsChecker:
     def __init__(self, bot_instance):
         self.bot = bot_instance
         self.markets_reader = MarketsReader()
-        self.analytic_writer = AnalyticWriter()
         self.category_filter = CategoryFilter()
-        self.category_validator = CategoryValidator()
         self.boolean_prechecker = MarketBooleanPrechecker()
         self.new_market_logger = NewMarketLogger()
         self.lifecycle_manager = MarketLifecycleManager(bot_instance)
         self.config = ConfigLoader()
+        self.metrics = get_metrics_registry()
+        self.slug_classifier = get_slug_classifier()
+        self.admission = AdmissionPipeline([
+            AdmissionFilter('boolean_precheck', 'string', self.check_boolean_precheck),
+            AdmissionFilter('category_slug', 'string', self.check_category_slug),
+            AdmissionFilter('category_page', 'browser', self.check_category_page)
+        ])
+        self.ingestion_cursor = IngestionCursor('new_markets')
+        self.batch_size = self.config.get_markets_ingest_batch_size()
+        self.watermark = None
+        self.keyset_index_checked = False
+        # Предзагрузка slug из mkrt_analytic при старте
+        self.seen_index = get_seen_slug_index()
+        # Пул приема пачек новых рынков; AnalyticWriter - свой у каждого потока
+        self.intake_pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.config.get_intake_workers(), thread_name_prefix='intake'
+        )
+        self.thread_state = threading.local()
+        # Проверка категории на странице идет в общем браузере рантайма, поэтому проверяющий один на всех
+        self.category_validator = CategoryValidator()
+    
+    def check_boolean_precheck(self, market):
+        """Предварительная проверка булевости по названию"""
+        boolean_precheck = self.boolean_prechecker.precheck_market_boolean(market['slug'], market.get('classification'))
+        if not boolean_precheck['should_analyze']:
+            logger.warning(f"⚠️ Рынок {market['slug']} отклонен на предварительной проверке: {boolean_precheck['reason']}")
+            return "не подходит по предварительной проверке"
+        return None
+    
+    def check_category_slug(self, market):
+        """Проверка категории по ключевым словам в slug"""
+        category_check = self.category_filter.check_category(market['slug'], market.get('classification'))
+        if not category_check['is_boolean']:
+            logger.info(f"⚠️ Рынок {market['slug']} не подходит по категории, пропускаем")
+            return "не подходит по категории"
+        return None
+    
+    def needs_classification(self, slug):
+        """Нужна ли классификация slug: нет сохраненного решения предпроверки или категории"""
+        return not (self.boolean_prechecker.has_decision(slug) and self.category_filter.has_decision(slug))
+    
+    def check_category_page(self, market):
+        """Проверка категории рынка (Крипто/Спорт) на странице в браузере"""
+        category_validation = self.category_validator.validate_market_category(market['slug'])
+        if not category_validation['is_valid']:
+            logger.warning(f"⚠️ Рынок {market['slug']} заблокирован: {category_validation['status']}")
+            return category_validation['status']
+        return None
+    
+    def get_watermark(self):
+        """Начало чтения: сохраненный водяной знак с запасом назад, но не раньше начала окна анализа"""
+        window_start = datetime.now(timezone.utc) - timedelta(minutes=self.config.get_mkrt_analytic_time_min())
+        if not self.keyset_index_checked:
+            self.keyset_index_checked = True
+            self.markets_reader.ensure_keyset_index()
+        if self.watermark is None:
+            self.watermark = self.ingestion_cursor.load()
+        
+        if self.watermark is None:
+            return window_start
+        created_at = to_utc(self.watermark[0])
+        # Уже прочитанные рынки из запаса отсеет индекс просмотренных slug
+        return max(window_start, created_at - timedelta(seconds=WATERMARK_LAG_SECONDS))
     
     def check_new_markets(self):
-        """Проверка новых рынков каждые 30 секунд"""
+        """Чтение всех рынков после водяного знака страницами по (created_at, id)"""
         try:
-            # Получаем только рынки, которые еще не анализировались
-            markets = self.markets_reader.get_new_markets_after_time(
-                datetime.now(timezone.utc) - timedelta(minutes=self.config.get_mkrt_analytic_time_min())
-            )
+            # Первая страница - по времени с запасом, следующие в этом проходе - строго после последней строки
+            created_at, market_id = self.get_watermark(), None
+            total = 0
+            while True:
+                markets = self.markets_reader.get_markets_after_watermark(created_at, market_id, self.batch_size)
+                if not markets:
+                    break
+                
+                total += len(markets)
+                self.process_markets(markets)
+                
+                # Знак сдвигаем только после обработки страницы и только вперед (запас перечитывает старые строки)
+                created_at, market_id = markets[-1]['created_at'], markets[-1]['id']
+                if self.watermark is None or to_utc(created_at) > to_utc(self.watermark[0]):
+                    self.watermark = (created_at, market_id)
+                    self.ingestion_cursor.save(created_at, market_id)
+                if len(markets) < self.batch_size:
+                    break
             
-            if not markets:
+            self.metrics.inc('intake.rows_read', total)
+            if not total:
                 # Нет новых рынков для анализа
                 logger.debug("ℹ️ Новых рынков для анализа не найдено")
-                return
+        
+        except Exception as e:
+            error_msg = f"Error checking new markets: {e}"
+            logger.error(error_msg)
+            from telegram.error_logger import ErrorLogger
+            error_logger = ErrorLogger()
+            error_logger.log_error(error_msg)
+    
+    def check_notified_markets(self, market_ids):
+        """Обработка рынков из уведомлений о вставке в markets"""
+        try:
+            markets = self.markets_reader.get_markets_by_ids(market_ids)
+            now = datetime.now(timezone.utc)
+            for market in markets:
+                created_at = market.get('created_at')
+                if isinstance(created_at, datetime):
+                    if created_at.tzinfo is None:
+                        created_at = created_at.replace(tzinfo=timezone.utc)
+                    self.metrics.observe('intake.detection_seconds', max(0, (now - created_at).total_seconds()))
+            
+            if markets:
+                self.process_markets(markets)
+        
+        except Exception as e:
+            error_msg = f"Error checking notified markets: {e}"
+            logger.error(error_msg)
+            from telegram.error_logger import ErrorLogger
+            error_logger = ErrorLogger()
+            error_logger.log_error(error_msg)
+    
+    def get_analytic_writer(self):
+        """AnalyticWriter своего потока: у каждого потока приема отдельное соединение с БД"""
+        if not hasattr(self.thread_state, 'analytic_writer'):
+            self.thread_state.analytic_writer = AnalyticWriter()
+        return self.thread_state.analytic_writer
+    
+    def admit_market(self, market, detected_at):
+        """Допуск одного рынка (в пуле приема); ошибка не затрагивает остальные рынки пачки"""
+        try:
+            analytic_writer = self.get_analytic_writer()
+            
+            # Фильтры допуска от дешевых к дорогим: браузер видит только прошедшие строковые проверки
+            filter_name, rejected_status = self.admission.admit(market)
+            if rejected_status:
+                # Добавляем рынок в аналитическую базу со статусом отказа
+                market_id = analytic_writer.insert_market_to_analytic(market)
+                if market_id:
+                    analytic_writer.update_market_status(market_id, rejected_status)
+                    logger.info(f"✅ Рынок {market['slug']} добавлен с статусом: {rejected_status} (фильтр {filter_name})")
+                return f"отклонен ({filter_name}: {rejected_status})"
+            
+            # Добавляем рынок в аналитическую базу
+            market_id = analytic_writer.insert_market_to_analytic(market)
+            if not market_id:
+                return "не удалось добавить в БД"
             
-            # Фильтруем рынки, которые уже были проверены
+            # Начинаем анализ рынка; захват атомарный - параллельный прием того же рынка его не запустит
+            if not self.lifecycle_manager.start_market_analysis(market_id, market, detected_at):
+                return "уже в процессе анализа"
+            
+            # Логируем новый рынок
+            self.new_market_logger.log_new_market(market)
+            logger.info(f"Started analysis for market: {market['slug']}")
+            
+            # Запускаем анализ задачей в общем цикле рантайма
+            self.lifecycle_manager.launch_market_analysis(market_id, market['slug'])
+            return 'admitted'
+        
+        except Exception as e:
+            error_msg = f"Error admitting market {market.get('slug', 'unknown')}: {e}"
+            logger.error(error_msg)
+            self.metrics.inc('intake.admission_errors')
+            from telegram.error_logger import ErrorLogger
+            ErrorLogger().log_error(error_msg, market.get('slug'))
+            return f"ошибка: {e}"
+    
+    def process_markets(self, markets):
+        """Проверки и запуск анализа для найденных рынков"""
+        try:
+            # Фильтруем рынки, которые уже были проверены (индекс в памяти, БД - одним запросом)
+            existing_slugs = self.seen_index.find_existing([market['slug'] for market in markets])
             unchecked_markets = []
             for market in markets:
                 # Проверяем, не анализировался ли уже этот рынок в прошлом
-                if self.analytic_writer.market_exists_in_analytic(market['slug']):
+                if market['slug'] in existing_slugs:
                     logger.debug(f"ℹ️ Рынок {market['slug']} уже анализировался ранее, пропускаем")
                     continue
                 
                 # Проверяем, не анализируем ли уже этот рынок
-                if market['id'] in self.bot.active_markets:
+                if self.bot.active_markets.has_slug(market['slug']):
                     logger.debug(f"ℹ️ Рынок {market['slug']} уже в процессе анализа, пропускаем")
                     continue
                 
@@ -58,66 +226,32 @@ class NewMarketsChecker:
             
             logger.info(f"🔍 Найдено {len(unchecked_markets)} новых необработанных рынков для проверки")
             
-            for market in unchecked_markets:
-                # Предварительная проверка булевости по названию
-                boolean_precheck = self.boolean_prechecker.precheck_market_boolean(market['slug'])
-                
-                if not boolean_precheck['should_analyze']:
-                    logger.warning(f"⚠️ Рынок {market['slug']} отклонен на предварительной проверке: {boolean_precheck['reason']}")
-                    
-                    # Добавляем рынок в аналитическую базу с статусом "не подходит"
-                    market_id = self.analytic_writer.insert_market_to_analytic(market)
-                    if market_id:
-                        self.analytic_writer.update_market_status(market_id, "не подходит по предварительной проверке")
-                        logger.info(f"✅ Рынок {market['slug']} добавлен с статусом: не подходит по предварительной проверке")
-                    continue
-                
-                # Проверяем категорию рынка (Крипто/Спорт)
-                category_validation = self.category_validator.validate_market_category(market['slug'])
-                if not category_validation['is_valid']:
-                    logger.warning(f"⚠️ Рынок {market['slug']} заблокирован: {category_validation['status']}")
-                    
-                    # Добавляем рынок в аналитическую базу с заблокированным статусом
-                    market_id = self.analytic_writer.insert_market_to_analytic(market)
-                    if market_id:
-                        # Обновляем статус на заблокированный
-                        self.analytic_writer.update_market_status(market_id, category_validation['status'])
-                        logger.info(f"✅ Рынок {market['slug']} добавлен с статусом: {category_validation['status']}")
-                    continue
-                
-                # Проверяем булевость рынка
-                category_check = self.category_filter.check_category(market['slug'])
-                if not category_check['is_boolean']:
-                    logger.info(f"⚠️ Рынок {market['slug']} не подходит по категории, пропускаем")
-                    
-                    # Добавляем рынок в аналитическую базу с статусом "не подходит"
-                    market_id = self.analytic_writer.insert_market_to_analytic(market)
-                    if market_id:
-                        self.analytic_writer.update_market_status(market_id, "не подходит по категории")
-                        logger.info(f"✅ Рынок {market['slug']} добавлен с статусом: не подходит по категории")
-                    continue
-                
-                # Добавляем рынок в аналитическую базу
-                market_id = self.analytic_writer.insert_market_to_analytic(market)
-                
-                if market_id:
-                    # Начинаем анализ рынка
-                    self.lifecycle_manager.start_market_analysis(market_id, market)
-                    
-                    # Логируем новый рынок
-                    self.new_market_logger.log_new_market(market)
-                    logger.info(f"Started analysis for market: {market['slug']}")
-                    
-                    # Запускаем анализ в отдельном потоке
-                    analysis_thread = threading.Thread(
-                        target=self.lifecycle_manager.analyze_market_continuously,
-                        args=(market_id, market['slug'])
-                    )
-                    analysis_thread.daemon = True
-                    analysis_thread.start()
+            # Строковые фильтры пачки - один проход классификатора по slug, для которых нет сохраненных решений
+            to_classify = [market for market in unchecked_markets if self.needs_classification(market['slug'])]
+            classifications = dict(zip(
+                (market['id'] for market in to_classify),
+                self.slug_classifier.classify_batch([market['slug'] for market in to_classify])
+            ))
+            unchecked_markets = [dict(market, classification=classifications.get(market['id']))
+                                 for market in unchecked_markets]
+            
+            # Рынки пачки допускаются параллельно; итоги логируем в исходном порядке
+            burst_started = time.monotonic()
+            futures = [self.intake_pool.submit(self.admit_market, market, burst_started) for market in unchecked_markets]
+            admitted = 0
+            for market, future in zip(unchecked_markets, futures):
+                result = future.result()
+                if result == 'admitted':
+                    admitted += 1
+                logger.info(f"📥 Рынок {market['slug']}: {result}")
+            
+            burst_seconds = time.monotonic() - burst_started
+            self.metrics.observe('intake.burst_seconds', burst_seconds)
+            logger.info(f"✅ Пачка из {len(unchecked_markets)} рынков обработана за {burst_seconds:.1f} сек, "
+                        f"на анализ допущено {admitted}")
         
         except Exception as e:
-            error_msg = f"Error checking new markets: {e}"
+            error_msg = f"Error processing new markets: {e}"
             logger.error(error_msg)
             from telegram.error_logger import ErrorLogger
             error_logger = ErrorLogger()
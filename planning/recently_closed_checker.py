@@ -1,5 +1,4 @@
 import logging
-import threading
 import time
 from datetime import datetime, timedelta
 from database.active_markets_reader import ActiveMarketsReader
@@ -66,20 +65,12 @@ class RecentlyClosedChecker:
                             continue
                         
                         # Добавляем в активные рынки
-                        self.bot.active_markets[market_id] = {
-                            'start_time': datetime.now(),
-                            'last_log': datetime.now(),
-                            'slug': slug,
-                            'question': market.get('question', f"Market: {slug}")
-                        }
+                        if not self.bot.active_markets.claim(market_id, slug, market.get('question', f"Market: {slug}")):
+                            logger.info(f"ℹ️ Рынок {slug} уже в процессе анализа")
+                            continue
                         
-                        # Запускаем анализ в отдельном потоке
-                        analysis_thread = threading.Thread(
-                            target=self.lifecycle_manager.analyze_market_continuously_restored,
-                            args=(market_id, slug)
-                        )
-                        analysis_thread.daemon = True
-                        analysis_thread.start()
+                        # Запускаем анализ задачей в общем цикле рантайма
+                        self.lifecycle_manager.launch_market_analysis(market_id, slug, restored=True)
                         
                         logger.info(f"✅ Рынок {slug} восстановлен после ошибочного закрытия")
                     else:
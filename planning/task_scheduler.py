@@ -7,6 +7,10 @@ from planning.new_markets_checker import NewMarketsChecker
 from planning.active_markets_updater import ActiveMarketsUpdater
 from planning.market_summaries_logger import MarketSummariesLogger
 from planning.recently_closed_checker import RecentlyClosedChecker
+from planning.metrics_reporter import MetricsReporter
+from config.config_loader import ConfigLoader
+from database.markets_listener import MarketsListener
+from monitoring.metrics_registry import get_metrics_registry
 
 logger = logging.getLogger(__name__)
 
@@ -17,10 +21,17 @@ class TaskScheduler:
         self.active_markets_updater = ActiveMarketsUpdater(bot_instance)
         self.market_summaries_logger = MarketSummariesLogger(bot_instance)
         self.recently_closed_checker = RecentlyClosedChecker(bot_instance)
+        self.metrics_reporter = MetricsReporter(bot_instance)
+        self.config = ConfigLoader()
+        self.metrics = get_metrics_registry()
         
         # Флаги для управления потоками
         self.running = False
         self.last_market_check = None
+        
+        # Уведомления о вставке в markets; опрос остается страховкой от пропущенных уведомлений
+        self.markets_listener = MarketsListener() if self.config.get_new_markets_listen_enabled() else None
+        self.safety_poll_seconds = self.config.get_new_markets_safety_poll_seconds()
     
     def schedule_all_tasks(self):
         """Планирование всех задач"""
@@ -29,6 +40,7 @@ class TaskScheduler:
             schedule.every(1).minutes.do(self.active_markets_updater.update_active_markets)
             schedule.every(10).minutes.do(self.market_summaries_logger.log_market_summaries)
             schedule.every(5).minutes.do(self.recently_closed_checker.check_recently_closed_markets)
+            schedule.every(self.config.get_logging_interval_minutes()).minutes.do(self.metrics_reporter.log_metrics)
             
             logger.info("✅ Все задачи запланированы успешно")
         except Exception as e:
@@ -42,23 +54,40 @@ class TaskScheduler:
         market_checker_thread.start()
         logger.info("✅ Поток проверки новых рынков запущен")
     
+    def get_poll_interval_seconds(self):
+        """Интервал опроса markets: 30 секунд, при активной подписке - редкий страховочный"""
+        if self.markets_listener and self.markets_listener.is_connected():
+            return self.safety_poll_seconds
+        return 30
+    
     def _run_market_checker(self):
-        """Отдельный поток для проверки новых рынков каждые 30 секунд"""
+        """Отдельный поток для проверки новых рынков (уведомления + периодический опрос)"""
         logger.info("🚀 Поток проверки новых рынков начал работу")
         check_count = 0
+        if self.markets_listener:
+            self.markets_listener.connect()
         
         while self.running and self.bot.running:
             try:
+                # Новые рынки из уведомлений обрабатываем сразу, без ожидания опроса
+                if self.markets_listener:
+                    market_ids = self.markets_listener.wait(timeout=1)
+                    if market_ids:
+                        logger.info(f"🔔 Уведомление о {len(market_ids)} новых рынках")
+                        self.new_markets_checker.check_notified_markets(market_ids)
+                
                 current_time = datetime.now()
+                poll_interval = self.get_poll_interval_seconds()
                 
-                # Проверяем, прошло ли 30 секунд с последней проверки
+                # Проверяем, прошел ли интервал опроса с последней проверки
                 if (self.last_market_check is None or 
-                    (current_time - self.last_market_check).total_seconds() >= 30):
+                    (current_time - self.last_market_check).total_seconds() >= poll_interval):
                     
                     check_count += 1
                     logger.info(f"🔍 Проверка новых рынков #{check_count}...")
                     
                     try:
+                        self.metrics.inc('intake.polls')
                         self.new_markets_checker.check_new_markets()
                         logger.info(f"✅ Проверка новых рынков #{check_count} завершена")
                     except Exception as e:
@@ -68,15 +97,18 @@ class TaskScheduler:
                 else:
                     # Логируем каждые 10 секунд для отслеживания работы потока
                     if check_count > 0 and (current_time - self.last_market_check).total_seconds() % 10 < 1:
-                        remaining = 30 - (current_time - self.last_market_check).total_seconds()
+                        remaining = poll_interval - (current_time - self.last_market_check).total_seconds()
                         logger.debug(f"⏳ До следующей проверки: {remaining:.0f} сек")
                 
-                time.sleep(1)  # Небольшая пауза между проверками
+                if not self.markets_listener:
+                    time.sleep(1)  # Небольшая пауза между проверками
                 
             except Exception as e:
                 logger.error(f"❌ Критическая ошибка в потоке проверки новых рынков: {e}")
                 time.sleep(5)  # Пауза при ошибке
         
+        if self.markets_listener:
+            self.markets_listener.close()
         logger.info("🛑 Поток проверки новых рынков завершил работу")
     
     def stop_market_checker_thread(self):
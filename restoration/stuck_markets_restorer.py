@@ -1,6 +1,4 @@
 import logging
-import threading
-from datetime import datetime
 from database.active_markets_reader import ActiveMarketsReader
 from database.analytic_updater import AnalyticUpdater
 from analysis.category_filter import CategoryFilter
@@ -42,20 +40,12 @@ class StuckMarketsRestorer:
                     # Продолжаем анализ даже при ошибке проверки категории
                 
                 # Добавляем в активные рынки
-                self.bot.active_markets[market_id] = {
-                    'start_time': datetime.now(),
-                    'last_log': datetime.now(),
-                    'slug': slug,
-                    'question': market.get('question', f"Market: {slug}")
-                }
+                if not self.bot.active_markets.claim(market_id, slug, market.get('question', f"Market: {slug}")):
+                    logger.info(f"ℹ️ Рынок {slug} уже в процессе анализа")
+                    continue
                 
-                # Запускаем анализ в отдельном потоке
-                analysis_thread = threading.Thread(
-                    target=self.lifecycle_manager.analyze_market_continuously_restored,
-                    args=(market_id, slug)
-                )
-                analysis_thread.daemon = True
-                analysis_thread.start()
+                # Запускаем анализ задачей в общем цикле рантайма
+                self.lifecycle_manager.launch_market_analysis(market_id, slug, restored=True)
                 
                 logger.info(f"✅ Рынок {slug} восстановлен")
             
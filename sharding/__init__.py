@@ -0,0 +1 @@
+# Sharding module initialization
\ No newline at end of file
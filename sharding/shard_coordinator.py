@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Координатор шардов: распределяет рынки по процессам-воркерам по хэшу slug
+При падении воркера его рынки переходят к живым шардам, а воркер перезапускается
+"""
+
+import concurrent.futures
+import hashlib
+import itertools
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from analysis.deadline import new_analysis_deadline
+from config.config_loader import ConfigLoader
+from monitoring.metrics_registry import get_metrics_registry
+from sharding.shard_worker import run_shard_worker
+
+logger = logging.getLogger(__name__)
+
+# Запас сверх дедлайна на передачу задачи и результата между процессами
+DEADLINE_GRACE_SECONDS = 20
+
+
+def rendezvous_score(slug, shard_id):
+    """Вес пары (рынок, шард) для rendezvous-хэширования"""
+    digest = hashlib.md5(f"{slug}:{shard_id}".encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+
+class ShardCoordinator:
+    def __init__(self, num_shards, worker_threads):
+        self.num_shards = num_shards
+        self.worker_threads = worker_threads
+        self.mp_context = multiprocessing.get_context('spawn')
+        self.result_queue = self.mp_context.Queue()
+        self.processes = {}
+        self.task_queues = {}
+        self.alive_shards = set()
+        self.pending = {}
+        self.request_ids = itertools.count(1)
+        self.lock = threading.Lock()
+        self.running = False
+        self.metrics = get_metrics_registry()
+
+    def start(self):
+        """Запуск процессов-воркеров и служебных потоков"""
+        with self.lock:
+            if self.running:
+                return
+            self.running = True
+            for shard_id in range(self.num_shards):
+                self._spawn_worker(shard_id)
+
+        for target, name in [(self._result_loop, 'shard-results'), (self._monitor_loop, 'shard-monitor')]:
+            thread = threading.Thread(target=target, name=name)
+            thread.daemon = True
+            thread.start()
+
+        logger.info(f"✅ Координатор шардов запущен: {self.num_shards} процессов по {self.worker_threads} потока")
+
+    def _spawn_worker(self, shard_id):
+        """Запуск (или перезапуск) процесса шарда; вызывается под self.lock"""
+        task_queue = self.mp_context.Queue()
+        process = self.mp_context.Process(
+            target=run_shard_worker,
+            args=(shard_id, task_queue, self.result_queue, self.worker_threads),
+            name=f'shard-{shard_id}'
+        )
+        process.daemon = True
+        process.start()
+        self.processes[shard_id] = process
+        self.task_queues[shard_id] = task_queue
+        self.alive_shards.add(shard_id)
+        self.metrics.set_gauge('shards.alive', len(self.alive_shards))
+
+    def get_shard_for(self, slug):
+        """Шард, которому принадлежит рынок (только среди живых)"""
+        with self.lock:
+            if not self.alive_shards:
+                return None
+            return max(self.alive_shards, key=lambda shard_id: rendezvous_score(slug, shard_id))
+
+    def submit(self, slug, warm, deadline):
+        """Отправка анализа в шард-владелец, возвращает (request_id, Future с данными рынка или None)"""
+        if not self.running:
+            self.start()
+
+        future = concurrent.futures.Future()
+        # Дедлайн не сериализуется между процессами, поэтому передаем его остаток
+        task = {
+            'request_id': next(self.request_ids),
+            'slug': slug,
+            'warm': warm,
+            'deadline_seconds': deadline.remaining()
+        }
+        if not self._dispatch(task, future):
+            logger.error(f"❌ Нет живых шардов для анализа рынка {slug}")
+            future.set_result(None)
+        return task['request_id'], future
+
+    def forget(self, request_id):
+        """Снятие ожидания результата (по таймауту вызывающей стороны)"""
+        with self.lock:
+            self.pending.pop(request_id, None)
+
+    def analyze_market(self, slug, warm=False, deadline=None):
+        """Синхронный анализ рынка в шарде-владельце"""
+        deadline = deadline or new_analysis_deadline()
+        request_id, future = self.submit(slug, warm, deadline)
+        try:
+            return future.result(timeout=deadline.remaining() + DEADLINE_GRACE_SECONDS)
+        except concurrent.futures.TimeoutError:
+            deadline.record_expiry()
+            logger.error(f"⏰ Таймаут анализа рынка {slug} в шарде")
+            self.forget(request_id)
+            return None
+
+    def _dispatch(self, task, future):
+        """Отправка задачи в очередь шарда-владельца"""
+        shard_id = self.get_shard_for(task['slug'])
+        if shard_id is None:
+            return False
+        with self.lock:
+            self.pending[task['request_id']] = (future, task, shard_id)
+            self.task_queues[shard_id].put(task)
+        self.metrics.inc(f'shards.{shard_id}.tasks')
+        return True
+
+    def _result_loop(self):
+        """Прием результатов от воркеров"""
+        while self.running:
+            try:
+                result = self.result_queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            except Exception as e:
+                logger.error(f"❌ Ошибка чтения результатов шардов: {e}")
+                continue
+
+            with self.lock:
+                entry = self.pending.pop(result['request_id'], None)
+            if not entry or entry[0].done():
+                continue
+
+            future, task, _ = entry
+            if result['error']:
+                logger.error(f"❌ Шард {result['shard_id']} не проанализировал рынок {task['slug']}: {result['error']}")
+                future.set_result(None)
+            else:
+                future.set_result(result['data'])
+
+    def _monitor_loop(self):
+        """Отслеживание упавших воркеров и ребалансировка их рынков"""
+        while self.running:
+            time.sleep(2)
+            with self.lock:
+                dead = [shard_id for shard_id, process in self.processes.items()
+                        if shard_id in self.alive_shards and not process.is_alive()]
+            for shard_id in dead:
+                self._handle_dead_worker(shard_id)
+
+    def _handle_dead_worker(self, shard_id):
+        exitcode = self.processes[shard_id].exitcode
+        logger.error(f"💥 Шард {shard_id} упал (код {exitcode}), переносим его рынки на живые шарды")
+        self.metrics.inc('shards.worker_deaths')
+
+        with self.lock:
+            self.alive_shards.discard(shard_id)
+            orphaned = [(request_id, future, task) for request_id, (future, task, owner)
+                        in self.pending.items() if owner == shard_id]
+            for request_id, _, _ in orphaned:
+                del self.pending[request_id]
+
+        # Незавершенные задачи упавшего шарда отдаем новым владельцам
+        for _, future, task in orphaned:
+            if not self._dispatch(task, future) and not future.done():
+                logger.error(f"❌ Нет живых шардов для анализа рынка {task['slug']}")
+                future.set_result(None)
+
+        with self.lock:
+            if self.running:
+                self._spawn_worker(shard_id)
+        logger.info(f"🔄 Шард {shard_id} перезапущен")
+
+    def stop(self):
+        """Остановка воркеров"""
+        with self.lock:
+            if not self.running:
+                return
+            self.running = False
+            for task_queue in self.task_queues.values():
+                for _ in range(self.worker_threads):
+                    task_queue.put(None)
+            processes = list(self.processes.values())
+
+        for process in processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        logger.info("🛑 Координатор шардов остановлен")
+
+
+_coordinator = None
+_coordinator_lock = threading.Lock()
+
+
+def get_shard_coordinator():
+    """Получение координатора шардов (None, если шардирование выключено)"""
+    global _coordinator
+    with _coordinator_lock:
+        if _coordinator is None:
+            config = ConfigLoader()
+            if config.get_worker_shards() <= 0:
+                return None
+            _coordinator = ShardCoordinator(config.get_worker_shards(), config.get_shard_worker_threads())
+        return _coordinator
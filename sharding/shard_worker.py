@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Процесс-воркер шарда: свой браузерный рантайм, задачи из очереди, результаты в общую очередь
+"""
+
+import logging
+import os
+import queue
+import threading
+
+
+def run_shard_worker(shard_id, task_queue, result_queue, worker_threads):
+    """Точка входа процесса шарда"""
+    # Импорты внутри процесса: у каждого шарда свои браузеры, рантайм и пул контекстов
+    import logging_config
+    from analysis.market_analyzer_core import MarketAnalyzerCore
+    from analysis.deadline import Deadline
+
+    logger = logging.getLogger(__name__)
+    logger.info(f"🚀 Шард {shard_id} запущен (PID {os.getpid()}, потоков {worker_threads})")
+
+    stop_event = threading.Event()
+    # Анализы идут задачами рантайма этого процесса; потоки только ждут их, поэтому анализатор общий
+    analyzer = MarketAnalyzerCore()
+
+    def worker_loop():
+        while not stop_event.is_set():
+            try:
+                task = task_queue.get(timeout=1)
+            except queue.Empty:
+                continue
+
+            if task is None:
+                stop_event.set()
+                break
+
+            result = {
+                'request_id': task['request_id'],
+                'shard_id': shard_id,
+                'data': None,
+                'error': None
+            }
+            try:
+                deadline = Deadline(task['deadline_seconds'])
+                if task.get('warm'):
+                    result['data'] = analyzer.analyze_market_warm(task['slug'], deadline)
+                else:
+                    result['data'] = analyzer.analyze_market(task['slug'], deadline)
+            except Exception as e:
+                logger.error(f"❌ Шард {shard_id}: ошибка анализа рынка {task['slug']}: {e}")
+                result['error'] = str(e)
+
+            result_queue.put(result)
+
+    threads = []
+    for i in range(worker_threads):
+        thread = threading.Thread(target=worker_loop, name=f'shard-{shard_id}-worker-{i}')
+        thread.daemon = True
+        thread.start()
+        threads.append(thread)
+
+    for thread in threads:
+        thread.join()
+
+    logger.info(f"🛑 Шард {shard_id} завершил работу")